@@ -0,0 +1,175 @@
+"""
+Admission control for AI searches: a bounded queue in front of a fixed number
+of search slots.
+
+- At most AI_MAX_SEARCHES searches run at once (default: one per core); a Lazy
+  SMP search takes one slot per worker process. Further requests wait in
+  arrival order, at most AI_SEARCH_QUEUE of them.
+- Every request has a deadline. A request is rejected at once, with the number
+  of seconds after which to retry, when the queue is full or when the expected
+  wait already runs past its deadline; a request still waiting at its deadline
+  is rejected too. The expected wait assumes running searches take their whole
+  time budget and queued ones the recent average search duration.
+- Admitted searches get what is left of their deadline as time budget, reduced
+  further with the pressure (the share of the queue in use when they were
+  admitted); from SHALLOW_PRESSURE on they fall back to a SHALLOW_DEPTH search.
+"""
+
+import heapq
+import math
+import os
+import threading
+import time
+from collections import deque
+
+MAX_SEARCHES = int(os.environ.get('AI_MAX_SEARCHES', '0')) or os.cpu_count() or 1
+MAX_QUEUED = int(os.environ.get('AI_SEARCH_QUEUE', str(4 * MAX_SEARCHES)))
+# Seconds an /aimove may take in all, waiting included, when it sets no time limit
+MOVE_DEADLINE = float(os.environ.get('AI_MOVE_DEADLINE', '10'))
+
+# Share of the full budget left to a search admitted with a full queue
+MIN_BUDGET_FRACTION = 0.25
+SHALLOW_PRESSURE = 0.5
+SHALLOW_DEPTH = 1
+# Shortest time worth starting a search with
+MIN_SEARCH_SECONDS = 0.05
+# Weight of the latest search in the average search duration
+DURATION_SMOOTHING = 0.2
+
+
+class Overloaded(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        # Whole seconds, as sent in the Retry-After header
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class Slot:
+    """An admitted search; release it (or leave its with block) when the search is done."""
+
+    def __init__(self, controller, weight, deadline, pressure):
+        self.controller = controller
+        self.weight = weight
+        self.deadline = deadline
+        self.pressure = pressure
+        self.start = time.monotonic()
+        # When the search is expected to be done, set by budget()
+        self.end = deadline
+        self.released = False
+
+    def budget(self, depth, time_limit=None):
+        """
+        (depth, time limit) for the search: the requested time limit, if any, cut
+        to the remaining deadline and scaled down with the pressure; the depth cut
+        to SHALLOW_DEPTH under high pressure.
+        """
+        now = time.monotonic()
+        remaining = max(MIN_SEARCH_SECONDS, self.deadline - now)
+        scale = 1.0 - self.pressure * (1.0 - MIN_BUDGET_FRACTION)
+        if time_limit:
+            time_limit = min(time_limit * scale, remaining)
+            self.end = now + time_limit
+        else:
+            # A fixed-depth search: the deadline only guards it, expect a usual duration
+            time_limit = remaining
+            self.end = min(self.deadline, now + self.controller.search_seconds)
+        if self.shallow() and depth > SHALLOW_DEPTH:
+            self.controller.degraded += 1
+            depth = SHALLOW_DEPTH
+        return depth, time_limit
+
+    def shallow(self):
+        """Whether the search should fall back to a shallow one."""
+        return self.pressure >= SHALLOW_PRESSURE
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdmissionController:
+    def __init__(self, max_active=MAX_SEARCHES, max_queued=MAX_QUEUED):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.cond = threading.Condition()
+        self.active = 0
+        self.running = set()
+        # Waiting requests, as [weight] lists, in arrival order
+        self.waiting = deque()
+        # Moving average of the search durations, for the expected wait
+        self.search_seconds = 0.5
+        self.admitted = 0
+        self.rejected = 0
+        self.degraded = 0
+
+    def admit(self, deadline, weight=1):
+        """
+        Wait for a free slot until `deadline` (a time.monotonic() value). Returns a
+        Slot, or raises Overloaded when the request cannot start in time.
+        """
+        weight = max(1, min(weight, self.max_active))
+        with self.cond:
+            if not self.waiting and self.active + weight <= self.max_active:
+                return self._admit(weight, deadline)
+            if len(self.waiting) >= self.max_queued:
+                self.rejected += 1
+                raise Overloaded('search queue full', self._expected_wait(len(self.waiting)))
+            expected = self._expected_wait(len(self.waiting) + 1)
+            if time.monotonic() + expected + MIN_SEARCH_SECONDS > deadline:
+                self.rejected += 1
+                raise Overloaded('deadline cannot be met', expected)
+
+            entry = [weight]
+            self.waiting.append(entry)
+            try:
+                while self.waiting[0] is not entry or self.active + weight > self.max_active:
+                    remaining = deadline - MIN_SEARCH_SECONDS - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise Overloaded('deadline passed in the queue',
+                                         self._expected_wait(len(self.waiting)))
+                    self.cond.wait(remaining)
+            finally:
+                self.waiting.remove(entry)
+                # The next in line may fit now
+                self.cond.notify_all()
+            return self._admit(weight, deadline)
+
+    def busy(self):
+        """Whether every slot is taken, e.g. to skip optional work such as pondering."""
+        return self.active >= self.max_active or bool(self.waiting)
+
+    def _admit(self, weight, deadline):
+        self.active += weight
+        self.admitted += 1
+        pressure = len(self.waiting) / self.max_queued if self.max_queued else 1.0
+        slot = Slot(self, weight, deadline, min(1.0, pressure))
+        self.running.add(slot)
+        return slot
+
+    def _expected_wait(self, position):
+        """Seconds until the request at `position` in the queue (1 = next) can start."""
+        now = time.monotonic()
+        # When each slot becomes free, then one queued search after the other
+        free_at = [max(now, slot.end) for slot in self.running for _ in range(slot.weight)]
+        free_at += [now] * (self.max_active - len(free_at))
+        heapq.heapify(free_at)
+        for _ in range(position - 1):
+            heapq.heappush(free_at, heapq.heappop(free_at) + self.search_seconds)
+        return free_at[0] - now
+
+    def _release(self, slot):
+        with self.cond:
+            self.active -= slot.weight
+            self.running.discard(slot)
+            seconds = time.monotonic() - slot.start
+            self.search_seconds += DURATION_SMOOTHING * (seconds - self.search_seconds)
+            self.cond.notify_all()
@@ -2,358 +2,177 @@
 Explosive Atomic Chess Flask Backend with AI
 
 - Board state handled via python-chess extended for explosive captures.
-- AI uses a simple Minimax with explosion-aware evaluation.
+- AI uses a simple Minimax with explosion-aware evaluation (engine/search.py),
+  optionally run as a Lazy SMP search over several processes (engine/lazy_smp.py).
+- /aimove and /api/get-ai-move searches pass a bounded admission queue
+  (admission.py): under load they get smaller budgets or are turned away with
+  503 and Retry-After, instead of all slowing down together.
+- While the player thinks, a worker process ponders the expected replies
+  (engine/ponder.py); AI_PONDER=0 turns it off.
+- Search results are cached on disk across games (engine/search_cache.py) and
+  consulted before every search; AI_SEARCH_CACHE='' turns it off.
 - API Endpoints:
   - /new_game [POST] - start new game
   - /game_state [GET] - get current game state
   - /make_move [POST] - player move (from,to,san,...)
   - /ai_move [POST] - trigger AI move for given color
+  - /history [GET] - moves of the current game; ?ply=N: the position after ply N
+  - /takeback [POST] - take back the last plies (plies, default 1)
+  - /api/metrics [GET] - Prometheus-style request, search and rules metrics
+  - /api/analyze/batch [POST] - evaluation and best move for many FENs at once
+  - /api/validate-move, /api/get-ai-move, /api/check-game-state [POST] - take
+    the board as an 8x8 grid, a FEN, a packed 64-character string or a game id
+- Games are logged to SQLite (persistence.py) and the unfinished game is
+  recovered on startup; GAME_DB_PATH='' turns persistence off.
+- The current game lives in a game store (game_store.py): in this process, or
+  in SQLite or shared memory so any worker of a prefork server (GAME_STORE=sqlite
+  or shm) can serve it. Moves are saved with optimistic versioning; a move on a
+  position that changed meanwhile gets 409 Conflict.
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import chess
 import chess.pgn
-import copy
+import importlib
+import math
+import os
 import random
+import signal
 import threading
+import time
+
+import metrics
+from admission import MOVE_DEADLINE, AdmissionController, Overloaded
+from game_store import VersionConflict, open_game_store
+from persistence import GameLog
+from engine.batch_analysis import BATCH_WORKERS, MAX_BATCH_POSITIONS, MIN_POOL_BATCH, analyze_batch
+from engine.board_codec import board_from_fen, parse_board
+from engine.explosive_board import ExplosiveBoard
+from engine.lazy_smp import parallel_search
+from engine.ponder import Ponderer
+from engine.search_cache import get_search_cache
+from engine.search import SEARCH_STATS, search_best_move
+from engine.search_context import (DEFAULT_ASPIRATION, DEFAULT_PVS, SHUTDOWN, CancelToken,
+                                   SearchContext)
 
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
-
-# We extend the python-chess board with explosion rules of Atomic Chess.
-# Explosions eliminate captured piece and all surrounding pieces except pawns.
-
-class ExplosiveBoard(chess.Board):
-    def __init__(self, *args, **kwargs):
-        super(ExplosiveBoard, self).__init__(*args, **kwargs)
-        # Custom tracking of exploded squares after move for client info
-        self.exploded_squares = []
-        # Track if a king was exploded
-        self.king_exploded = False
-        self.winner = None
-
-    def push(self, move):
-        """
-        Override push to handle explosion after capture.
-        Explosion rules:
-        - When a piece is captured, explosion affects all squares surrounding the captured square, 
-          excluding pawns.
-        - Capture triggers explosion that eliminates all pieces in those squares except pawns.
-        """
-        if self.is_game_over():
-            return super().push(move)
-
-        # Store the current player's color before making the move
-        current_player = self.turn
-        
-        capture_square = None
-        if self.is_capture(move):
-            capture_square = move.to_square
-        else:
-            capture_square = None
+CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True, expose_headers=['ETag'])
 
-        # Check for pawn promotion
-        promotion = move.promotion
-        
-        # Push move normally first
-        super().push(move)
-
-        self.exploded_squares = []
-        self.king_exploded = False
-
-        if capture_square is not None:
-            # Compute explosion squares: the 8 squares surrounding the capture_square + the capture_square itself
-            explosion_squares = [capture_square]
-            f = chess.square_file(capture_square)
-            r = chess.square_rank(capture_square)
-            for df in [-1,0,1]:
-                for dr in [-1,0,1]:
-                    if df == 0 and dr == 0:
-                        continue
-                    ff = f + df
-                    rr = r + dr
-                    if 0 <= ff <= 7 and 0 <= rr <= 7:
-                        sq = chess.square(ff, rr)
-                        explosion_squares.append(sq)
-
-            # The explosion eliminates all pieces on these squares except pawns.
-            removed_squares = []
-            for sq in explosion_squares:
-                piece = self.piece_at(sq)
-                if piece is not None:
-                    # Check if a king is being exploded
-                    if piece.piece_type == chess.KING:
-                        self.king_exploded = True
-                        # The winner is the opposite of the king's color
-                        self.winner = not piece.color
-                    
-                    if piece.piece_type != chess.PAWN:
-                        self.remove_piece_at(sq)
-                        removed_squares.append(sq)
+# Request accounting for /api/metrics
+request_metrics = metrics.RequestMetrics()
 
-            # Store exploded squares (excluding captured) to notify UI
-            self.exploded_squares = removed_squares
 
-    def exploded(self):
-        # Returns list of exploded squares (excluding capture square)
-        return self.exploded_squares
-        
-    def is_valid_move(self, move):
-        """Check if a move is valid considering explosion rules and check"""
-        # First check if it's a legal move according to standard chess rules
-        if move not in self.legal_moves:
-            return False
-            
-        # Now check if it would cause our own king to explode
-        # Make a copy of the board to simulate the move
-        test_board = self.copy()
-        
-        # Get the king square for the current player
-        king_square = test_board.king(self.turn)
-        if king_square is None:  # No king (shouldn't happen in standard chess)
-            return True
-            
-        # If it's a capture, check if the explosion would affect our king
-        if self.is_capture(move):
-            capture_square = move.to_square
-            f = chess.square_file(capture_square)
-            r = chess.square_rank(capture_square)
-            
-            # Check if king is adjacent to the capture square
-            kf = chess.square_file(king_square)
-            kr = chess.square_rank(king_square)
-            
-            # If king is within explosion radius (1 square), the move is invalid
-            if abs(kf - f) <= 1 and abs(kr - r) <= 1:
-                return False
-        
-        # Check if the move would leave the king in check
-        try:
-            test_board.push(move)
-            # If the move puts or leaves our king in check, it's invalid
-            if test_board.is_check():
-                return False
-        except:
-            # If there's an error simulating the move, consider it invalid
-            return False
-                
-        return True
-        
-    def is_game_over(self):
-        """Override is_game_over to check for king explosion"""
-        # If a king was exploded, the game is over
-        if self.king_exploded:
-            return True
-            
-        # Check if either king is missing
-        white_king_exists = False
-        black_king_exists = False
-        
-        for square in chess.SQUARES:
-            piece = self.piece_at(square)
-            if piece and piece.piece_type == chess.KING:
-                if piece.color == chess.WHITE:
-                    white_king_exists = True
-                else:
-                    black_king_exists = True
-        
-        # If either king is missing, the game is over
-        if not white_king_exists or not black_king_exists:
-            # Set the winner if not already set
-            if not self.winner:
-                if not white_king_exists:
-                    self.winner = chess.BLACK
-                else:
-                    self.winner = chess.WHITE
-            return True
-            
-        # Otherwise, use the standard chess rules
-        return super().is_game_over()
-        
-    def result(self):
-        """Override result to handle king explosion"""
-        if self.king_exploded or self.winner is not None:
-            if self.winner == chess.WHITE:
-                return "1-0"
-            elif self.winner == chess.BLACK:
-                return "0-1"
-        
-        # Use standard chess result if no king was exploded
-        return super().result()
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+    request_metrics.started()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_metrics.observe(endpoint, response.status_code, time.perf_counter() - start)
+    return response
 
 
-# Global game board instance
-board = ExplosiveBoard()
+@app.teardown_request
+def _finish_request(exc):
+    request_metrics.finished()
+
+# Durable move log; an empty GAME_DB_PATH keeps games in memory only
+GAME_DB_PATH = os.environ.get('GAME_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'games.sqlite3'))
+game_log = GameLog(GAME_DB_PATH) if GAME_DB_PATH else None
+
+# The current game, shared by all workers with GAME_STORE=sqlite or shm. Unless the
+# store kept it, it is resumed from the log; the first worker to start stores it.
+game_store = open_game_store()
+# Held from a game store write until its game log write is queued. The log writes
+# in queue order, so it gets them in the store's order: a move saved just after a
+# takeback is logged after the takeback's truncate, which cannot delete it. Workers
+# of a prefork server queue separately; a takeback there races like any two moves.
+store_log_lock = threading.Lock()
+
+if game_store.load()[0] is None:
+    recovered = game_log.load_latest_game() if game_log else None
+    if game_store.initialize(recovered or ExplosiveBoard()) and recovered is None and game_log:
+        game_log.new_game(game_store.load()[0])
+
+
+def version_conflict(e):
+    """Response to a move or search whose position another request changed meanwhile."""
+    return jsonify({'error': 'Game changed', 'details': str(e), 'version': e.current}), 409
 
 # AI Implementation: Minimax with explosion-aware evaluation
 MAX_DEPTH = 2  # Limited depth for demonstration
 
-def explosion_aware_evaluation(board: ExplosiveBoard):
-    """
-    Evaluate board considering explosive mechanic:
-    - Material value weighted normally.
-    - Additional penalty if king is near danger (close to explosion squares).
-    - Penalize board instability (difference in count of pieces that may explode).
-    """
-    if board.is_checkmate():
-        # If current side to move is checkmated big negative
-        if board.turn:
-            return -9999
-        else:
-            return 9999
-    if board.is_stalemate() or board.is_insufficient_material():
-        return 0
-        
-    # Check for king explosion or missing kings
-    white_king_exists = False
-    black_king_exists = False
-    
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece and piece.piece_type == chess.KING:
-            if piece.color == chess.WHITE:
-                white_king_exists = True
-            else:
-                black_king_exists = True
-    
-    # If a king is missing, return appropriate score
-    if not white_king_exists:
-        return -9999  # White loses
-    if not black_king_exists:
-        return 9999   # Black loses
-
-    # Base material values
-    material_values = {
-        chess.PAWN: 100,
-        chess.KNIGHT: 320,
-        chess.BISHOP: 330,
-        chess.ROOK: 500,
-        chess.QUEEN: 900,
-        chess.KING: 20000
-    }
+# Search features, overridable per /aimove request ('pvs', 'aspiration') for comparisons.
+# The defaults of every search, see engine/search_context.py
+SEARCH_PVS = DEFAULT_PVS
+SEARCH_ASPIRATION = DEFAULT_ASPIRATION
+# Selective pruning ('null_move', 'lmr'); measure with tools/match.py before enabling
+SEARCH_NULL_MOVE = False
+SEARCH_LMR = False
 
-    # Count material for each side
-    white_score = 0
-    black_score = 0
+# Lazy SMP: worker processes per /aimove search and its time budget in seconds, per
+# deployment via the environment or per request ('workers', 'time_limit'). With a
+# time limit the search deepens iteratively up to MAX_TIMED_DEPTH until time runs out.
+SEARCH_WORKERS = int(os.environ.get('AI_SEARCH_WORKERS', '1'))
+SEARCH_TIME_LIMIT = float(os.environ.get('AI_SEARCH_TIME_LIMIT', '0')) or None
+MAX_SEARCH_WORKERS = os.cpu_count() or 1
+MAX_TIMED_DEPTH = 6
 
-    for sq in chess.SQUARES:
-        piece = board.piece_at(sq)
-        if piece is not None:
-            value = material_values.get(piece.piece_type, 0)
-            if piece.color == chess.WHITE:
-                white_score += value
-            else:
-                black_score += value
+# Search on the player's time; /aimove answers a pondered position at once
+ponderer = Ponderer(depth=MAX_TIMED_DEPTH) if os.environ.get('AI_PONDER', '1') != '0' else None
 
-    # Explosion consideration: penalize if kings near explosion zones
-    # We approximate explosion zones by presence of opponent pieces near king squares
-    white_king_sq = board.king(chess.WHITE)
-    black_king_sq = board.king(chess.BLACK)
+# Search results shared across games and processes (engine/search_cache.py)
+search_cache = get_search_cache()
 
-    # Distance penalty from opponent pieces (pieces close to king are dangerous due to explosion)
-    def danger_penalty(king_sq, color):
-        if king_sq is None:
-            return 0
-            
-        penalty = 0
-        kr = chess.square_rank(king_sq)
-        kf = chess.square_file(king_sq)
-        for sq in chess.SQUARES:
-            piece = board.piece_at(sq)
-            if piece is not None and piece.color != color:
-                sr = chess.square_rank(sq)
-                sf = chess.square_file(sq)
-                dist = max(abs(sr - kr), abs(sf - kf))  # Chebyshev distance
-                if dist <= 1:
-                    penalty += 150  # Higher penalty for proximity
-                elif dist == 2:
-                    penalty += 60
-        return penalty
-
-    if white_king_sq:
-        white_score -= danger_penalty(white_king_sq, chess.WHITE)
-    if black_king_sq:
-        black_score -= danger_penalty(black_king_sq, chess.BLACK)
-
-    # Return evaluation from perspective of side to move
-    eval_val = white_score - black_score
-    return eval_val if board.turn else -eval_val
-
-
-def minimax(board: ExplosiveBoard, depth, alpha, beta, maximizing):
-    """Improved minimax with better error handling for explosions"""
-    try:
-        if depth == 0 or board.is_game_over():
-            return explosion_aware_evaluation(board), None
+# Bounded queue in front of the searches of this process (admission.py)
+admission = AdmissionController()
 
-        best_move = None
 
-        # Get legal moves and filter out moves that would cause own king to explode
-        legal_moves = [move for move in board.legal_moves if board.is_valid_move(move)]
-        
-        # If no legal moves, return appropriate score
-        if not legal_moves:
-            return -9999 if maximizing else 9999, None
-
-        if maximizing:
-            max_eval = -float('inf')
-            for move in legal_moves:
-                try:
-                    b_copy = copy.deepcopy(board)
-                    b_copy.push(move)
-                    eval_score, _ = minimax(b_copy, depth-1, alpha, beta, False)
-                    if eval_score > max_eval:
-                        max_eval = eval_score
-                        best_move = move
-                    alpha = max(alpha, eval_score)
-                    if beta <= alpha:
-                        break
-                except Exception as e:
-                    # Skip moves that cause errors
-                    continue
-            
-            # If all moves caused errors, return a default
-            if best_move is None and legal_moves:
-                best_move = legal_moves[0]
-                max_eval = 0
-                
-            return max_eval, best_move
-        else:
-            min_eval = float('inf')
-            for move in legal_moves:
-                try:
-                    b_copy = copy.deepcopy(board)
-                    b_copy.push(move)
-                    eval_score, _ = minimax(b_copy, depth-1, alpha, beta, True)
-                    if eval_score < min_eval:
-                        min_eval = eval_score
-                        best_move = move
-                    beta = min(beta, eval_score)
-                    if beta <= alpha:
-                        break
-                except Exception as e:
-                    # Skip moves that cause errors
-                    continue
-            
-            # If all moves caused errors, return a default
-            if best_move is None and legal_moves:
-                best_move = legal_moves[0]
-                min_eval = 0
-                
-            return min_eval, best_move
-    except Exception as e:
-        # Fallback for any unexpected errors
-        legal_moves = list(board.legal_moves)
-        if legal_moves:
-            return 0, legal_moves[0]
-        return 0, None
+# Seconds between two checks for running requests while shutting down
+DRAIN_POLL = 0.05
+
+
+def _shutdown(signum, frame, previous=signal.getsignal(signal.SIGTERM)):
+    """
+    SIGTERM: cut running searches short, so their requests finish with the best
+    move found so far, then stop as before. Without a handler of the server's to
+    call, the process exits once no request is running: a request still being
+    served has the signal delivered again when it is done.
+    """
+    SHUTDOWN.set()
+    if ponderer:
+        # Not stop(): the thread this handler interrupted may hold the ponderer's lock
+        ponderer.interrupt()
+    if callable(previous):
+        previous(signum, frame)
+    elif request_metrics.in_flight:
+        threading.Thread(target=_signal_when_idle, args=(signum,), name='shutdown-drain', daemon=True).start()
+    else:
+        raise SystemExit(128 + signum)
+
+
+def _signal_when_idle(signum):
+    while request_metrics.in_flight:
+        time.sleep(DRAIN_POLL)
+    signal.raise_signal(signum)
+
+
+try:
+    signal.signal(signal.SIGTERM, _shutdown)
+except ValueError:
+    # Imported outside the main thread; the server handles its signals itself
+    pass
 
 
 @app.route('/newgame', methods=['POST'])
 def new_game():
     try:
-        global board
         # Initialize new board with validation
         board = ExplosiveBoard()
         if not board:
@@ -364,17 +183,25 @@ def new_game():
             board.fen()
         except Exception as e:
             raise ValueError(f"Invalid initial board state: {str(e)}")
-            
+
+        with store_log_lock:
+            version = game_store.reset(board)
+            if game_log:
+                game_log.new_game(board)
+        if ponderer:
+            ponderer.stop()
+        status = board.status()
         return jsonify({
-            'fen': board.fen(),
+            'version': version,
+            'fen': status['fen'],
             'message': 'New game started',
             'exploded': [],
             'turn': 'white',
-            'is_check': board.is_check(),
-            'is_checkmate': board.is_checkmate(),
-            'is_stalemate': board.is_stalemate(),
-            'is_game_over': board.is_game_over(),
-            'result': board.result() if board.is_game_over() else None
+            'is_check': status['is_check'],
+            'is_checkmate': status['is_checkmate'],
+            'is_stalemate': status['is_stalemate'],
+            'is_game_over': status['is_game_over'],
+            'result': status['result']
         })
     except ValueError as ve:
         return jsonify({
@@ -390,43 +217,21 @@ def new_game():
 
 @app.route('/gamestate', methods=['GET'])
 def game_state():
-    # Check for missing kings
-    white_king_exists = False
-    black_king_exists = False
-    
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece and piece.piece_type == chess.KING:
-            if piece.color == chess.WHITE:
-                white_king_exists = True
-            else:
-                black_king_exists = True
-    
-    # If a king is missing, the game is over
-    game_over = board.is_game_over() or not white_king_exists or not black_king_exists
-    
-    # Determine the winner if a king is missing
-    result = None
-    if game_over:
-        if not white_king_exists:
-            result = "0-1"  # Black wins
-        elif not black_king_exists:
-            result = "1-0"  # White wins
-        else:
-            result = board.result()
-    
-    return jsonify({
-        'fen': board.fen(),
-        'turn': 'white' if board.turn else 'black',
-        'is_check': board.is_check(),
-        'is_checkmate': board.is_checkmate(),
-        'is_stalemate': board.is_stalemate(),
-        'is_game_over': game_over,
-        'exploded': [chess.square_name(sq) for sq in board.exploded()],
-        'white_king_exists': white_king_exists,
-        'black_king_exists': black_king_exists,
-        'result': result
-    })
+    """
+    Current game status. Polled by the frontend, so it carries an ETag of the game
+    and position version: unchanged positions are answered with 304 Not Modified,
+    and the payload is computed once per version (see ExplosiveBoard.status).
+    """
+    board, version = game_store.load()
+    etag = board.etag(version)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(dict(board.status(), version=version))
+    response.set_etag(etag)
+    # Let browsers keep the response but revalidate it on every poll
+    response.cache_control.no_cache = True
+    return response
 
 @app.route('/makemove', methods=['POST'])
 def make_move():
@@ -439,6 +244,11 @@ def make_move():
         if not move_uci:
             return jsonify({'error': 'Move not specified'}), 400
 
+        # A client may send the version it last saw, to be sure it moves on that position
+        board, version = game_store.load()
+        if data.get('version') is not None and data['version'] != version:
+            return version_conflict(VersionConflict(data['version'], version))
+
         try:
             # Handle promotion moves (e.g., "e7e8q")
             if len(move_uci) == 5:
@@ -490,93 +300,218 @@ def make_move():
                 
             return jsonify({'error': 'Illegal move', 'details': 'This move is not allowed in the current position'}), 400
 
-        # Check if game is already over
-        if board.is_game_over():
-            return jsonify({'error': 'Game is already over', 'result': board.result()}), 400
+        # Check if game is already over (usually cached from the previous response)
+        status = board.status()
+        if status['is_game_over']:
+            return jsonify({'error': 'Game is already over', 'result': status['result']}), 400
 
-        # Make the move
+        # The loaded board is this request's own copy
         board.push(move)
-        
-        # Check for missing kings after the move
-        white_king_exists = False
-        black_king_exists = False
-        
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece and piece.piece_type == chess.KING:
-                if piece.color == chess.WHITE:
-                    white_king_exists = True
-                else:
-                    black_king_exists = True
-        
-        # If a king is missing, the game is over
-        game_over = board.is_game_over() or not white_king_exists or not black_king_exists
-        
-        # Determine the winner if a king is missing
-        result = None
-        if game_over:
-            if not white_king_exists:
-                result = "0-1"  # Black wins
-            elif not black_king_exists:
-                result = "1-0"  # White wins
-            else:
-                result = board.result()
-        
+        with store_log_lock:
+            version = game_store.save(board, version)
+            if game_log:
+                game_log.record_move(board, move)
+        if ponderer:
+            ponderer.stop()
+
+        # One status snapshot, after the explosion, for the whole response
+        return jsonify(dict(board.status(), version=version))
+
+    except VersionConflict as e:
+        return version_conflict(e)
+    except Exception as e:
+        return jsonify({'error': 'Server error', 'details': str(e)}), 500
+
+@app.route('/history', methods=['GET'])
+def history():
+    """
+    The moves of the current game, or with ?ply=N the position after ply N (a
+    board.ply() value), rebuilt from the nearest logged snapshot before it.
+    """
+    if not game_log:
+        return jsonify({'error': 'Game history is not kept', 'details': 'GAME_DB_PATH is empty'}), 404
+    board, version = game_store.load()
+    game_log.flush()
+    if request.args.get('ply') is None:
+        moves = game_log.moves(board.game_id)
         return jsonify({
-            'fen': board.fen(),
-            'exploded': [chess.square_name(sq) for sq in board.exploded()],
-            'is_check': board.is_check(),
-            'is_checkmate': board.is_checkmate(),
-            'is_stalemate': board.is_stalemate(),
-            'is_game_over': game_over,
-            'turn': 'white' if board.turn else 'black',
-            'white_king_exists': white_king_exists,
-            'black_king_exists': black_king_exists,
-            'result': result
+            'game_id': board.game_id,
+            'version': version,
+            'ply': board.ply(),
+            'moves': [{'ply': ply, 'move': move.uci()} for ply, move in moves],
         })
-        
+
+    ply = request.args.get('ply', type=int)
+    position = game_log.load_game(board.game_id, ply) if ply is not None and ply <= board.ply() else None
+    if position is None:
+        return jsonify({'error': 'Invalid ply', 'details': f"The game has no ply {request.args['ply']}"}), 400
+    return jsonify(dict(position.status(), ply=ply))
+
+
+@app.route('/takeback', methods=['POST'])
+def takeback():
+    """Take back the last `plies` plies (default 1) of the current game, explosions included."""
+    try:
+        if not game_log:
+            return jsonify({'error': 'Game history is not kept', 'details': 'GAME_DB_PATH is empty'}), 404
+        data = request.json or {}
+        plies = data.get('plies', 1)
+        if not isinstance(plies, int) or plies < 1:
+            return jsonify({'error': 'Invalid plies', 'details': 'plies must be a positive integer'}), 400
+
+        board, version = game_store.load()
+        if data.get('version') is not None and data['version'] != version:
+            return version_conflict(VersionConflict(data['version'], version))
+        game_log.flush()
+        ply = board.ply() - plies
+        position = game_log.load_game(board.game_id, ply) if ply >= 0 else None
+        if position is None:
+            return jsonify({'error': 'Cannot take back', 'details': f'The game has no {plies} plies to take back'}), 400
+
+        position.adopt_identity(board)
+        with store_log_lock:
+            version = game_store.save(position, version)
+            game_log.truncate(board.game_id, ply)
+        if ponderer:
+            ponderer.stop()
+        return jsonify(dict(position.status(), version=version))
+
+    except VersionConflict as e:
+        return version_conflict(e)
     except Exception as e:
         return jsonify({'error': 'Server error', 'details': str(e)}), 500
 
+def run_search(board, depth, workers, time_limit, options, prior, cancel):
+    """
+    (score, move, depth reached) of an /aimove search, continuing from `prior` if
+    given; once `cancel` is set the search returns its best move so far.
+    """
+    if workers > 1:
+        return parallel_search(board, depth, workers, SEARCH_STATS, time_limit, options, cancel=cancel)
+    deadline = time.monotonic() + time_limit if time_limit else None
+    ctx = SearchContext(SEARCH_STATS, deadline=deadline, stop_event=cancel, **options)
+    if prior:
+        # Carry on from the depth already searched
+        score, move = search_best_move(board, depth, ctx, prior[2] + 1, prior[:2])
+    else:
+        score, move = search_best_move(board, depth, ctx)
+    return score, move, ctx.completed_depth
+
+
+def overloaded(e):
+    """503 for a search request the admission controller turned away."""
+    response = jsonify({'error': 'AI is busy', 'details': e.reason, 'retry_after': e.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
+# Accepted spellings of the /aimove feature flags
+FLAG_VALUES = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
+
+def _flag(data, name, default):
+    value = data.get(name)
+    if value is None:
+        value = default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.lower() in FLAG_VALUES:
+        return FLAG_VALUES[value.lower()]
+    raise ValueError(f"'{name}' must be true or false, not {value!r}")
+
+
+def _number(data, name, default, kind, minimum):
+    value = data.get(name)
+    if value is None:
+        value = default
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        number = kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be a number, not {value!r}")
+    if not math.isfinite(number) or number < minimum:
+        raise ValueError(f"'{name}' must be at least {minimum}, not {value!r}")
+    return number
+
+
+def search_request(data):
+    """(depth, workers, time limit, feature flags) of an /aimove body; ValueError on bad input."""
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    time_limit = _number(data, 'time_limit', SEARCH_TIME_LIMIT, float, 0)
+    workers = min(_number(data, 'workers', SEARCH_WORKERS, int, 1), MAX_SEARCH_WORKERS)
+    if time_limit:
+        # The deadline bounds the search, so it may go deeper
+        depth = min(_number(data, 'depth', MAX_TIMED_DEPTH, int, 1), MAX_TIMED_DEPTH)
+    else:
+        depth = min(_number(data, 'depth', 2, int, 1), 2)  # Limit depth to 2 to avoid long calculations
+    options = dict(pvs=_flag(data, 'pvs', SEARCH_PVS),
+                   aspiration=_flag(data, 'aspiration', SEARCH_ASPIRATION),
+                   null_move=_flag(data, 'null_move', SEARCH_NULL_MOVE),
+                   lmr=_flag(data, 'lmr', SEARCH_LMR))
+    return depth, workers, time_limit or None, options
+
+
 @app.route('/aimove', methods=['POST'])
 def ai_move():
-    global board
-    data = request.json or {}
-    depth = min(data.get('depth', 2), 2)  # Limit depth to 2 to avoid long calculations
-    
+    try:
+        depth, workers, time_limit, options = search_request(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': 'Invalid search request', 'details': str(e)}), 400
+
     # Check if game is already over
-    if board.is_game_over():
-        # Check for missing kings
-        white_king_exists = False
-        black_king_exists = False
-        
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece and piece.piece_type == chess.KING:
-                if piece.color == chess.WHITE:
-                    white_king_exists = True
-                else:
-                    black_king_exists = True
-        
-        # Determine the winner if a king is missing
-        result = None
-        if not white_king_exists:
-            result = "0-1"  # Black wins
-        elif not black_king_exists:
-            result = "1-0"  # White wins
-        else:
-            result = board.result()
-            
+    board, version = game_store.load()
+    status = board.status()
+    if status['is_game_over']:
         return jsonify({
             'error': 'Game is already over',
-            'result': result,
-            'white_king_exists': white_king_exists,
-            'black_king_exists': black_king_exists
+            'result': status['result'],
+            'white_king_exists': status['white_king_exists'],
+            'black_king_exists': status['black_king_exists']
         }), 400
 
     try:
-        maximizing = board.turn  # White maximizes
-        eval_score, best_move = minimax(board, depth, -float('inf'), float('inf'), maximizing)
+        nodes_before = SEARCH_STATS.nodes
+        search_start = time.perf_counter()
+        # Earlier results for this position: pondered, or from the cross-game cache
+        prior = ponderer.result_for(board) if ponderer else None
+        cached = search_cache.lookup(board) if search_cache else None
+        if cached and (prior is None or cached[2] > prior[2]):
+            prior = cached
+        if prior and prior[2] >= depth:
+            # Searched at least as deep as asked: no search needed
+            eval_score, best_move, depth_reached = prior
+        else:
+            # The whole request, queueing included, has the time limit or MOVE_DEADLINE
+            try:
+                slot = admission.admit(time.monotonic() + (time_limit or MOVE_DEADLINE), workers)
+            except Overloaded as e:
+                if not prior:
+                    return overloaded(e)
+                # Shallower than asked, but immediate
+                slot = None
+                eval_score, best_move, depth_reached = prior
+            if slot:
+                with slot:
+                    depth, time_limit = slot.budget(depth, time_limit)
+                    if prior and prior[2] >= depth:
+                        eval_score, best_move, depth_reached = prior
+                    else:
+                        # Stop at shutdown, or once a move or new game (in any
+                        # worker) has made this search pointless
+                        cancel = CancelToken(SHUTDOWN, lambda: game_store.current_version() != version)
+                        eval_score, best_move, depth_reached = run_search(
+                            board, depth, workers, time_limit, options, prior, cancel)
+                        SEARCH_STATS.record_search(depth_reached, SEARCH_STATS.nodes - nodes_before,
+                                                   time.perf_counter() - search_start)
+                        if search_cache and (prior is None or depth_reached > prior[2]):
+                            search_cache.store(board, depth_reached, eval_score, best_move)
 
         if best_move is None:
             # Fallback to a random legal move if minimax fails
@@ -601,53 +536,29 @@ def ai_move():
             }
             promotion_piece = promotion_map.get(best_move.promotion, 'q')
 
-        # Make the move
+        # Make the move; a player move or new game during the search wins
         board.push(best_move)
-        
-        # Check for missing kings after the move
-        white_king_exists = False
-        black_king_exists = False
-        
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece and piece.piece_type == chess.KING:
-                if piece.color == chess.WHITE:
-                    white_king_exists = True
-                else:
-                    black_king_exists = True
-        
-        # If a king is missing, the game is over
-        game_over = board.is_game_over() or not white_king_exists or not black_king_exists
-        
-        # Determine the winner if a king is missing
-        result = None
-        if game_over:
-            if not white_king_exists:
-                result = "0-1"  # Black wins
-            elif not black_king_exists:
-                result = "1-0"  # White wins
-            else:
-                result = board.result()
+        with store_log_lock:
+            version = game_store.save(board, version)
+            if game_log:
+                game_log.record_move(board, best_move)
+
+        # One status snapshot, after the explosion, for the whole response
+        status = board.status()
+        # Pondering is optional work: leave the cores to queued searches
+        if ponderer and not status['is_game_over'] and not admission.busy():
+            ponderer.start(board, dict(pvs=SEARCH_PVS, aspiration=SEARCH_ASPIRATION,
+                                       null_move=SEARCH_NULL_MOVE, lmr=SEARCH_LMR))
 
         # Format the move string with promotion if needed
         move_str = best_move.uci()
         if is_promotion:
             move_str = f"{chess.square_name(best_move.from_square)}{chess.square_name(best_move.to_square)}{promotion_piece}"
 
-        return jsonify({
-            'fen': board.fen(),
-            'move': move_str,
-            'exploded': [chess.square_name(sq) for sq in board.exploded()],
-            'is_check': board.is_check(),
-            'is_checkmate': board.is_checkmate(),
-            'is_stalemate': board.is_stalemate(),
-            'is_game_over': game_over,
-            'turn': 'white' if board.turn else 'black',
-            'evaluation': eval_score,
-            'white_king_exists': white_king_exists,
-            'black_king_exists': black_king_exists,
-            'result': result
-        })
+        return jsonify(dict(status, move=move_str, evaluation=eval_score, depth=depth_reached,
+                            version=version))
+    except VersionConflict as e:
+        return version_conflict(e)
     except Exception as e:
         # If AI move fails, return a helpful error
         return jsonify({
@@ -655,50 +566,167 @@ def ai_move():
             'details': str(e)
         }), 500
 
-# New endpoints from updates
-from engine.chess_engine import ChessEngine
+# New endpoints from updates; ChessEngine does not need torch, which is only
+# imported with the NN evaluator (engine/nn_eval.py)
+from engine.chess_engine import DIFFICULTY_BUDGETS, ChessEngine
+
+# Designated AI workers load torch at startup rather than on the first NN request
+if os.environ.get('AI_PRELOAD_NN') == '1':
+    importlib.import_module('engine.nn_eval')
 
 # Initialize chess engine
 chess_engine = ChessEngine()
 
+def api_position(data):
+    """
+    Board of an /api request: the current game when its 'game_id' is given,
+    otherwise the 'board' grid or a compact 'fen' or 'packed' board (engine.board_codec).
+    Returns (board, None) or (None, error response).
+    """
+    if data.get('game_id'):
+        board = game_store.load()[0]
+        if data['game_id'] != board.game_id:
+            return None, (jsonify({'error': 'Unknown game', 'game_id': data['game_id']}), 404)
+        return board_from_fen(board.board_fen()), None
+    try:
+        return parse_board(data), None
+    except (AttributeError, TypeError, ValueError) as e:
+        return None, (jsonify({'error': 'Invalid board', 'details': str(e)}), 400)
+
 @app.route('/api/validate-move', methods=['POST'])
 def validate_move():
-    data = request.json
+    data = request.json or {}
     from_pos = data.get('from')
     to_pos = data.get('to')
-    board = data.get('board')
+    position, error = api_position(data)
+    if error:
+        return error
     
     # Validate the move using the chess engine
-    result = chess_engine.validate_move(from_pos, to_pos, board)
+    result = chess_engine.validate_move(from_pos, to_pos, position)
     
     return jsonify(result)
 
 @app.route('/api/get-ai-move', methods=['POST'])
 def get_ai_move():
-    data = request.json
-    board = data.get('board')
+    data = request.json or {}
     difficulty = data.get('difficulty', 'medium')
-    
-    # Get AI move using the chess engine
-    move = chess_engine.get_ai_move(board, difficulty)
+    if difficulty not in DIFFICULTY_BUDGETS:
+        return jsonify({'error': 'Invalid difficulty', 'details': f'Unknown difficulty {difficulty!r}',
+                        'difficulties': list(DIFFICULTY_BUDGETS)}), 400
+    color = data.get('color', 'black')
+    if color not in ('white', 'black'):
+        return jsonify({'error': 'Invalid color', 'details': f"color must be 'white' or 'black', not {color!r}"}), 400
+    position, error = api_position(data)
+    if error:
+        return error
+
+    # Searches share the admission queue with /aimove; under load they play easy
+    try:
+        slot = admission.admit(time.monotonic() + MOVE_DEADLINE)
+    except Overloaded as e:
+        return overloaded(e)
+    with slot:
+        if slot.shallow() and difficulty != 'easy':
+            admission.degraded += 1
+            difficulty = 'easy'
+        # Get AI move using the chess engine
+        move = chess_engine.get_ai_move(position, difficulty, color, SHUTDOWN)
+    if 'error' in move:
+        # Game over, or no valid move for the side to move
+        return jsonify(move), 400
     
     return jsonify(move)
 
 @app.route('/api/check-game-state', methods=['POST'])
 def check_game_state():
-    data = request.json
-    board = data.get('board')
+    data = request.json or {}
     current_player = data.get('currentPlayer')
+    position, error = api_position(data)
+    if error:
+        return error
     
     # Check game state using the chess engine
-    state = chess_engine.check_game_state(board, current_player)
+    state = chess_engine.check_game_state(position, current_player)
     
     return jsonify(state)
 
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch_endpoint():
+    """
+    Analyze up to MAX_BATCH_POSITIONS positions in one request.
+
+    Body: {"fens": [...], "depth": n, "time_limit": seconds, "node_limit": nodes,
+    "nn": bool}. The time and node limits are budgets for the whole batch; with
+    either one the searches may deepen up to MAX_TIMED_DEPTH.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid budget', 'details': 'Expected a JSON object'}), 400
+    fens = data.get('fens')
+    if not isinstance(fens, list) or not fens or not all(isinstance(fen, str) for fen in fens):
+        return jsonify({'error': 'fens must be a non-empty list of FEN strings'}), 400
+    if len(fens) > MAX_BATCH_POSITIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_POSITIONS} positions per batch'}), 400
+
+    try:
+        # 0 means no limit, as leaving the field out does
+        time_limit = _number(data, 'time_limit', None, float, 0) or None
+        node_limit = _number(data, 'node_limit', None, int, 0) or None
+        max_depth = MAX_TIMED_DEPTH if time_limit or node_limit else MAX_DEPTH
+        depth = min(_number(data, 'depth', max_depth, int, 1), max_depth)
+        nn = _flag(data, 'nn', False)
+    except ValueError as e:
+        return jsonify({'error': 'Invalid budget', 'details': str(e)}), 400
+
+    options = dict(pvs=SEARCH_PVS, aspiration=SEARCH_ASPIRATION,
+                   null_move=SEARCH_NULL_MOVE, lmr=SEARCH_LMR)
+    # The batch shares the admission queue with /aimove, taking one slot per pool worker it can keep busy
+    workers = min(len(fens), BATCH_WORKERS) if len(fens) >= MIN_POOL_BATCH else 1
+    try:
+        slot = admission.admit(time.monotonic() + (time_limit or MOVE_DEADLINE), workers)
+    except Overloaded as e:
+        return overloaded(e)
+    try:
+        with slot:
+            depth, time_limit = slot.budget(depth, time_limit)
+            results = analyze_batch(fens, depth, time_limit, node_limit, nn, options)
+    except Exception as e:
+        return jsonify({'error': 'Batch analysis error', 'details': str(e)}), 500
+    return jsonify({'results': results, 'count': len(results)})
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "ok", "message": "Chess API is running"})
 
+def active_game_count():
+    # A single game is served; it counts as active until it is over
+    return 0 if game_store.load()[0].is_game_over() else 1
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    gauges = {
+        'active_games': (active_game_count(), 'Games currently in progress.'),
+    }
+    gauges['game_store_conflicts'] = (game_store.conflicts, 'Moves rejected because the game changed meanwhile.')
+    gauges['admission_active_searches'] = (admission.active, 'Search slots in use.')
+    gauges['admission_queued_searches'] = (len(admission.waiting), 'Search requests waiting for a slot.')
+    gauges['admission_rejected'] = (admission.rejected, 'Search requests turned away with 503.')
+    gauges['admission_degraded'] = (admission.degraded, 'Searches cut to a shallow depth under load.')
+    if game_log:
+        gauges['game_log_pending_writes'] = (game_log.pending(), 'Game log writes queued, not yet committed.')
+        gauges['game_log_commits'] = (game_log.commits, 'Game log transactions committed since startup.')
+    if ponderer:
+        gauges['ponder_hits'] = (ponderer.hits, 'AI moves answered from a pondered reply.')
+        gauges['ponder_misses'] = (ponderer.misses, 'AI moves whose position was not pondered.')
+    if search_cache:
+        gauges['search_cache_hits'] = (search_cache.hits, 'Search cache lookups that found the position.')
+        gauges['search_cache_misses'] = (search_cache.misses, 'Search cache lookups that did not.')
+        gauges['search_cache_hit_ratio'] = (search_cache.hit_rate(), 'Search cache hits per lookup.')
+        gauges['search_cache_stores'] = (search_cache.stores, 'Search results written to the cache.')
+        gauges['search_cache_evictions'] = (search_cache.evictions, 'Cache entries evicted as least recently used.')
+    return Response(metrics.render(request_metrics, gauges), content_type=metrics.CONTENT_TYPE)
+
 
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
@@ -6,6 +6,7 @@ Explosive Atomic Chess Flask Backend with AI
   - /new-game [POST] - start new game
   - /make-move [POST] - player move (from_row, from_col, to_row, to_col)
   - /valid-moves [POST] - get valid moves for a piece (from_row, from_col)
+  - /valid-moves/all [GET] - valid moves of every piece of the side to move
   - /game-status [GET] - get current game state
 """
 
@@ -27,6 +28,8 @@ class ExplosiveBoard(chess.Board):
         # Track if a king was exploded
         self.king_exploded = False
         self.winner = None
+        # (position, move map) of the last valid_move_map() call
+        self._move_map = (None, None)
 
     def push(self, move):
         """
@@ -55,33 +58,37 @@ class ExplosiveBoard(chess.Board):
         self.king_exploded = False
 
         if capture_square is not None:
-            # Compute explosion squares: the 8 squares surrounding the capture_square + the capture_square itself
-            explosion_squares = [capture_square]
-            f = chess.square_file(capture_square)
-            r = chess.square_rank(capture_square)
-            for df in [-1,0,1]:
-                for dr in [-1,0,1]:
-                    if df == 0 and dr == 0:
-                        continue
-                    ff = f + df
-                    rr = r + dr
-                    if 0 <= ff <= 7 and 0 <= rr <= 7:
-                        sq = chess.square(ff, rr)
-                        explosion_squares.append(sq)
+            self.explode(capture_square)
 
-            # The explosion eliminates all pieces on these squares except pawns.
-            for sq in explosion_squares:
-                piece = self.piece_at(sq)
-                if piece is not None:
-                    # Check if a king is being exploded
-                    if piece.piece_type == chess.KING:
-                        self.king_exploded = True
-                        # The winner is the opposite of the king's color
-                        self.winner = not piece.color
-                    
-                    if piece.piece_type != chess.PAWN:
-                        self.remove_piece_at(sq)
-                        self.exploded.append(sq)
+    def explode(self, capture_square):
+        """Remove every non-pawn on and around capture_square, recording what went off."""
+        # Compute explosion squares: the 8 squares surrounding the capture_square + the capture_square itself
+        explosion_squares = [capture_square]
+        f = chess.square_file(capture_square)
+        r = chess.square_rank(capture_square)
+        for df in [-1,0,1]:
+            for dr in [-1,0,1]:
+                if df == 0 and dr == 0:
+                    continue
+                ff = f + df
+                rr = r + dr
+                if 0 <= ff <= 7 and 0 <= rr <= 7:
+                    sq = chess.square(ff, rr)
+                    explosion_squares.append(sq)
+
+        # The explosion eliminates all pieces on these squares except pawns.
+        for sq in explosion_squares:
+            piece = self.piece_at(sq)
+            if piece is not None:
+                # Check if a king is being exploded
+                if piece.piece_type == chess.KING:
+                    self.king_exploded = True
+                    # The winner is the opposite of the king's color
+                    self.winner = not piece.color
+                
+                if piece.piece_type != chess.PAWN:
+                    self.remove_piece_at(sq)
+                    self.exploded.append(sq)
 
     def is_valid_move(self, move):
         """Check if a move is valid considering explosion rules and check"""
@@ -123,6 +130,56 @@ class ExplosiveBoard(chess.Board):
             return False
                 
         return True
+
+    def valid_move_map(self):
+        """
+        Valid moves of every piece of the side to move, as {"row,col": [{'row', 'col'}, ...]}.
+
+        Same rules as is_valid_move, from a single legal-move generation: quiet moves
+        are played and taken back on one scratch copy, and only captures get a copy
+        each to apply the explosion. The board itself is never modified, since other
+        requests may read it meanwhile. Cached until the position changes.
+        """
+        key = self.fen()
+        cached_key, move_map = self._move_map
+        if cached_key == key:
+            return move_map
+
+        king_square = self.king(self.turn)
+        # push() applies no explosion once the game is over
+        game_over = self.is_game_over()
+        scratch = self.copy(stack=False)
+        move_map = {}
+        for move in self.legal_moves:
+            if king_square is not None and not self._keeps_king_safe(move, king_square, game_over, scratch):
+                continue
+            targets = move_map.setdefault(f"{chess.square_rank(move.from_square)},{chess.square_file(move.from_square)}", [])
+            target = {'row': chess.square_rank(move.to_square), 'col': chess.square_file(move.to_square)}
+            # Promotions to different pieces share a target square
+            if target not in targets:
+                targets.append(target)
+
+        self._move_map = (key, move_map)
+        return move_map
+
+    def _keeps_king_safe(self, move, king_square, game_over, scratch):
+        """The explosion and check tests of is_valid_move for a legal move; `scratch` is a copy of the board."""
+        capture = self.is_capture(move)
+        # Rejected like in is_valid_move even once the game is over
+        if capture and chess.square_distance(king_square, move.to_square) <= 1:
+            return False
+        if not capture or game_over:
+            # Nothing explodes: play the move on the scratch copy and take it back
+            # (push() would go through the game-over test for every move)
+            chess.Board.push(scratch, move)
+            try:
+                return not scratch.is_check()
+            finally:
+                chess.Board.pop(scratch)
+        test_board = self.copy(stack=False)
+        chess.Board.push(test_board, move)
+        test_board.explode(move.to_square)
+        return not test_board.is_check()
         
     def is_game_over(self):
         """Override is_game_over to check for king explosion"""
@@ -297,19 +354,21 @@ def valid_moves():
         if not piece:
             return jsonify({'valid_moves': []}), 200
             
-        # Get all legal moves for this piece
-        valid_moves = []
-        for move in board.legal_moves:
-            if move.from_square == from_square and board.is_valid_move(move):
-                # Convert chess.py square index to row/col
-                to_col = chess.square_file(move.to_square)
-                to_row = chess.square_rank(move.to_square)
-                valid_moves.append({'row': to_row, 'col': to_col})
+        # Valid moves of this piece, from the cached map of the whole position
+        valid_moves = board.valid_move_map().get(f"{from_row},{from_col}", [])
                 
         return jsonify({'valid_moves': valid_moves}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/valid-moves/all', methods=['GET'])
+def all_valid_moves():
+    try:
+        # Keyed "row,col" by source square, so the client can highlight moves locally
+        return jsonify({'valid_moves': board.valid_move_map()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/game-status', methods=['GET'])
 def game_status():
     try:
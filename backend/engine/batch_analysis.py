@@ -0,0 +1,125 @@
+"""
+Batch position analysis for POST /api/analyze/batch.
+
+- Static evaluation of the whole batch at once with NumPy (engine.batch_eval),
+  and optionally the NN evaluation in one batched forward pass.
+- A best-move search per position, spread over a process pool. The positions
+  share the request's budget: a common deadline for a time limit, an even split
+  for a node limit. Each search returns its deepest completed iteration.
+- Positions found in the search cache (engine.search_cache) deep enough are
+  not searched again; new results are added to it.
+"""
+
+import concurrent.futures
+import os
+import threading
+import time
+
+from engine.batch_eval import piece_planes, static_evaluations
+from engine.explosive_board import ExplosiveBoard
+from engine.lazy_smp import process_context, reset_signals
+from engine.search import search_best_move
+from engine.search_cache import get_search_cache
+from engine.search_context import SearchContext
+from engine.search_stats import SearchStats, get_stats
+
+MAX_BATCH_POSITIONS = 500
+# Below this many positions the pool costs more than it saves
+MIN_POOL_BATCH = 4
+
+BATCH_WORKERS = int(os.environ.get('AI_BATCH_WORKERS', '0')) or os.cpu_count() or 1
+
+# Counters of the batch searches, merged from the pool workers
+BATCH_STATS = get_stats('batch_analysis')
+
+_pool = None
+_pool_lock = threading.Lock()
+_eval_model = None
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = concurrent.futures.ProcessPoolExecutor(BATCH_WORKERS, mp_context=process_context(),
+                                                          initializer=reset_signals)
+        return _pool
+
+
+def _get_eval_model():
+    global _eval_model
+    with _pool_lock:
+        if _eval_model is None:
+            # torch is only needed for NN scores
+            from engine.nn_eval import load_eval_model
+            _eval_model = load_eval_model()
+        return _eval_model
+
+
+def search_position(fen, depth, deadline, node_limit, options):
+    """
+    Pool task: best move of one position. Returns (score, uci, depth reached, stats snapshot).
+    The position is looked up in the search cache first and stored there after the search.
+    """
+    stats = SearchStats('batch')
+    board = ExplosiveBoard(fen)
+    cache = get_search_cache()
+    cached = cache.lookup(board) if cache else None
+    if cached and cached[2] >= depth:
+        score, move, completed_depth = cached
+        return score, move.uci(), completed_depth, stats.snapshot()
+
+    ctx = SearchContext(stats, deadline=deadline, node_limit=node_limit, **options)
+    if cached:
+        score, move = search_best_move(board, depth, ctx, cached[2] + 1, cached[:2])
+    else:
+        score, move = search_best_move(board, depth, ctx)
+    if cache and (cached is None or ctx.completed_depth > cached[2]):
+        cache.store(board, ctx.completed_depth, score, move)
+    return score, move.uci() if move else None, ctx.completed_depth, stats.snapshot()
+
+
+def analyze_batch(fens, depth, time_limit=None, node_limit=None, nn=False, options=None):
+    """
+    Analyze every FEN in `fens`, returning one result dict per FEN, in order.
+
+    Unparseable FENs get an 'error' entry instead of failing the batch.
+    """
+    results = [{'fen': fen} for fen in fens]
+    boards, indices = [], []
+    for i, fen in enumerate(fens):
+        try:
+            boards.append(ExplosiveBoard(fen))
+            indices.append(i)
+        except (TypeError, ValueError) as e:
+            results[i]['error'] = f'Invalid FEN: {e}'
+    if not boards:
+        return results
+
+    planes = piece_planes(boards)
+    for i, score in zip(indices, static_evaluations(boards, planes)):
+        results[i]['evaluation'] = int(score)
+    if nn:
+        from engine.nn_eval import evaluate_batch
+        for i, score in zip(indices, evaluate_batch(_get_eval_model(), planes)):
+            results[i]['nn_evaluation'] = float(score)
+
+    start = time.perf_counter()
+    deadline = time.monotonic() + time_limit if time_limit else None
+    per_position = max(1, node_limit // len(boards)) if node_limit else None
+    tasks = [(board.fen(), depth, deadline, per_position, options or {}) for board in boards]
+    if len(tasks) < MIN_POOL_BATCH or BATCH_WORKERS == 1:
+        outcomes = [search_position(*task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (4 * BATCH_WORKERS))
+        outcomes = _get_pool().map(search_position, *zip(*tasks), chunksize=chunksize)
+
+    nodes = 0
+    depth_reached = 0
+    for i, (score, move, completed_depth, snapshot) in zip(indices, outcomes):
+        results[i].update(best_move=move, score=score, depth=completed_depth)
+        BATCH_STATS.merge(snapshot)
+        nodes += snapshot['nodes']
+        depth_reached = max(depth_reached, completed_depth)
+    BATCH_STATS.record_search(depth_reached, nodes, time.perf_counter() - start)
+    return results
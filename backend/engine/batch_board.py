@@ -0,0 +1,241 @@
+"""
+Many Explosive Chess positions as NumPy arrays, advanced together.
+
+- BoardBatch keeps N positions as uint64 bitboards, one row of 12 per position
+  (white pawn..king, then black pawn..king, square a1 = bit 0, the plane order of
+  engine.batch_eval), with the side to move, castling rights, en passant square,
+  clocks and the explosion state of ExplosiveBoard.
+- push() plays one move per position (or per selected position) with array
+  operations: captures, en passant, castling, promotion, the explosion of
+  ExplosiveBoard.push (every piece but pawns on the captured square and the 8
+  around it) and the king loss that ends the game.
+- Moves are not generated here: they come from python-chess (to_boards), from
+  recorded games or from a policy. Moves are assumed legal, and positions whose
+  game is over are not moved; once a king is lost a position is frozen.
+- from_boards / to_boards convert from and to ExplosiveBoard; the move stack is
+  not kept. tools/batch_bench.py checks both engines agree and compares their
+  throughput.
+"""
+
+import chess
+import numpy as np
+
+from engine.explosive_board import ExplosiveBoard
+
+PIECE_TYPES = (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING)
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+BLACK_PLANES = 6
+
+NO_SQUARE = -1
+NO_WINNER = -1
+
+SQUARE_BB = np.array([1 << sq for sq in range(64)], dtype=np.uint64)
+_ALL = np.uint64(0xFFFFFFFFFFFFFFFF)
+_RANK_1 = np.uint64(chess.BB_RANK_1)
+_RANK_8 = np.uint64(chess.BB_RANK_8)
+
+
+def _explosion_order():
+    """Position of every square in ExplosiveBoard.push's explosion list, per capture square; -1 outside."""
+    order = np.full((64, 64), -1, dtype=np.int8)
+    for capture in chess.SQUARES:
+        order[capture, capture] = 0
+        index = 1
+        f, r = chess.square_file(capture), chess.square_rank(capture)
+        for df in (-1, 0, 1):
+            for dr in (-1, 0, 1):
+                if df == 0 and dr == 0:
+                    continue
+                if 0 <= f + df <= 7 and 0 <= r + dr <= 7:
+                    order[capture, chess.square(f + df, r + dr)] = index
+                index += 1
+    return order
+
+
+EXPLOSION_ORDER = _explosion_order()
+# The captured square and its neighbours, per capture square
+BLAST_BB = np.array([sum(1 << sq for sq in range(64) if EXPLOSION_ORDER[capture, sq] >= 0)
+                     for capture in range(64)], dtype=np.uint64)
+
+
+def _squares(bitboards):
+    """Square of each single-bit bitboard (powers of two are exact in float64)."""
+    return np.log2(bitboards.astype(np.float64)).astype(np.int64)
+
+
+class BoardBatch:
+    def __init__(self, size):
+        self.pieces = np.zeros((size, 12), dtype=np.uint64)
+        self.turn = np.ones(size, dtype=bool)
+        self.castling = np.zeros(size, dtype=np.uint64)
+        self.ep_square = np.full(size, NO_SQUARE, dtype=np.int8)
+        self.halfmove_clock = np.zeros(size, dtype=np.int32)
+        self.fullmove_number = np.ones(size, dtype=np.int32)
+        # Explosion state of the last move, as ExplosiveBoard keeps it
+        self.exploded = np.zeros(size, dtype=np.uint64)
+        self.capture_square = np.full(size, NO_SQUARE, dtype=np.int8)
+        self.king_exploded = np.zeros(size, dtype=bool)
+        self.winner = np.full(size, NO_WINNER, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.turn)
+
+    # Conversion
+
+    @classmethod
+    def from_boards(cls, boards):
+        batch = cls(len(boards))
+        batch.pieces[:] = [[board.pieces_mask(pt, color) for color in (chess.WHITE, chess.BLACK)
+                            for pt in PIECE_TYPES] for board in boards]
+        for i, board in enumerate(boards):
+            batch.turn[i] = board.turn
+            batch.castling[i] = board.castling_rights
+            batch.ep_square[i] = NO_SQUARE if board.ep_square is None else board.ep_square
+            batch.halfmove_clock[i] = board.halfmove_clock
+            batch.fullmove_number[i] = board.fullmove_number
+            exploded = getattr(board, 'exploded_squares', [])
+            batch.exploded[i] = sum(1 << sq for sq in exploded)
+            batch.king_exploded[i] = getattr(board, 'king_exploded', False)
+            winner = getattr(board, 'winner', None)
+            batch.winner[i] = NO_WINNER if winner is None else int(winner)
+        return batch
+
+    @classmethod
+    def from_fens(cls, fens):
+        return cls.from_boards([ExplosiveBoard(fen) for fen in fens])
+
+    def to_boards(self):
+        """One ExplosiveBoard per position, without move history."""
+        rows = zip(self.pieces.tolist(), self.turn.tolist(), self.castling.tolist(), self.ep_square.tolist(),
+                   self.halfmove_clock.tolist(), self.fullmove_number.tolist(), self.exploded.tolist(),
+                   self.capture_square.tolist(), self.king_exploded.tolist(), self.winner.tolist())
+        boards = []
+        for pieces, turn, castling, ep, halfmove, fullmove, exploded, capture, king_exploded, winner in rows:
+            board = ExplosiveBoard(None)
+            white, black = pieces[:6], pieces[6:]
+            board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings = (
+                w | b for w, b in zip(white, black))
+            board.occupied_co[chess.WHITE] = white[0] | white[1] | white[2] | white[3] | white[4] | white[5]
+            board.occupied_co[chess.BLACK] = black[0] | black[1] | black[2] | black[3] | black[4] | black[5]
+            board.occupied = board.occupied_co[chess.WHITE] | board.occupied_co[chess.BLACK]
+            board.promoted = chess.BB_EMPTY
+            board.turn = turn
+            board.castling_rights = castling
+            board.ep_square = None if ep == NO_SQUARE else ep
+            board.halfmove_clock = halfmove
+            board.fullmove_number = fullmove
+            squares = list(chess.scan_forward(exploded))
+            if capture != NO_SQUARE:
+                squares.sort(key=EXPLOSION_ORDER[capture].__getitem__)
+            board.exploded_squares = squares
+            board.king_exploded = king_exploded
+            board.winner = None if winner == NO_WINNER else bool(winner)
+            boards.append(board)
+        return boards
+
+    def fens(self):
+        return [board.fen() for board in self.to_boards()]
+
+    # Moves
+
+    @staticmethod
+    def move_arrays(moves):
+        """(from squares, to squares, promotion piece types) of a list of chess.Move."""
+        return (np.array([move.from_square for move in moves], dtype=np.int64),
+                np.array([move.to_square for move in moves], dtype=np.int64),
+                np.array([move.promotion or 0 for move in moves], dtype=np.int64))
+
+    def push(self, from_squares, to_squares, promotions=None, active=None):
+        """
+        Play from_squares[i] -> to_squares[i] (promoting to the python-chess piece
+        type promotions[i], 0 for none) on every position i where `active` is
+        true (default: every position whose king is not lost).
+        """
+        playable = ~self.king_lost()
+        rows = np.flatnonzero(playable if active is None else np.asarray(active, dtype=bool) & playable)
+        if not len(rows):
+            return
+        count = len(rows)
+        index = np.arange(count)
+        f = np.asarray(from_squares, dtype=np.int64)[rows]
+        t = np.asarray(to_squares, dtype=np.int64)[rows]
+        promotion = (np.zeros(count, dtype=np.int64) if promotions is None
+                     else np.asarray(promotions, dtype=np.int64)[rows])
+        from_bb, to_bb = SQUARE_BB[f], SQUARE_BB[t]
+
+        pieces = self.pieces[rows]
+        white = self.turn[rows]
+        us = np.where(white, 0, BLACK_PLANES)
+        sides = np.bitwise_or.reduce(pieces.reshape(count, 2, 6), axis=2)
+        occupied = sides[:, 0] | sides[:, 1]
+        theirs = np.where(white, sides[:, 1], sides[:, 0])
+
+        # The moving piece's type and what the move takes
+        piece = ((pieces & from_bb[:, None]) != 0).argmax(axis=1) % 6
+        pawn = piece == PAWN
+        king = piece == KING
+        ep = self.ep_square[rows].astype(np.int64)
+        en_passant = pawn & (t == ep) & (f % 8 != t % 8) & ((occupied & to_bb) == 0)
+        capture = ((theirs & to_bb) != 0) | en_passant
+
+        # Move the piece, taking whatever stands on the target square
+        pieces &= ~(from_bb | to_bb)[:, None]
+        placed = np.where(promotion > 0, promotion - 1, piece)
+        pieces[index, us + placed] |= to_bb
+        victim = SQUARE_BB[np.where(white, t - 8, t + 8) % 64]
+        pieces[en_passant] &= ~victim[en_passant][:, None]
+        # Castling (king two files over): the rook jumps to the other side of the king
+        castle = np.flatnonzero(king & (np.abs(f % 8 - t % 8) == 2))
+        if len(castle):
+            kingside = t[castle] > f[castle]
+            rook_from = SQUARE_BB[np.where(kingside, f[castle] + 3, f[castle] - 4)]
+            rook_to = SQUARE_BB[np.where(kingside, f[castle] + 1, f[castle] - 1)]
+            pieces[castle, us[castle] + ROOK] = (pieces[castle, us[castle] + ROOK] & ~rook_from) | rook_to
+
+        # Rights and clocks, as python-chess' Board.push updates them
+        castling = self.castling[rows] & ~(from_bb | to_bb)
+        castling &= np.where(king, np.where(white, ~_RANK_1, ~_RANK_8), _ALL)
+        self.castling[rows] = castling
+        self.ep_square[rows] = np.where(pawn & (np.abs(t - f) == 16), (f + t) // 2, NO_SQUARE)
+        self.halfmove_clock[rows] = np.where(pawn | capture, 0, self.halfmove_clock[rows] + 1)
+        self.fullmove_number[rows] += ~white
+        self.turn[rows] = ~white
+
+        # Explosions: every piece but pawns on the captured square and around it
+        blast = np.where(capture, BLAST_BB[t], np.uint64(0))
+        pawns = pieces[:, PAWN] | pieces[:, BLACK_PLANES + PAWN]
+        exploded = np.bitwise_or.reduce(pieces, axis=1) & blast & ~pawns
+        white_king = pieces[:, KING] & blast
+        black_king = pieces[:, BLACK_PLANES + KING] & blast
+        pieces[:, 1:6] &= ~blast[:, None]
+        pieces[:, BLACK_PLANES + 1:] &= ~blast[:, None]
+        self.pieces[rows] = pieces
+        self.exploded[rows] = exploded
+        self.capture_square[rows] = np.where(capture, t, NO_SQUARE)
+
+        # A king in the blast loses; ExplosiveBoard.push lets the last king of
+        # its explosion list decide when both are in it
+        white_lost, black_lost = white_king != 0, black_king != 0
+        self.king_exploded[rows] = white_lost | black_lost
+        winner = self.winner[rows]
+        winner[white_lost] = chess.BLACK
+        winner[black_lost] = chess.WHITE
+        both = np.flatnonzero(white_lost & black_lost)
+        if len(both):
+            white_order = EXPLOSION_ORDER[t[both], _squares(white_king[both])]
+            black_order = EXPLOSION_ORDER[t[both], _squares(black_king[both])]
+            winner[both] = np.where(white_order > black_order, chess.BLACK, chess.WHITE)
+        self.winner[rows] = winner
+
+    # Game state
+
+    def king_lost(self):
+        """Whether each position has lost a king, by explosion or otherwise."""
+        return (self.king_exploded | (self.pieces[:, KING] == 0)
+                | (self.pieces[:, BLACK_PLANES + KING] == 0))
+
+    def planes(self):
+        """(N, 12, 64) occupancy planes, as engine.batch_eval.piece_planes builds them."""
+        bits = np.unpackbits(self.pieces.astype('<u8').view(np.uint8).reshape(len(self), 12, 8),
+                             axis=2, bitorder='little')
+        return bits.reshape(len(self), 12, 64)
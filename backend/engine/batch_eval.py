@@ -0,0 +1,77 @@
+"""
+NumPy evaluation of many positions at once.
+
+- piece_planes: (N, 12, 64) occupancy planes built from the boards' bitboards,
+  white pawn..king then black pawn..king, square a1 = 0. The same plane order as
+  board_to_tensor in engine.nn_eval, so they also feed the NN in one batch.
+- static_evaluations: explosion_aware_evaluation (engine.search) for a whole
+  batch, with material and king danger computed as array operations. Terminal
+  positions (mate, stalemate, missing kings) still need python-chess per board.
+"""
+
+import chess
+import numpy as np
+
+from engine.search import MATE_SCORE, MATERIAL_VALUES
+
+PIECE_TYPES = (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING)
+
+# Material of each plane, from White's point of view
+_PLANE_VALUES = np.array([MATERIAL_VALUES[pt] for pt in PIECE_TYPES]
+                         + [-MATERIAL_VALUES[pt] for pt in PIECE_TYPES], dtype=np.int64)
+
+# Chebyshev distance between every pair of squares, and the two danger rings
+_RANKS, _FILES = np.divmod(np.arange(64), 8)
+_DISTANCE = np.maximum(abs(_RANKS[:, None] - _RANKS[None, :]), abs(_FILES[:, None] - _FILES[None, :]))
+_RING_1 = (_DISTANCE <= 1).astype(np.int64)  # includes the king's own square
+_RING_2 = (_DISTANCE == 2).astype(np.int64)
+
+NEAR_PENALTY = 150
+FAR_PENALTY = 60
+
+
+def piece_planes(boards):
+    bitboards = np.array([[board.pieces_mask(pt, color) for color in (chess.WHITE, chess.BLACK)
+                           for pt in PIECE_TYPES] for board in boards], dtype='<u8')
+    bits = np.unpackbits(bitboards.reshape(len(boards), 12, 1).view(np.uint8), axis=2, bitorder='little')
+    return bits.reshape(len(boards), 12, 64)
+
+
+def _danger(king_planes, enemy_occupancy):
+    """Penalty per board for enemy pieces one and two squares from the king."""
+    king_square = king_planes.argmax(axis=1)
+    near = (enemy_occupancy * _RING_1[king_square]).sum(axis=1)
+    far = (enemy_occupancy * _RING_2[king_square]).sum(axis=1)
+    penalty = NEAR_PENALTY * near + FAR_PENALTY * far
+    # explosion_aware_evaluation tests `if king_sq:`, which skips a king on a1
+    return np.where(king_square > 0, penalty, 0)
+
+
+def static_evaluations(boards, planes=None):
+    """White-relative centipawn scores of `boards`, equal to explosion_aware_evaluation."""
+    if not boards:
+        return np.zeros(0, dtype=np.int64)
+    if planes is None:
+        planes = piece_planes(boards)
+    planes = planes.astype(np.int64)
+
+    material = planes.sum(axis=2) @ _PLANE_VALUES
+    white = planes[:, :6].sum(axis=1)
+    black = planes[:, 6:].sum(axis=1)
+    scores = (material
+              - _danger(planes[:, 5], black)
+              + _danger(planes[:, 11], white))
+
+    # Terminal positions, in the same order as the scalar evaluation
+    white_king = planes[:, 5].any(axis=1)
+    black_king = planes[:, 11].any(axis=1)
+    for i, board in enumerate(boards):
+        if board.is_checkmate():
+            scores[i] = -MATE_SCORE if board.turn else MATE_SCORE
+        elif board.is_stalemate() or board.is_insufficient_material():
+            scores[i] = 0
+        elif not white_king[i]:
+            scores[i] = -MATE_SCORE
+        elif not black_king[i]:
+            scores[i] = MATE_SCORE
+    return scores
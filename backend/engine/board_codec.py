@@ -0,0 +1,98 @@
+"""
+Board payloads of the /api ChessEngine endpoints, parsed into python-chess bitboards.
+
+- The legacy form is the 8x8 grid of {"type": "pawn", "color": "white"} cells
+  (or null), row 0 being rank 8.
+- The compact forms are a FEN (only the placement field is read) and a packed
+  board: a 64-character string, one FEN piece letter or '.' per square, in the
+  grid's order (a8..h8, a7..h7, ..., a1..h1).
+- Both compact forms are converted once per distinct string (LRU cache), so a
+  repeated position costs a dict lookup. The grid is packed first and then goes
+  through the same cache. The returned boards are shared and must not be modified.
+"""
+
+from functools import lru_cache
+
+import chess
+
+CACHE_SIZE = 4096
+
+PIECE_NAMES = {
+    chess.PAWN: 'pawn', chess.KNIGHT: 'knight', chess.BISHOP: 'bishop',
+    chess.ROOK: 'rook', chess.QUEEN: 'queen', chess.KING: 'king',
+}
+NAME_TYPES = {name: piece_type for piece_type, name in PIECE_NAMES.items()}
+PACKED_SYMBOLS = set('PNBRQKpnbrqk.')
+
+
+def square_of(row, col):
+    """Square of a grid cell (row 0 = rank 8)."""
+    return chess.square(col, 7 - row)
+
+
+def piece_dict(piece):
+    """The grid cell of a piece: {"type": ..., "color": ...}."""
+    return {'type': PIECE_NAMES[piece.piece_type], 'color': 'white' if piece.color else 'black'}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def board_from_fen(fen):
+    try:
+        return chess.BaseBoard(fen.split(' ', 1)[0])
+    except (IndexError, ValueError) as e:
+        raise ValueError(f'invalid FEN: {e}')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def board_from_packed(packed):
+    if len(packed) != 64 or not PACKED_SYMBOLS.issuperset(packed):
+        raise ValueError('packed board must be 64 characters of FEN piece letters or "."')
+    rows = []
+    for start in range(0, 64, 8):
+        row, empty = [], 0
+        for symbol in packed[start:start + 8]:
+            if symbol == '.':
+                empty += 1
+                continue
+            if empty:
+                row.append(str(empty))
+                empty = 0
+            row.append(symbol)
+        if empty:
+            row.append(str(empty))
+        rows.append(''.join(row))
+    return chess.BaseBoard('/'.join(rows))
+
+
+def pack_grid(grid):
+    """Packed string of an 8x8 grid of piece dicts."""
+    if not isinstance(grid, list) or len(grid) != 8 or not all(isinstance(row, list) and len(row) == 8
+                                                                for row in grid):
+        raise ValueError('board must be an 8x8 array')
+    symbols = []
+    for row in grid:
+        for cell in row:
+            if not cell:
+                symbols.append('.')
+                continue
+            piece_type = NAME_TYPES.get(cell.get('type'))
+            if piece_type is None:
+                raise ValueError(f"unknown piece type {cell.get('type')!r}")
+            symbol = chess.piece_symbol(piece_type)
+            symbols.append(symbol.upper() if cell.get('color') == 'white' else symbol)
+    return ''.join(symbols)
+
+
+def parse_board(data):
+    """
+    Board of a request body: its 'fen' or 'packed' field, or 'board' as a grid,
+    a packed string or a FEN. Raises ValueError on a malformed board.
+    """
+    if data.get('fen'):
+        return board_from_fen(data['fen'])
+    if data.get('packed'):
+        return board_from_packed(data['packed'])
+    board = data.get('board')
+    if isinstance(board, str):
+        return board_from_packed(board) if len(board) == 64 and '/' not in board else board_from_fen(board)
+    return board_from_packed(pack_grid(board))
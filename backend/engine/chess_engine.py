@@ -1,50 +1,47 @@
 import chess
 import random
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
 import math
 from collections import defaultdict
 import time
 
-class SimpleEvalNet(nn.Module):
-    def __init__(self):
-        super().__init__()
-        self.conv1 = nn.Conv2d(12, 64, kernel_size=3, padding=1)
-        self.conv2 = nn.Conv2d(64, 128, kernel_size=3, padding=1)
-        self.conv3 = nn.Conv2d(128, 256, kernel_size=3, padding=1)
-        self.fc1 = nn.Linear(256 * 8 * 8, 512)
-        self.fc2 = nn.Linear(512, 1)
-        
-    def forward(self, x):
-        x = F.relu(self.conv1(x))
-        x = F.relu(self.conv2(x))
-        x = F.relu(self.conv3(x))
-        x = x.view(-1, 256 * 8 * 8)
-        x = F.relu(self.fc1(x))
-        return torch.tanh(self.fc2(x))  # Normalized output
-
-piece_to_index = {
-    'P': 0, 'N': 1, 'B': 2, 'R': 3, 'Q': 4, 'K': 5,
-    'p': 6, 'n': 7, 'b': 8, 'r': 9, 'q': 10, 'k': 11
+from engine.board_codec import piece_dict, square_of
+from engine.eval_cache import EVAL_CACHE, eval_key
+from engine.explosive_board import ExplosiveBoard
+from engine.game_history import GameHistory
+from engine.move_ordering import explosion_value, order_moves
+from engine.pruning import NULL_MOVE_REDUCTION, lmr_reduction, null_move_allowed
+from engine.search import search_best_move
+from engine.search_context import DEFAULT_ASPIRATION, DEFAULT_PVS, SearchAborted, SearchContext
+from engine.search_stats import SearchStats, get_stats
+
+# Search budget of /api/get-ai-move per difficulty: maximum depth, nodes and
+# seconds. The first iteration (depth 1, a few dozen nodes) always completes;
+# after it the search stops within ABORT_CHECK_INTERVAL nodes of either budget.
+DIFFICULTY_BUDGETS = {
+    'easy': {'depth': 1, 'nodes': 50, 'time': 0.1},
+    'medium': {'depth': 2, 'nodes': 300, 'time': 0.5},
+    'hard': {'depth': 3, 'nodes': 2000, 'time': 2.0},
+    'expert': {'depth': 5, 'nodes': 10000, 'time': 5.0},
 }
 
-def board_to_tensor(board):
-    tensor = torch.zeros(12, 8, 8)
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece:
-            idx = piece_to_index[piece.symbol()]
-            row, col = chess.square_rank(square), chess.square_file(square)
-            tensor[idx][7 - row][col] = 1  # Flipped for white's perspective
-    return tensor
+# Counters of the budgeted searches, merged in after each request
+AI_MOVE_STATS = get_stats('api_ai_move')
 
 class ExplosiveChess:
+    # Search windows, in evaluate_board units
+    ASPIRATION_WINDOW = 0.05
+    PVS_EPSILON = 1e-6
+
     def __init__(self):
         self.board = chess.Board()
-        self.eval_model = SimpleEvalNet()
-        self.eval_model.eval()
+        # torch is imported with the first ExplosiveChess, not with this module
+        from engine.nn_eval import load_eval_model, nn_evaluate
+        self.eval_model = load_eval_model()
+        self.nn_evaluate = nn_evaluate
         self.move_history = []
+        # Checkpointed moves, for position_at() and takeback()
+        self.history = GameHistory(self.board, play=self._play)
+        self.stats = get_stats('explosive_chess')
         
         # Enhanced piece values considering explosion risk
         self.piece_values = {
@@ -55,12 +52,7 @@ class ExplosiveChess:
             chess.QUEEN: 9.5,
             chess.KING: 200  # Much higher value to prioritize king safety
         }
-        
-        # Load pre-trained weights if available
-        try:
-            self.eval_model.load_state_dict(torch.load('model_weights.pth'))
-        except:
-            print("No pre-trained model found, using random weights")
+
 
     def is_explosive_capture(self, move):
         """Check if move triggers explosion (captures only)"""
@@ -68,14 +60,18 @@ class ExplosiveChess:
 
     def apply_explosion(self, move):
         """Simulate explosion chain reaction with improved mechanics"""
-        if not self.is_explosive_capture(move):
+        return self._explode(self.board, move)
+
+    def _explode(self, board, move):
+        """apply_explosion on `board`"""
+        if not board.is_capture(move):
             return set()
 
         exploded = set()
         frontier = {move.to_square}
         
         # Get captured piece for special explosion rules
-        captured_piece = self.board.piece_at(move.to_square)
+        captured_piece = board.piece_at(move.to_square)
         if not captured_piece:
             return set()
             
@@ -95,7 +91,7 @@ class ExplosiveChess:
         
         # Process explosion squares with piece-specific rules
         for sq in explosion_squares:
-            piece = self.board.piece_at(sq)
+            piece = board.piece_at(sq)
             if piece is not None:
                 # Kings are affected by explosions
                 if piece.piece_type == chess.KING:
@@ -106,7 +102,8 @@ class ExplosiveChess:
                     
         # Remove exploded pieces
         for sq in exploded:
-            self.board.remove_piece_at(sq)
+            board.remove_piece_at(sq)
+        self.stats.explosions += 1
             
         return exploded
 
@@ -130,6 +127,22 @@ class ExplosiveChess:
             'move': move,
             'exploded_squares': exploded
         })
+        self.history.append(move, self.board)
+
+    def _play(self, board, move):
+        """push_move on a board rebuilt by the history"""
+        board.push(move)
+        self._explode(board, move)
+
+    def position_at(self, ply):
+        """A new board with the position after `ply` plies of this game, in bounded time."""
+        return self.history.board_at(ply)
+
+    def takeback(self, plies=1):
+        """Take back the last `plies` plies, explosions included; returns the new FEN."""
+        self.board = self.history.takeback(plies)
+        del self.move_history[len(self.move_history) - plies:]
+        return self.get_fen()
 
     def is_valid_move(self, move):
         """Check if a move is valid considering explosion rules"""
@@ -187,6 +200,7 @@ class ExplosiveChess:
     def reset(self):
         self.board.reset()
         self.move_history = []
+        self.history = GameHistory(self.board, play=self._play)
         return self.get_fen()
 
     def play_random_move(self):
@@ -194,14 +208,38 @@ class ExplosiveChess:
         self.push_move(move)
         return move
 
-    def play_minimax_move(self, depth=3):
-        """Minimax with alpha-beta pruning"""
-        def minimax(board, depth, alpha, beta, maximizing_player):
+    def play_minimax_move(self, depth=3, pvs=DEFAULT_PVS, aspiration=DEFAULT_ASPIRATION,
+                          null_move=False, lmr=False, ctx=None):
+        """
+        Minimax with alpha-beta pruning, driven by iterative deepening.
+
+        `pvs` enables principal variation search (null-window probes for every move
+        after the first) and `aspiration` starts each iteration from a narrow window
+        around the previous score; `null_move` and `lmr` enable selective pruning
+        (see engine.pruning). With all of them off this is plain alpha-beta.
+
+        A SearchContext `ctx` replaces those flags and brings its deadline, node
+        limit and stop event: once the first iteration is done they may cut the
+        search short, and the move of the deepest completed iteration is played.
+        """
+        if ctx is None:
+            ctx = SearchContext(self.stats, pvs=pvs, aspiration=aspiration, null_move=null_move, lmr=lmr)
+        stats = ctx.stats
+        # Score every leaf from the point of view of the side to move at the root
+        root_color = self.board.turn
+
+        def minimax(board, depth, alpha, beta, maximizing_player, ply):
             try:
+                stats.nodes += 1
+                ctx.check_abort()
                 if depth == 0 or board.is_game_over():
-                    return self.evaluate_board(board, not maximizing_player)
+                    start = time.perf_counter()
+                    score = self.evaluate_board(board, root_color)
+                    stats.eval_time += time.perf_counter() - start
+                    return score
                 
                 # Get legal moves and filter out moves that would cause own king to explode
+                start = time.perf_counter()
                 legal_moves = []
                 for move in board.legal_moves:
                     # Check if move would cause own king to explode
@@ -222,25 +260,54 @@ class ExplosiveChess:
                             continue
                     
                     legal_moves.append(move)
+                stats.movegen_time += time.perf_counter() - start
                 
                 if not legal_moves:
                     return -float('inf') if maximizing_player else float('inf')
+
+                # Null-move pruning: pass, and prune if a reduced search still fails
+                # high (low for the minimizer)
+                if ctx.null_move and null_move_allowed(board, depth, ply):
+                    bound = beta if maximizing_player else alpha
+                    if not math.isinf(bound):
+                        stats.null_move_tries += 1
+                        board.push(chess.Move.null())
+                        try:
+                            reduced = depth - 1 - NULL_MOVE_REDUCTION
+                            if maximizing_player:
+                                null_score = minimax(board, reduced, beta - self.PVS_EPSILON, beta,
+                                                     False, ply + 1)
+                                prune = null_score >= beta
+                            else:
+                                null_score = minimax(board, reduced, alpha, alpha + self.PVS_EPSILON,
+                                                     True, ply + 1)
+                                prune = null_score <= alpha
+                        finally:
+                            board.pop()
+                        if prune:
+                            stats.null_move_cutoffs += 1
+                            return null_score
                 
-                moves = sorted(legal_moves, 
-                             key=lambda m: self._move_heuristic(board, m),
-                             reverse=maximizing_player)
+                # Blast value for captures, killer and history tables for quiet moves;
+                # both score moves for the side to move, so best-first for both sides
+                moves = order_moves(board, legal_moves, self.piece_values, ctx, ply)
                 
                 best_score = -float('inf') if maximizing_player else float('inf')
+                in_check = board.is_check()
+                killers = ctx.killers.get(ply)
                 
-                for move in moves:
+                for index, move in enumerate(moves):
+                    is_capture = board.is_capture(move)
+                    reduction = (lmr_reduction(board, move, depth, index, in_check, killers)
+                                 if ctx.lmr else 0)
                     try:
                         board.push(move)
                         # Simulate explosion
                         temp_exploded = self._simulate_explosion(board, move)
-                        for sq in temp_exploded:
-                            board.remove_piece_at(sq)
+                        self._remove_exploded(board, temp_exploded)
                         
-                        score = minimax(board, depth-1, alpha, beta, not maximizing_player)
+                        score = search_child(board, depth-1, alpha, beta, not maximizing_player,
+                                             ply + 1, index == 0, reduction)
                         
                         # Undo explosion and move
                         board.pop()
@@ -253,52 +320,111 @@ class ExplosiveChess:
                             beta = min(beta, best_score)
                         
                         if beta <= alpha:
+                            ctx.record_cutoff(board.turn, move, is_capture, depth, ply, index)
                             break
+                    except SearchAborted:
+                        board.pop()
+                        raise
                     except Exception as e:
                         # Skip moves that cause errors
                         board.pop()
                         continue
                 
                 return best_score
+            except SearchAborted:
+                raise
             except Exception as e:
                 # Fallback for any unexpected errors
                 return 0
-            
-        best_move = None
-        best_score = -float('inf')
-        alpha = -float('inf')
-        beta = float('inf')
+
+        def search_child(board, depth, alpha, beta, maximizing_player, ply, first, reduction=0):
+            # LMR: a reduced late move is kept unless it improves the parent's bound
+            if reduction:
+                stats.lmr_reductions += 1
+                score = minimax(board, depth - reduction, alpha, beta, maximizing_player, ply)
+                improves = score < beta if maximizing_player else score > alpha
+                if not improves:
+                    return score
+                stats.lmr_researches += 1
+            # PVS: probe later moves with a null window, re-search only if they can
+            # improve the parent's bound
+            bound = beta if maximizing_player else alpha
+            if first or not ctx.pvs or math.isinf(bound):
+                return minimax(board, depth, alpha, beta, maximizing_player, ply)
+            stats.pvs_searches += 1
+            if maximizing_player:
+                score = minimax(board, depth, beta - self.PVS_EPSILON, beta, True, ply)
+            else:
+                score = minimax(board, depth, alpha, alpha + self.PVS_EPSILON, False, ply)
+            if alpha < score < beta:
+                stats.pvs_researches += 1
+                score = minimax(board, depth, alpha, beta, maximizing_player, ply)
+            return score
+
+        def search_root(depth, alpha, beta):
+            best_move = None
+            best_score = -float('inf')
+            moves = order_moves(self.board, legal_moves, self.piece_values, ctx, 0)
+            for index, move in enumerate(moves):
+                try:
+                    self.board.push(move)
+                    exploded = self._simulate_explosion(self.board, move)
+                    self._remove_exploded(self.board, exploded)
+                    
+                    score = search_child(self.board, depth-1, alpha, beta, False, 1, index == 0)
+                    
+                    # Undo explosion simulation
+                    self.board.pop()
+                    
+                    if score > best_score:
+                        best_score = score
+                        best_move = move
+                    alpha = max(alpha, score)
+                    if beta <= alpha:
+                        break
+                except SearchAborted:
+                    self.board.pop()
+                    raise
+                except Exception as e:
+                    # Skip moves that cause errors
+                    self.board.pop()
+                    continue
+            return best_score, best_move
         
+        nodes_before = stats.nodes
+        search_start = time.perf_counter()
         legal_moves = self.legal_moves()
         if not legal_moves:
             return None
-            
-        moves = sorted(legal_moves, 
-                      key=lambda m: self._move_heuristic(self.board, m),
-                      reverse=True)
-        
-        for move in moves:
+
+        best_move = None
+        score = None
+        ctx.abortable = False
+        ctx.completed_depth = 0
+        for current_depth in range(1, depth + 1):
+            if ctx.abortable and ctx.should_stop():
+                break
             try:
-                self.board.push(move)
-                exploded = self._simulate_explosion(self.board, move)
-                for sq in exploded:
-                    self.board.remove_piece_at(sq)
-                
-                score = minimax(self.board, depth-1, alpha, beta, False)
-                
-                # Undo explosion simulation
-                self.board.pop()
-                
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-            except Exception as e:
-                # Skip moves that cause errors
-                self.board.pop()
-                continue
+                if ctx.aspiration and score is not None and not math.isinf(score):
+                    stats.aspiration_searches += 1
+                    alpha, beta = score - self.ASPIRATION_WINDOW, score + self.ASPIRATION_WINDOW
+                    score, move = search_root(current_depth, alpha, beta)
+                    if not alpha < score < beta:
+                        stats.aspiration_researches += 1
+                        score, move = search_root(current_depth, -float('inf'), float('inf'))
+                else:
+                    score, move = search_root(current_depth, -float('inf'), float('inf'))
+            except SearchAborted:
+                stats.aborted_searches += 1
+                break
+            if move is not None:
+                best_move = ctx.pv_move = move
+            ctx.completed_depth = current_depth
+            ctx.abortable = best_move is not None
         
         if best_move is None and legal_moves:
             best_move = legal_moves[0]
+        stats.record_search(ctx.completed_depth, stats.nodes - nodes_before, time.perf_counter() - search_start)
             
         if best_move:
             self.push_move(best_move)
@@ -306,21 +432,26 @@ class ExplosiveChess:
         return best_move
 
     def _move_heuristic(self, board, move):
-        """Quick evaluation to order moves"""
+        """Quick evaluation to order moves: net material of the capture's blast"""
         try:
-            if board.is_capture(move):
-                captured = board.piece_at(move.to_square)
-                if captured:
-                    return self.piece_values.get(captured.piece_type, 0) * 10
-            return 0
+            return explosion_value(board, move, self.piece_values)
         except:
             return 0
 
+    def _remove_exploded(self, board, squares):
+        """
+        Remove exploded pieces while keeping the move stack, so a later pop()
+        restores them (Board.remove_piece_at clears the stack).
+        """
+        for sq in squares:
+            chess.BaseBoard.remove_piece_at(board, sq)
+
     def _simulate_explosion(self, board, move):
         """Simulate explosion without modifying board"""
         if not board.is_capture(move):
             return set()
         
+        self.stats.explosions += 1
         exploded = set()
         frontier = {move.to_square}
         power = 2
@@ -344,8 +475,18 @@ class ExplosiveChess:
         
         return exploded
 
-    def play_mcts_move(self, simulations=1000, time_limit=2.0):
-        """Enhanced MCTS with explosion awareness"""
+    def play_mcts_move(self, simulations=1000, time_limit=2.0, ctx=None):
+        """
+        Enhanced MCTS with explosion awareness
+
+        Runs `simulations` playouts within `time_limit` seconds, or within the
+        deadline, node limit (one node per playout) and stop event of `ctx`; the
+        most visited move so far is played when either runs out.
+        """
+        if ctx is None:
+            ctx = SearchContext(self.stats, deadline=time.monotonic() + time_limit)
+        engine = self
+
         class Node:
             def __init__(self, board, move=None, parent=None):
                 self.board = board
@@ -369,7 +510,7 @@ class ExplosiveChess:
                 new_board = self.board.copy()
                 new_board.push(move)
                 # Simulate explosion
-                exploded = self._simulate_explosion(new_board, move)
+                exploded = engine._simulate_explosion(new_board, move)
                 for sq in exploded:
                     new_board.remove_piece_at(sq)
                 child = Node(new_board, move=move, parent=self)
@@ -378,9 +519,10 @@ class ExplosiveChess:
 
         try:
             root = Node(self.board.copy())
-            end_time = time.time() + time_limit
             
-            while time.time() < end_time and simulations > 0:
+            # The first playout always runs, so there is a move to play
+            while simulations > 0 and not (root.children and ctx.should_stop()):
+                ctx.stats.nodes += 1
                 node = root
                 board = root.board.copy()
                 
@@ -446,10 +588,12 @@ class ExplosiveChess:
     def evaluate_board(self, board, perspective):
         """Enhanced evaluation with improved explosion risk assessment"""
         try:
-            # Neural network evaluation
-            tensor = board_to_tensor(board).unsqueeze(0)
-            with torch.no_grad():
-                score = self.eval_model(tensor).item()
+            # Neural network evaluation, White's point of view, cached per position
+            key = eval_key(board, 'nn')
+            score = EVAL_CACHE.probe(key)
+            if score is None:
+                score = self.nn_evaluate(self.eval_model, board)
+                EVAL_CACHE.store(key, score)
             
             # Adjust for perspective
             return score if perspective == chess.WHITE else -score
@@ -541,7 +685,7 @@ class ChessEngine:
         Args:
             from_pos (dict): Starting position with row and col
             to_pos (dict): Target position with row and col
-            board (list): 2D array representing the chess board
+            board (chess.BaseBoard): Position, parsed by engine.board_codec
             
         Returns:
             dict: Result of validation with isValid flag and additional info
@@ -557,98 +701,88 @@ class ChessEngine:
         }
         
         # Check if there's a piece at the target position (capture)
-        from_row, from_col = from_pos['row'], from_pos['col']
         to_row, to_col = to_pos['row'], to_pos['col']
+        to_square = square_of(to_row, to_col)
+        captured = board.piece_at(to_square)
         
-        if board[to_row][to_col]:
+        if captured:
             result["capturedPieces"].append({
                 "row": to_row,
                 "col": to_col,
-                "piece": board[to_row][to_col]
+                "piece": piece_dict(captured)
             })
             
             # Check if the captured piece is a pawn (explosion in our variant)
-            if board[to_row][to_col].get('type') == 'pawn':
+            if captured.piece_type == chess.PAWN:
                 result["explosion"] = True
                 
                 # Add adjacent pieces to captured list (explosion effect)
-                for dr in [-1, 0, 1]:
-                    for dc in [-1, 0, 1]:
-                        if dr == 0 and dc == 0:
-                            continue  # Skip the center square
-                            
-                        adj_row, adj_col = to_row + dr, to_col + dc
-                        
-                        # Check if within board bounds
-                        if 0 <= adj_row < 8 and 0 <= adj_col < 8:
-                            # Check if there's a piece to capture
-                            if board[adj_row][adj_col]:
-                                result["capturedPieces"].append({
-                                    "row": adj_row,
-                                    "col": adj_col,
-                                    "piece": board[adj_row][adj_col]
-                                })
+                for square in chess.scan_forward(chess.BB_KING_ATTACKS[to_square] & board.occupied):
+                    result["capturedPieces"].append({
+                        "row": 7 - chess.square_rank(square),
+                        "col": chess.square_file(square),
+                        "piece": piece_dict(board.piece_at(square))
+                    })
         
         return result
     
-    def get_ai_move(self, board, difficulty):
+    def get_ai_move(self, board, difficulty, color='black', cancel=None):
         """
-        Generate an AI move based on the current board state and difficulty
+        Best move for `color` by an explosion-aware search within the budget of
+        `difficulty` (see DIFFICULTY_BUDGETS)
         
         Args:
-            board (list): 2D array representing the chess board
+            board (chess.BaseBoard): Position, parsed by engine.board_codec
             difficulty (str): AI difficulty level (easy, medium, hard, expert)
+            color (str): Side to move (white or black)
+            cancel: Event or CancelToken that stops the search early when set
             
         Returns:
-            dict: AI move with from and to positions
+            dict: AI move with from and to positions, the budget and what the search used
         """
-        # This is a simplified implementation
-        # In a real chess engine, you would implement minimax with alpha-beta pruning
-        # and different search depths based on difficulty
-        
-        # For demo purposes, we'll just return a random valid move
-        import random
-        
-        # Find all black pieces
-        black_pieces = []
-        for row in range(8):
-            for col in range(8):
-                if board[row][col] and board[row][col].get('color') == 'black':
-                    black_pieces.append({"row": row, "col": col, "piece": board[row][col]})
-        
-        if not black_pieces:
-            return {"error": "No black pieces found"}
-        
-        # Select a random piece
-        piece_pos = random.choice(black_pieces)
-        
-        # Generate possible moves (simplified)
-        possible_moves = []
-        for row in range(8):
-            for col in range(8):
-                # Skip squares with black pieces
-                if board[row][col] and board[row][col].get('color') == 'black':
-                    continue
-                
-                possible_moves.append({"row": row, "col": col})
-        
-        if not possible_moves:
+        budget = DIFFICULTY_BUDGETS.get(difficulty)
+        if budget is None:
+            return {"error": f"Unknown difficulty {difficulty!r}", "difficulties": list(DIFFICULTY_BUDGETS)}
+        
+        # The payload has no castling or en passant rights
+        game = ExplosiveBoard(f"{board.board_fen()} {'w' if color == 'white' else 'b'} - - 0 1")
+        if game.is_game_over():
+            return {"error": "Game is already over", "result": game.result()}
+        legal_moves = [move for move in game.legal_moves if game.is_valid_move(move)]
+        if not legal_moves:
             return {"error": "No valid moves found"}
         
-        # Select a random move
-        move_to = random.choice(possible_moves)
+        # Own counters, so concurrent requests do not spend each other's node budget
+        stats = SearchStats('api')
+        start = time.perf_counter()
+        ctx = SearchContext(stats, deadline=time.monotonic() + budget['time'], node_limit=budget['nodes'],
+                            stop_event=cancel)
+        score, best_move = search_best_move(game, budget['depth'], ctx)
+        seconds = time.perf_counter() - start
+        AI_MOVE_STATS.merge(stats.snapshot())
+        AI_MOVE_STATS.record_search(ctx.completed_depth, stats.nodes, seconds)
         
-        return {
-            "from": {"row": piece_pos["row"], "col": piece_pos["col"]},
-            "to": {"row": move_to["row"], "col": move_to["col"]}
+        if best_move is None:
+            best_move = random.choice(legal_moves)
+        
+        result = {
+            "from": {"row": 7 - chess.square_rank(best_move.from_square), "col": chess.square_file(best_move.from_square)},
+            "to": {"row": 7 - chess.square_rank(best_move.to_square), "col": chess.square_file(best_move.to_square)},
+            "difficulty": difficulty,
+            "evaluation": score,
+            "budget": budget,
+            "used": {"depth": ctx.completed_depth, "nodes": stats.nodes, "time": round(seconds, 4)}
         }
+        if best_move.promotion:
+            result["promotion"] = chess.piece_name(best_move.promotion)
+        return result
     
     def check_game_state(self, board, current_player):
         """
         Check if the game is over (checkmate, stalemate, etc.)
         
         Args:
-            board (list): 2D array representing the chess board
+            board (chess.BaseBoard): Position, parsed by engine.board_codec
             current_player (str): Current player's color (white or black)
             
         Returns:
@@ -658,26 +792,14 @@ class ChessEngine:
         # In a real chess engine, you would check for checkmate, stalemate, etc.
         
         # Check if kings are present
-        white_king_present = False
-        black_king_present = False
-        
-        for row in range(8):
-            for col in range(8):
-                piece = board[row][col]
-                if piece and piece.get('type') == 'king':
-                    if piece.get('color') == 'white':
-                        white_king_present = True
-                    else:
-                        black_king_present = True
-        
-        if not white_king_present:
+        if not board.kings & board.occupied_co[chess.WHITE]:
             return {
                 "gameOver": True,
                 "winner": "black",
                 "reason": "king capture"
             }
         
-        if not black_king_present:
+        if not board.kings & board.occupied_co[chess.BLACK]:
             return {
                 "gameOver": True,
                 "winner": "white",
@@ -0,0 +1,51 @@
+"""
+Evaluation cache shared by the evaluators of one process.
+
+A fixed number of slots indexed by the position's hash; a new entry always
+replaces whatever held its slot. Entries keep their full key, so a slot
+collision is a miss, never a wrong score. Keys are built from python-chess'
+transposition key (placement, side to move, castling and en passant rights),
+which costs well under a microsecond, against tens of microseconds for a
+Zobrist hash, with a tag per evaluator so both can share the table.
+"""
+
+DEFAULT_SIZE = 1 << 16
+
+
+class EvalCache:
+    def __init__(self, size=DEFAULT_SIZE):
+        if size & (size - 1):
+            raise ValueError('cache size must be a power of two')
+        self.mask = size - 1
+        # (key, score) per slot, replaced as one object so threads never see a torn entry
+        self.slots = [None] * size
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key):
+        entry = self.slots[hash(key) & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def store(self, key, score):
+        self.slots[hash(key) & self.mask] = (key, score)
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# One table for the process: explosion_aware_evaluation and ExplosiveChess.evaluate_board
+EVAL_CACHE = EvalCache()
+
+
+def eval_key(board, evaluator):
+    """Cache key of the position on `board` for the evaluator named `evaluator`."""
+    # Board._transposition_key is python-chess' own key for repetition detection
+    return evaluator, board._transposition_key()
@@ -0,0 +1,357 @@
+"""
+ExplosiveBoard: python-chess board extended with the explosion rules of Atomic Chess.
+
+Shared by the Flask app, the search and the offline tools, so it only depends on
+python-chess.
+"""
+
+import uuid
+
+import chess
+
+from engine.search_stats import get_stats
+
+# Explosions are counted with the minimax AI's rules counters
+SEARCH_STATS = get_stats('minimax')
+
+class _MoveCache:
+    """Move lists of one position. Copies of a board get a cache of their own."""
+    __slots__ = ('key', 'legal', 'valid')
+
+    def __init__(self):
+        self.key = None
+        self.legal = None
+        self.valid = None
+
+    def __copy__(self):
+        return _MoveCache()
+
+    def __deepcopy__(self, memo):
+        return _MoveCache()
+
+
+# We extend the python-chess board with explosion rules of Atomic Chess.
+# Explosions eliminate captured piece and all surrounding pieces except pawns.
+
+class ExplosiveBoard(chess.Board):
+    def __init__(self, *args, **kwargs):
+        super(ExplosiveBoard, self).__init__(*args, **kwargs)
+        # Custom tracking of exploded squares after move for client info
+        self.exploded_squares = []
+        # Track if a king was exploded
+        self.king_exploded = False
+        self.winner = None
+        # Identifies the game; kept across restarts when it is persisted
+        self.game_id = uuid.uuid4().hex[:12]
+        # This board object and its position version identify responses for HTTP
+        # caching (see /gamestate), so a recovered game never reuses an old ETag
+        self._etag_base = self.game_id
+        self.version = 0
+        # (version, status) of the last status() call
+        self._status = (None, None)
+        # Legal and valid moves of the current position, see _move_cache()
+        self._moves = _MoveCache()
+
+    def clear_stack(self):
+        # (exploded_squares, king_exploded, winner) before each move of the move stack,
+        # for pop(). python-chess clears the stack on every explosion (remove_piece_at)
+        self._explosion_stack = []
+        super().clear_stack()
+
+    def push(self, move):
+        """
+        Override push to handle explosion after capture.
+        Explosion rules:
+        - When a piece is captured, explosion affects all squares surrounding the captured square, 
+          excluding pawns.
+        - Capture triggers explosion that eliminates all pieces in those squares except pawns.
+        """
+        # The game-over test only matters for captures, or to keep the explosion
+        # state of a finished game. Skipping it otherwise also keeps python-chess'
+        # repetition test, which pops and re-pushes quiet moves, from nesting
+        # another repetition test in every push.
+        if not (self.exploded_squares or self.king_exploded or self.is_capture(move)):
+            return self._push(move, False)
+        # The API has usually just computed the status of this position
+        version, status = self._status
+        game_over = status['is_game_over'] if version == self.version else self.is_game_over()
+        self._push(move, game_over)
+
+    def _push(self, move, game_over):
+        """push() once the game-over test is done: no explosions after the end of the game."""
+        self.version += 1
+        self._moves.key = None
+        self._explosion_stack.append((self.exploded_squares, self.king_exploded, self.winner))
+        if game_over:
+            return super().push(move)
+
+        # Store the current player's color before making the move
+        current_player = self.turn
+        
+        capture_square = None
+        if self.is_capture(move):
+            capture_square = move.to_square
+        else:
+            capture_square = None
+
+        # Check for pawn promotion
+        promotion = move.promotion
+        
+        # Push move normally first
+        super().push(move)
+
+        self.exploded_squares = []
+        self.king_exploded = False
+
+        if capture_square is not None:
+            SEARCH_STATS.explosions += 1
+            # Compute explosion squares: the 8 squares surrounding the capture_square + the capture_square itself
+            explosion_squares = [capture_square]
+            f = chess.square_file(capture_square)
+            r = chess.square_rank(capture_square)
+            for df in [-1,0,1]:
+                for dr in [-1,0,1]:
+                    if df == 0 and dr == 0:
+                        continue
+                    ff = f + df
+                    rr = r + dr
+                    if 0 <= ff <= 7 and 0 <= rr <= 7:
+                        sq = chess.square(ff, rr)
+                        explosion_squares.append(sq)
+
+            # The explosion eliminates all pieces on these squares except pawns.
+            removed_squares = []
+            for sq in explosion_squares:
+                piece = self.piece_at(sq)
+                if piece is not None:
+                    # Check if a king is being exploded
+                    if piece.piece_type == chess.KING:
+                        self.king_exploded = True
+                        # The winner is the opposite of the king's color
+                        self.winner = not piece.color
+                    
+                    if piece.piece_type != chess.PAWN:
+                        self.remove_piece_at(sq)
+                        removed_squares.append(sq)
+
+            # Store exploded squares (excluding captured) to notify UI
+            self.exploded_squares = removed_squares
+
+    def pop(self):
+        """Take back the last move, with the explosion state from before it."""
+        move = super().pop()
+        # Versions only ever grow, so a taken-back position never reuses an old ETag
+        self.version += 1
+        self._moves.key = None
+        self.exploded_squares, self.king_exploded, self.winner = self._explosion_stack.pop()
+        return move
+
+    def copy(self, *, stack=True):
+        """
+        A copy that keeps the explosion state and game identity along with the
+        position. With the whole move stack (the repetition tests depend on it) it
+        also keeps the computed status and move lists, which are never modified.
+        """
+        board = super().copy(stack=stack)
+        if stack:
+            board._explosion_stack = self._explosion_stack[-len(board.move_stack):] if board.move_stack else []
+        board.exploded_squares = list(self.exploded_squares)
+        board.king_exploded = self.king_exploded
+        board.winner = self.winner
+        board.game_id = self.game_id
+        board._etag_base = self._etag_base
+        board.version = self.version
+        if len(board.move_stack) == len(self.move_stack):
+            board._status = self._status
+            cache = self._moves
+            board._moves.key, board._moves.legal, board._moves.valid = cache.key, cache.legal, cache.valid
+        return board
+
+    def _move_cache(self):
+        """
+        The move cache of the current position. push() and pop() empty it; the key
+        (placement, rights, clock and ply) also catches changes made around them,
+        such as remove_piece_at() or set_fen().
+        """
+        key = (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings,
+               self.occupied_co[chess.WHITE], self.occupied_co[chess.BLACK], self.turn,
+               self.castling_rights, self.ep_square, self.halfmove_clock, self.ply())
+        cache = self._moves
+        if cache.key != key:
+            cache.key, cache.legal, cache.valid = key, None, None
+        return cache
+
+    def generate_legal_moves(self, from_mask=chess.BB_ALL, to_mask=chess.BB_ALL):
+        """
+        Whole-board generation runs once per position, and is_game_over(),
+        is_checkmate(), is_stalemate(), legal_moves and valid_moves() share it.
+        """
+        if from_mask != chess.BB_ALL or to_mask != chess.BB_ALL:
+            return super().generate_legal_moves(from_mask, to_mask)
+        cache = self._move_cache()
+        if cache.legal is None:
+            cache.legal = list(super().generate_legal_moves())
+        return iter(cache.legal)
+
+    def valid_moves(self):
+        """The legal moves that pass is_valid_move, generated once per position. Do not modify."""
+        cache = self._move_cache()
+        if cache.valid is None:
+            game_over = self.is_game_over()
+            cache.valid = [move for move in self.generate_legal_moves()
+                           if self._keeps_rules(move, game_over)]
+        return cache.valid
+
+    def adopt_identity(self, board):
+        """
+        Continue the game of `board` on this board, e.g. a position rebuilt from
+        the game's history for a takeback: same game id and ETag base, and a later
+        version, so no ETag of the game is reused.
+        """
+        self.game_id = board.game_id
+        self._etag_base = board._etag_base
+        self.version = max(self.version, board.version) + 1
+
+    def etag(self, version=None):
+        """ETag of the position; `version` replaces the board's own, e.g. a game store's."""
+        return f"{self._etag_base}-{self.version if version is None else version}"
+
+    def status(self):
+        """
+        Everything the API reports about the current position, as a dict.
+
+        Legal moves are generated once for check, mate, stalemate and the game-over
+        test, and the result is cached until the next push or pop, so the API can
+        build every response of a request (and every /gamestate poll) from it.
+        Do not modify the returned dict.
+        """
+        version, status = self._status
+        if version == self.version:
+            return status
+
+        white_king_exists = self.king(chess.WHITE) is not None
+        black_king_exists = self.king(chess.BLACK) is not None
+        legal_move_count = self.legal_moves.count()
+        is_check = self.is_check()
+        is_checkmate = is_check and legal_move_count == 0
+        is_stalemate = not is_check and legal_move_count == 0
+
+        result = None
+        if not white_king_exists or not black_king_exists or self.king_exploded:
+            # Same bookkeeping as is_game_over()
+            if not self.winner:
+                self.winner = chess.BLACK if not white_king_exists else chess.WHITE
+            game_over = True
+            result = self.result()
+        else:
+            game_over = (legal_move_count == 0 or self.is_insufficient_material()
+                         or self.is_seventyfive_moves() or self.is_fivefold_repetition())
+            if game_over:
+                result = self.result()
+
+        status = {
+            'fen': self.fen(),
+            'turn': 'white' if self.turn else 'black',
+            'legal_move_count': legal_move_count,
+            'is_check': is_check,
+            'is_checkmate': is_checkmate,
+            'is_stalemate': is_stalemate,
+            'is_game_over': game_over,
+            'exploded': [chess.square_name(sq) for sq in self.exploded_squares],
+            'white_king_exists': white_king_exists,
+            'black_king_exists': black_king_exists,
+            'result': result
+        }
+        self._status = (self.version, status)
+        return status
+
+    def exploded(self):
+        # Returns list of exploded squares (excluding capture square)
+        return self.exploded_squares
+        
+    def is_valid_move(self, move):
+        """Check if a move is valid considering explosion rules and check"""
+        # First check if it's a legal move according to standard chess rules
+        if move not in self.legal_moves:
+            return False
+        cache = self._move_cache()
+        if cache.valid is not None:
+            return move in cache.valid
+        return self._keeps_rules(move, self.is_game_over())
+
+    def _keeps_rules(self, move, game_over):
+        """Whether a legal move neither explodes its own king nor leaves it in check."""
+        # Get the king square for the current player
+        king_square = self.king(self.turn)
+        if king_square is None:  # No king (shouldn't happen in standard chess)
+            return True
+            
+        # If it's a capture, check if the explosion would affect our king
+        if self.is_capture(move):
+            capture_square = move.to_square
+            f = chess.square_file(capture_square)
+            r = chess.square_rank(capture_square)
+            
+            # Check if king is adjacent to the capture square
+            kf = chess.square_file(king_square)
+            kr = chess.square_rank(king_square)
+            
+            # If king is within explosion radius (1 square), the move is invalid
+            if abs(kf - f) <= 1 and abs(kr - r) <= 1:
+                return False
+        
+        # Check if the move would leave the king in check; the history is not
+        # needed for that, and the game-over test is already done
+        try:
+            test_board = self.copy(stack=False)
+            test_board._push(move, game_over)
+            # If the move puts or leaves our king in check, it's invalid
+            if test_board.is_check():
+                return False
+        except:
+            # If there's an error simulating the move, consider it invalid
+            return False
+                
+        return True
+        
+    def is_game_over(self):
+        """Override is_game_over to check for king explosion"""
+        # If a king was exploded, the game is over
+        if self.king_exploded:
+            return True
+            
+        # Check if either king is missing
+        white_king_exists = False
+        black_king_exists = False
+        
+        for square in chess.SQUARES:
+            piece = self.piece_at(square)
+            if piece and piece.piece_type == chess.KING:
+                if piece.color == chess.WHITE:
+                    white_king_exists = True
+                else:
+                    black_king_exists = True
+        
+        # If either king is missing, the game is over
+        if not white_king_exists or not black_king_exists:
+            # Set the winner if not already set
+            if not self.winner:
+                if not white_king_exists:
+                    self.winner = chess.BLACK
+                else:
+                    self.winner = chess.WHITE
+            return True
+            
+        # Otherwise, use the standard chess rules
+        return super().is_game_over()
+        
+    def result(self):
+        """Override result to handle king explosion"""
+        if self.king_exploded or self.winner is not None:
+            if self.winner == chess.WHITE:
+                return "1-0"
+            elif self.winner == chess.BLACK:
+                return "0-1"
+        
+        # Use standard chess result if no king was exploded
+        return super().result()
@@ -0,0 +1,63 @@
+"""
+Move history of one game with checkpoints, for seeking and takebacks in bounded time.
+
+- Every move is kept, and every `interval` plies a copy of the board (without
+  its move stack) as a checkpoint, so any position is the nearest checkpoint at
+  or before it plus fewer than `interval` replayed moves.
+- board_at(ply) returns a new board for the position after `ply` plies, with
+  its explosion state; takeback(n) drops the last n plies and returns the
+  position before them.
+- The boards' own move stacks cannot serve for this: python-chess clears them
+  on every explosion (Board.remove_piece_at), and the search copies boards with
+  their stack, which therefore has to stay short.
+- Plies count from the board the history was started with. persistence.GameLog
+  offers the same for logged games, from its snapshots.
+"""
+
+DEFAULT_INTERVAL = 8
+
+
+def _push(board, move):
+    board.push(move)
+
+
+class GameHistory:
+    def __init__(self, board, interval=DEFAULT_INTERVAL, play=_push):
+        """
+        History starting at `board`. `play(board, move)` applies a move when
+        positions are rebuilt: board.push by default, which is all an
+        ExplosiveBoard needs.
+        """
+        self.interval = interval
+        self.play = play
+        self.moves = []
+        # checkpoints[i]: the position after i * interval plies
+        self.checkpoints = [board.copy(stack=False)]
+
+    def __len__(self):
+        return len(self.moves)
+
+    def append(self, move, board):
+        """Record `move`, after which the game is at `board` (copied when a checkpoint is due)."""
+        self.moves.append(move)
+        if len(self.moves) % self.interval == 0:
+            self.checkpoints.append(board.copy(stack=False))
+
+    def board_at(self, ply):
+        """A new board with the position after `ply` plies."""
+        if not 0 <= ply <= len(self.moves):
+            raise IndexError(f"ply {ply} outside the game's 0..{len(self.moves)}")
+        start = ply // self.interval
+        board = self.checkpoints[start].copy(stack=False)
+        for move in self.moves[start * self.interval:ply]:
+            self.play(board, move)
+        return board
+
+    def takeback(self, plies=1):
+        """Drop the last `plies` plies; returns a new board with the position before them."""
+        if not 0 <= plies <= len(self.moves):
+            raise IndexError(f"cannot take back {plies} of {len(self.moves)} plies")
+        ply = len(self.moves) - plies
+        del self.moves[ply:]
+        del self.checkpoints[ply // self.interval + 1:]
+        return self.board_at(ply)
@@ -0,0 +1,133 @@
+"""
+Lazy SMP: parallel iterative deepening for the minimax search.
+
+Several worker processes search the same root position independently and only
+share a lockless transposition table (engine.transposition), so a position one
+worker has finished is a cheap hit for the others. To keep them from walking the
+same tree in lockstep, every helper breaks quiet-move ordering ties with its own
+random seed and odd helpers skip the first iteration.
+
+The search ends at the deadline, when the caller cancels it, or as soon as one
+worker completes the target depth; the answer comes from the deepest iteration any worker completed, with
+worker 0 (the unperturbed ordering) winning ties.
+
+Workers are forked where the platform allows it, so a search does not pay for
+re-importing the backend; elsewhere they are spawned and import engine.search,
+which is kept free of Flask and torch for that reason.
+"""
+
+import multiprocessing
+import queue
+import random
+import signal
+import time
+
+import chess
+
+from engine.explosive_board import ExplosiveBoard
+from engine.search import search_best_move
+from engine.search_context import SearchContext
+from engine.search_stats import SearchStats
+from engine.transposition import TranspositionTable
+
+# Seconds to wait for workers to report back after they were told to stop
+STOP_GRACE = 2.0
+# Seconds between two checks of the caller's cancel flag
+CANCEL_POLL = 0.05
+
+
+def process_context():
+    """Multiprocessing context for search workers: fork where available, else spawn."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+
+
+def reset_signals():
+    """
+    First thing in a worker process: default SIGTERM handling. A forked worker
+    inherits the app's handler, which would have it stop the app's ponderer.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def _worker(worker_id, fen, depth, options, tt, deadline, stop_event, results):
+    reset_signals()
+    stats = SearchStats(f'worker-{worker_id}')
+    ctx = SearchContext(stats, tt=tt, deadline=deadline, stop_event=stop_event,
+                        rng=random.Random(worker_id) if worker_id else None, **options)
+    board = ExplosiveBoard(fen)
+    start_depth = 2 if worker_id % 2 and depth > 1 else 1
+    try:
+        score, move = search_best_move(board, depth, ctx, start_depth)
+        results.put((worker_id, ctx.completed_depth, score, move.uci() if move else None,
+                     stats.snapshot()))
+    except Exception as e:
+        results.put((worker_id, 0, None, None, stats.snapshot()))
+
+
+def parallel_search(board, depth, workers, stats, time_limit=None, options=None, tt_size=None,
+                    cancel=None):
+    """
+    Search `board` with `workers` processes, returning (score, move, depth reached).
+
+    `options` are SearchContext feature flags; the workers' counters are merged into
+    `stats`. The workers see the position as a FEN, without the game's move history.
+    `cancel` (anything with is_set(), e.g. a CancelToken) is polled every
+    CANCEL_POLL seconds and stops the workers once set.
+    """
+    mp = process_context()
+    tt = TranspositionTable(tt_size) if tt_size else TranspositionTable()
+    stop_event = mp.Event()
+    results = mp.Queue()
+    deadline = time.monotonic() + time_limit if time_limit else None
+    fen = board.fen()
+
+    processes = [mp.Process(target=_worker, daemon=True,
+                            args=(worker_id, fen, depth, options or {}, tt, deadline, stop_event, results))
+                 for worker_id in range(workers)]
+    for process in processes:
+        process.start()
+
+    reports = []
+    stopped_at = None
+    try:
+        while len(reports) < workers:
+            if stopped_at is None and (stop_event.is_set() or (cancel is not None and cancel.is_set())):
+                stop_event.set()
+                stopped_at = time.monotonic()
+            if stopped_at is not None:
+                give_up = stopped_at + STOP_GRACE
+            elif deadline is not None:
+                give_up = deadline + STOP_GRACE
+            else:
+                give_up = None
+            timeout = None if give_up is None else max(give_up - time.monotonic(), 0.0)
+            if cancel is not None and stopped_at is None:
+                # Wake up now and then to notice a cancellation
+                timeout = CANCEL_POLL if timeout is None else min(timeout, CANCEL_POLL)
+            try:
+                report = results.get(timeout=timeout)
+            except queue.Empty:
+                if give_up is not None and time.monotonic() >= give_up:
+                    break
+                continue
+            reports.append(report)
+            # One worker through the target depth is enough
+            if report[1] >= depth:
+                stop_event.set()
+    finally:
+        stop_event.set()
+        for process in processes:
+            process.join(STOP_GRACE)
+            if process.is_alive():
+                process.terminate()
+
+    best = None
+    for worker_id, completed_depth, score, move, snapshot in reports:
+        stats.merge(snapshot)
+        if move is not None and (best is None or (completed_depth, -worker_id) > (best[2], -best[3])):
+            best = (score, move, completed_depth, worker_id)
+
+    if best is None:
+        return None, None, 0
+    return best[0], chess.Move.from_uci(best[1]), best[2]
@@ -0,0 +1,132 @@
+"""
+Move ordering shared by both minimax searches.
+
+Captures are scored by a static explosion evaluation: the net material the whole
+blast destroys, read straight off the 64 precomputed blast masks with a handful of
+bitboard intersections, so it is cheap enough to run on every move of every node.
+"""
+
+import chess
+
+# Squares hit by a capture on each square: the square itself plus its 8 neighbours
+BLAST_MASKS = [chess.BB_SQUARES[sq] | chess.BB_KING_ATTACKS[sq] for sq in chess.SQUARES]
+
+# Explosions remove every piece in the blast except pawns
+BLASTABLE_TYPES = (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING)
+
+
+def explosion_value(board, move, values):
+    """
+    Net material a capture wins for the side to move, using `values` (piece type -> value).
+
+    The captured piece and every enemy non-pawn in the blast count for the mover; every
+    own non-pawn in the blast counts against it, including the capturing piece itself
+    once it has landed (a capturing pawn survives, as pawns are immune to the blast).
+    Non-captures score 0.
+    """
+    if not board.is_capture(move):
+        return 0
+
+    us = board.turn
+    them = not us
+    to_bb = chess.BB_SQUARES[move.to_square]
+    from_bb = chess.BB_SQUARES[move.from_square]
+    mask = BLAST_MASKS[move.to_square]
+
+    if board.is_en_passant(move):
+        gain = values[chess.PAWN]
+    else:
+        gain = values[board.piece_type_at(move.to_square)]
+
+    capturer = move.promotion or board.piece_type_at(move.from_square)
+    loss = 0 if capturer == chess.PAWN else values[capturer]
+
+    for piece_type in BLASTABLE_TYPES:
+        value = values[piece_type]
+        gain += chess.popcount(board.pieces_mask(piece_type, them) & mask & ~to_bb) * value
+        loss += chess.popcount(board.pieces_mask(piece_type, us) & mask & ~from_bb) * value
+
+    return gain - loss
+
+
+# Sort keys: the previous iteration's best root move, winning or even blasts,
+# killers, quiet moves by history score, and blasts that cost us material last.
+_PV_MOVE = 4000000
+_GOOD_CAPTURE = 3000000
+_KILLER = 2000000
+_HISTORY_LIMIT = 1000000
+_BAD_CAPTURE = -3000000
+
+
+class KillerMoves:
+    """Per-ply slots holding the last quiet moves that caused a beta cutoff."""
+
+    def __init__(self, slots=2):
+        self.slots = slots
+        self.table = []
+
+    def get(self, ply):
+        return self.table[ply] if ply < len(self.table) else ()
+
+    def store(self, ply, move):
+        while len(self.table) <= ply:
+            self.table.append([])
+        killers = self.table[ply]
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.slots:]
+
+
+class HistoryTable:
+    """Side-to-move [from][to] table of how often a quiet move caused a cutoff, weighted by depth."""
+
+    def __init__(self):
+        self.scores = [0] * (2 * 64 * 64)
+
+    @staticmethod
+    def _index(color, move):
+        return (int(color) << 12) | (move.from_square << 6) | move.to_square
+
+    def get(self, color, move):
+        return self.scores[self._index(color, move)]
+
+    def add(self, color, move, depth):
+        index = self._index(color, move)
+        self.scores[index] += depth * depth
+        if self.scores[index] >= _HISTORY_LIMIT:
+            # Age the whole table so scores stay below the killer band
+            self.scores = [score // 2 for score in self.scores]
+
+
+def order_moves(board, moves, values, ctx=None, ply=0, hash_move=None):
+    """
+    Sort moves best-first for the side to move.
+
+    Captures are ranked by their blast value; quiet moves by the killer and history
+    tables of `ctx` (a SearchContext) when one is given, otherwise left in place.
+    The transposition table's `hash_move` goes first, or at the root the context's
+    PV move from the previous iteration. A context with an `rng` breaks ties
+    between quiet moves randomly.
+    """
+    if ctx is None:
+        return sorted(moves, key=lambda move: explosion_value(board, move, values), reverse=True)
+
+    killers = ctx.killers.get(ply) if ctx.use_killers else ()
+    history = ctx.history if ctx.use_history else None
+    pv_move = hash_move or (ctx.pv_move if ply == 0 else None)
+    jitter = ctx.rng.random if ctx.rng is not None else None
+    color = board.turn
+
+    def key(move):
+        if move == pv_move:
+            return _PV_MOVE
+        if board.is_capture(move):
+            value = explosion_value(board, move, values)
+            return _GOOD_CAPTURE + value if value >= 0 else _BAD_CAPTURE + value
+        if move in killers:
+            return _KILLER - killers.index(move)
+        score = history.get(color, move) if history is not None else 0
+        return score + jitter() if jitter is not None else score
+
+    return sorted(moves, key=key, reverse=True)
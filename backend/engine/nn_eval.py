@@ -0,0 +1,71 @@
+"""
+Neural-network evaluation: SimpleEvalNet and its board encodings.
+
+The only module that imports torch, which costs seconds and hundreds of MB per
+process. It is imported on first use (ExplosiveChess, the 'nn' option of
+/api/analyze/batch), or at startup in processes that set AI_PRELOAD_NN=1.
+"""
+
+import chess
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+class SimpleEvalNet(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.conv1 = nn.Conv2d(12, 64, kernel_size=3, padding=1)
+        self.conv2 = nn.Conv2d(64, 128, kernel_size=3, padding=1)
+        self.conv3 = nn.Conv2d(128, 256, kernel_size=3, padding=1)
+        self.fc1 = nn.Linear(256 * 8 * 8, 512)
+        self.fc2 = nn.Linear(512, 1)
+        
+    def forward(self, x):
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        x = F.relu(self.conv3(x))
+        x = x.view(-1, 256 * 8 * 8)
+        x = F.relu(self.fc1(x))
+        return torch.tanh(self.fc2(x))  # Normalized output
+
+piece_to_index = {
+    'P': 0, 'N': 1, 'B': 2, 'R': 3, 'Q': 4, 'K': 5,
+    'p': 6, 'n': 7, 'b': 8, 'r': 9, 'q': 10, 'k': 11
+}
+
+def board_to_tensor(board):
+    tensor = torch.zeros(12, 8, 8)
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+        if piece:
+            idx = piece_to_index[piece.symbol()]
+            row, col = chess.square_rank(square), chess.square_file(square)
+            tensor[idx][7 - row][col] = 1  # Flipped for white's perspective
+    return tensor
+
+def load_eval_model(path='model_weights.pth'):
+    """SimpleEvalNet in eval mode, with pre-trained weights when they exist."""
+    model = SimpleEvalNet()
+    try:
+        model.load_state_dict(torch.load(path))
+    except:
+        print("No pre-trained model found, using random weights")
+    model.eval()
+    return model
+
+def evaluate_batch(model, planes):
+    """
+    NN scores from White's point of view for a batch of positions in one forward pass.
+    `planes` is the (N, 12, 64) array of engine.batch_eval.piece_planes.
+    """
+    # Rank 8 first, as in board_to_tensor
+    boards = planes.reshape(-1, 12, 8, 8)[:, :, ::-1, :]
+    tensor = torch.from_numpy(boards.astype('float32'))
+    with torch.no_grad():
+        return model(tensor).squeeze(1).numpy()
+
+def nn_evaluate(model, board):
+    """NN score of one position, from White's point of view."""
+    with torch.no_grad():
+        return model(board_to_tensor(board).unsqueeze(0)).item()
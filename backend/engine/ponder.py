@@ -0,0 +1,174 @@
+"""
+Pondering: searching on the opponent's time.
+
+- After the AI has moved, a worker process picks the replies the static
+  evaluation expects (PONDER_REPLIES of them) and searches the position after
+  each one, a depth at a time in turns, so every reply gets deeper together.
+- Every completed (reply, depth) is reported back straight away, keyed by the
+  FEN after the reply.
+- The opponent's move stops the worker without waiting for it. The next AI
+  search asks for the result of the position it has to play: if that reply was
+  pondered deep enough, the move is answered at once, from the deeper search.
+- A PONDER_TIME_LIMIT caps the CPU a player who never moves can cost.
+"""
+
+import queue
+import threading
+import time
+
+import chess
+
+from engine.explosive_board import ExplosiveBoard
+from engine.lazy_smp import STOP_GRACE, process_context, reset_signals
+from engine.search import explosion_aware_evaluation, search_best_move
+from engine.search_context import SearchContext
+from engine.search_stats import SearchStats, get_stats
+from engine.transposition import TranspositionTable
+
+PONDER_REPLIES = 2
+PONDER_DEPTH = 6
+PONDER_TIME_LIMIT = 60.0
+
+# Counters of the pondering searches, merged from the workers
+PONDER_STATS = get_stats('ponder')
+
+
+def predicted_replies(board, count):
+    """FENs after the `count` valid replies the static evaluation rates best for the side to move."""
+    scored = []
+    for move in board.valid_moves():
+        child = ExplosiveBoard(board.fen())
+        child.push(move)
+        if child.status()['is_game_over']:
+            continue
+        score = explosion_aware_evaluation(child)
+        scored.append((score if board.turn == chess.WHITE else -score, child.fen()))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [fen for score, fen in scored[:count]]
+
+
+def _ponder_worker(fen, replies, depth, options, deadline, stop_event, results):
+    reset_signals()
+    start = time.perf_counter()
+    stats = SearchStats('ponder')
+    tt = TranspositionTable()
+    searches = []
+    for reply_fen in predicted_replies(ExplosiveBoard(fen), replies):
+        ctx = SearchContext(stats, tt=tt, deadline=deadline, stop_event=stop_event, **options)
+        searches.append((reply_fen, ExplosiveBoard(reply_fen), ctx))
+
+    found = {}
+    try:
+        for current_depth in range(1, depth + 1):
+            for reply_fen, board, ctx in searches:
+                if ctx.should_stop():
+                    return
+                score, move = search_best_move(board, current_depth, ctx, current_depth,
+                                               found.get(reply_fen))
+                if ctx.completed_depth == current_depth and move is not None:
+                    found[reply_fen] = (score, move)
+                    results.put(('result', reply_fen, current_depth, score, move.uci()))
+    finally:
+        deepest = max((ctx.completed_depth for reply_fen, board, ctx in searches), default=0)
+        results.put(('stats', stats.snapshot(), deepest, time.perf_counter() - start))
+
+
+class Ponderer:
+    """Runs one pondering worker at a time for the server's game."""
+
+    def __init__(self, replies=PONDER_REPLIES, depth=PONDER_DEPTH, time_limit=PONDER_TIME_LIMIT):
+        self.replies = replies
+        self.depth = depth
+        self.time_limit = time_limit
+        self.lock = threading.Lock()
+        self.process = None
+        self.stop_event = None
+        self.results = None
+        self.found = {}  # FEN after a reply -> (depth, score, move uci)
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, board, options=None):
+        """Ponder the replies to the position on `board`, replacing any earlier pondering."""
+        with self.lock:
+            self._join()
+            self.found = {}
+        mp = process_context()
+        stop_event = mp.Event()
+        results = mp.Queue()
+        process = mp.Process(target=_ponder_worker, daemon=True,
+                             args=(board.fen(), self.replies, self.depth, options or {},
+                                   time.monotonic() + self.time_limit, stop_event, results))
+        # Fork outside the lock: the worker would start with it held
+        process.start()
+        with self.lock:
+            # A concurrent start() may have got in first
+            self._join()
+            self.found = {}
+            self.process, self.stop_event, self.results = process, stop_event, results
+
+    def stop(self):
+        """Tell the worker to stop, without waiting for it (the opponent has moved)."""
+        with self.lock:
+            if self.stop_event is not None:
+                self.stop_event.set()
+
+    def interrupt(self):
+        """
+        stop() for a signal handler: sets the worker's stop flag without taking
+        the lock, which the interrupted thread may hold. The worker is reaped by
+        the next start() or result_for().
+        """
+        stop_event = self.stop_event
+        if stop_event is not None:
+            stop_event.set()
+
+    def result_for(self, board):
+        """
+        Stop pondering and return (score, move, depth completed) pondered for the
+        position on `board`, or None.
+        """
+        with self.lock:
+            pondered = self.process is not None or self.found
+            self._join()
+            found = self.found.get(board.fen())
+            self.found = {}
+        if found is not None:
+            self.hits += 1
+            return found[1], chess.Move.from_uci(found[2]), found[0]
+        if pondered:
+            self.misses += 1
+        return None
+
+    def _drain(self):
+        while True:
+            try:
+                item = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if item[0] == 'stats':
+                kind, snapshot, deepest, seconds = item
+                PONDER_STATS.merge(snapshot)
+                PONDER_STATS.record_search(deepest, snapshot['nodes'], seconds)
+            else:
+                kind, fen, depth, score, move = item
+                self.found[fen] = (depth, score, move)
+
+    def _join(self):
+        """Stop the worker and collect what it reported."""
+        if self.process is None:
+            return
+        self.stop_event.set()
+        grace = time.monotonic() + STOP_GRACE
+        while self.process.is_alive() and time.monotonic() < grace:
+            self._drain()
+            self.process.join(0.01)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(STOP_GRACE)
+        if self.process.is_alive():
+            self.process.kill()
+        # Reap it: a child left unjoined would hold up the interpreter's exit
+        self.process.join()
+        self._drain()
+        self.process = None
@@ -0,0 +1,52 @@
+"""
+Selective-search helpers shared by both minimax searches.
+
+- Null-move pruning: let the side to move pass; if a reduced search still fails
+  high the node is pruned. In explosive chess passing is unsound more often than
+  in normal chess, so it is switched off when the mover is in check, when its king
+  is next to an enemy piece (a single capture can blow it up), in king-and-pawn
+  endings where zugzwang is common, and right after another null move.
+- Late-move reductions: quiet moves ordered late are searched one ply shallower
+  first, and only at full depth when that reduced search beats the bound.
+"""
+
+import chess
+
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = NULL_MOVE_REDUCTION + 1
+
+LMR_MIN_DEPTH = 3
+LMR_FULL_DEPTH_MOVES = 3
+LMR_REDUCTION = 1
+
+
+def null_move_allowed(board, depth, ply):
+    """Whether a null move may be tried at this node."""
+    if ply == 0 or depth < NULL_MOVE_MIN_DEPTH:
+        return False
+    if board.move_stack and not board.move_stack[-1]:
+        # Two passes in a row would just search the same position shallower
+        return False
+    if board.is_check():
+        return False
+
+    us = board.turn
+    king = board.king(us)
+    if king is None:
+        return False
+    if chess.BB_KING_ATTACKS[king] & board.occupied_co[not us]:
+        return False
+
+    non_pawn_material = board.occupied_co[us] & ~board.pawns & ~board.kings
+    return bool(non_pawn_material)
+
+
+def lmr_reduction(board, move, depth, move_index, in_check, killers):
+    """Plies to reduce a move by: only quiet, non-checking moves late in the order."""
+    if depth < LMR_MIN_DEPTH or move_index < LMR_FULL_DEPTH_MOVES or in_check:
+        return 0
+    if move.promotion or move in killers or board.is_capture(move):
+        return 0
+    if board.gives_check(move):
+        return 0
+    return LMR_REDUCTION
@@ -0,0 +1,370 @@
+"""
+Minimax search with explosion-aware evaluation for ExplosiveBoard.
+
+- explosion_aware_evaluation: static evaluation, White-relative centipawns.
+- minimax / search_child: alpha-beta with the features selected on the
+  SearchContext (move ordering, PVS, null move, LMR).
+- search_best_move: iterative-deepening driver with aspiration windows; stops at
+  the deadline of its SearchContext and returns the deepest completed iteration.
+- Positions are cached in the context's transposition table when it has one.
+
+Kept free of Flask so worker processes can import it cheaply.
+"""
+
+import copy
+import time
+
+import chess
+
+from engine.eval_cache import EVAL_CACHE, eval_key
+from engine.explosive_board import ExplosiveBoard
+from engine.move_ordering import order_moves
+from engine.pruning import NULL_MOVE_REDUCTION, lmr_reduction, null_move_allowed
+from engine.search_context import SearchAborted, SearchContext
+from engine.search_stats import get_stats
+from engine.transposition import EXACT, LOWER, UPPER, position_key
+
+# Search and rules counters for the minimax AI
+SEARCH_STATS = get_stats('minimax')
+
+ASPIRATION_WINDOW = 300  # centipawns either side of the previous iteration's score
+MATE_SCORE = 9999
+
+# Base material values, shared by the evaluation and the capture ordering
+MATERIAL_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 320,
+    chess.BISHOP: 330,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 20000
+}
+
+def explosion_aware_evaluation(board: ExplosiveBoard):
+    """
+    Evaluate board considering explosive mechanic:
+    - Material value weighted normally.
+    - Additional penalty if king is near danger (close to explosion squares).
+    - Penalize board instability (difference in count of pieces that may explode).
+
+    Scores are from White's point of view, matching minimax where White maximizes.
+    Results are kept in the process' evaluation cache (engine.eval_cache).
+    """
+    key = eval_key(board, 'static')
+    score = EVAL_CACHE.probe(key)
+    if score is None:
+        score = _evaluate(board)
+        EVAL_CACHE.store(key, score)
+    return score
+
+
+def _evaluate(board: ExplosiveBoard):
+    if board.is_checkmate():
+        # If current side to move is checkmated big negative
+        if board.turn:
+            return -9999
+        else:
+            return 9999
+    if board.is_stalemate() or board.is_insufficient_material():
+        return 0
+        
+    # Check for king explosion or missing kings
+    white_king_exists = False
+    black_king_exists = False
+    
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+        if piece and piece.piece_type == chess.KING:
+            if piece.color == chess.WHITE:
+                white_king_exists = True
+            else:
+                black_king_exists = True
+    
+    # If a king is missing, return appropriate score
+    if not white_king_exists:
+        return -9999  # White loses
+    if not black_king_exists:
+        return 9999   # Black loses
+
+    # Count material for each side
+    white_score = 0
+    black_score = 0
+
+    for sq in chess.SQUARES:
+        piece = board.piece_at(sq)
+        if piece is not None:
+            value = MATERIAL_VALUES.get(piece.piece_type, 0)
+            if piece.color == chess.WHITE:
+                white_score += value
+            else:
+                black_score += value
+
+    # Explosion consideration: penalize if kings near explosion zones
+    # We approximate explosion zones by presence of opponent pieces near king squares
+    white_king_sq = board.king(chess.WHITE)
+    black_king_sq = board.king(chess.BLACK)
+
+    # Distance penalty from opponent pieces (pieces close to king are dangerous due to explosion)
+    def danger_penalty(king_sq, color):
+        if king_sq is None:
+            return 0
+            
+        penalty = 0
+        kr = chess.square_rank(king_sq)
+        kf = chess.square_file(king_sq)
+        for sq in chess.SQUARES:
+            piece = board.piece_at(sq)
+            if piece is not None and piece.color != color:
+                sr = chess.square_rank(sq)
+                sf = chess.square_file(sq)
+                dist = max(abs(sr - kr), abs(sf - kf))  # Chebyshev distance
+                if dist <= 1:
+                    penalty += 150  # Higher penalty for proximity
+                elif dist == 2:
+                    penalty += 60
+        return penalty
+
+    if white_king_sq:
+        white_score -= danger_penalty(white_king_sq, chess.WHITE)
+    if black_king_sq:
+        black_score -= danger_penalty(black_king_sq, chess.BLACK)
+
+    # Return evaluation from White's perspective
+    return white_score - black_score
+
+
+def minimax(board: ExplosiveBoard, depth, alpha, beta, maximizing, ply=0, ctx=None):
+    """
+    Improved minimax with better error handling for explosions.
+
+    `ply` is the distance from the root and `ctx` the SearchContext shared by the
+    whole search (killer and history tables); a fresh one is used when omitted.
+    """
+    if ctx is None:
+        ctx = SearchContext(SEARCH_STATS)
+    stats = ctx.stats
+    try:
+        stats.nodes += 1
+        ctx.check_abort()
+        if depth == 0 or board.is_game_over():
+            start = time.perf_counter()
+            score = explosion_aware_evaluation(board)
+            stats.eval_time += time.perf_counter() - start
+            return score, None
+
+        best_move = None
+
+        # Transposition table: reuse a deep enough result for this position, or at
+        # least search its best move first. The root always searches, to return a move.
+        key, hash_move = None, None
+        alpha_orig, beta_orig = alpha, beta
+        if ctx.tt is not None:
+            key = position_key(board)
+            stats.tt_probes += 1
+            entry = ctx.tt.probe(key)
+            if entry is not None:
+                stats.tt_hits += 1
+                tt_depth, flag, tt_score, hash_move = entry
+                if ply > 0 and tt_depth >= depth and (
+                        flag == EXACT or (flag == LOWER and tt_score >= beta)
+                        or (flag == UPPER and tt_score <= alpha)):
+                    stats.tt_cutoffs += 1
+                    return tt_score, hash_move
+
+        # Get legal moves and filter out moves that would cause own king to explode
+        start = time.perf_counter()
+        legal_moves = board.valid_moves()
+        # Search the most destructive blasts first, then killers and history-ranked quiet moves
+        legal_moves = order_moves(board, legal_moves, MATERIAL_VALUES, ctx, ply, hash_move)
+        stats.movegen_time += time.perf_counter() - start
+        
+        # If no legal moves, return appropriate score
+        if not legal_moves:
+            return -9999 if maximizing else 9999, None
+
+        # Null-move pruning: if passing still fails high (low for the minimizer) at
+        # reduced depth, a real move will too
+        if ctx.null_move and null_move_allowed(board, depth, ply):
+            bound = beta if maximizing else alpha
+            if bound not in (float('inf'), -float('inf')):
+                ctx.stats.null_move_tries += 1
+                b_null = copy.deepcopy(board)
+                b_null.push(chess.Move.null())
+                reduced = depth - 1 - NULL_MOVE_REDUCTION
+                if maximizing:
+                    null_score, _ = minimax(b_null, reduced, beta - 1, beta, False, ply + 1, ctx)
+                    if null_score >= beta:
+                        ctx.stats.null_move_cutoffs += 1
+                        return null_score, None
+                else:
+                    null_score, _ = minimax(b_null, reduced, alpha, alpha + 1, True, ply + 1, ctx)
+                    if null_score <= alpha:
+                        ctx.stats.null_move_cutoffs += 1
+                        return null_score, None
+
+        in_check = board.is_check()
+        killers = ctx.killers.get(ply)
+
+        if maximizing:
+            max_eval = -float('inf')
+            for index, move in enumerate(legal_moves):
+                try:
+                    reduction = lmr_reduction(board, move, depth, index, in_check, killers) if ctx.lmr else 0
+                    b_copy = copy.deepcopy(board)
+                    b_copy.push(move)
+                    eval_score = search_child(b_copy, depth-1, alpha, beta, False, ply + 1, ctx,
+                                              index == 0, reduction)
+                    if eval_score > max_eval:
+                        max_eval = eval_score
+                        best_move = move
+                    alpha = max(alpha, eval_score)
+                    if beta <= alpha:
+                        ctx.record_cutoff(board.turn, move, board.is_capture(move), depth, ply, index)
+                        break
+                except SearchAborted:
+                    raise
+                except Exception as e:
+                    # Skip moves that cause errors
+                    continue
+            
+            # If all moves caused errors, return a default
+            if best_move is None and legal_moves:
+                best_move = legal_moves[0]
+                max_eval = 0
+            elif key is not None:
+                _tt_store(ctx.tt, key, depth, max_eval, best_move, alpha_orig, beta_orig)
+                
+            return max_eval, best_move
+        else:
+            min_eval = float('inf')
+            for index, move in enumerate(legal_moves):
+                try:
+                    reduction = lmr_reduction(board, move, depth, index, in_check, killers) if ctx.lmr else 0
+                    b_copy = copy.deepcopy(board)
+                    b_copy.push(move)
+                    eval_score = search_child(b_copy, depth-1, alpha, beta, True, ply + 1, ctx,
+                                              index == 0, reduction)
+                    if eval_score < min_eval:
+                        min_eval = eval_score
+                        best_move = move
+                    beta = min(beta, eval_score)
+                    if beta <= alpha:
+                        ctx.record_cutoff(board.turn, move, board.is_capture(move), depth, ply, index)
+                        break
+                except SearchAborted:
+                    raise
+                except Exception as e:
+                    # Skip moves that cause errors
+                    continue
+            
+            # If all moves caused errors, return a default
+            if best_move is None and legal_moves:
+                best_move = legal_moves[0]
+                min_eval = 0
+            elif key is not None:
+                _tt_store(ctx.tt, key, depth, min_eval, best_move, alpha_orig, beta_orig)
+                
+            return min_eval, best_move
+    except SearchAborted:
+        raise
+    except Exception as e:
+        # Fallback for any unexpected errors
+        legal_moves = list(board.legal_moves)
+        if legal_moves:
+            return 0, legal_moves[0]
+        return 0, None
+
+
+def _tt_store(tt, key, depth, score, move, alpha, beta):
+    """Store a node's result with the bound type implied by its original window."""
+    if score in (float('inf'), -float('inf')):
+        return
+    if score <= alpha:
+        flag = UPPER
+    elif score >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    tt.store(key, depth, flag, score, move)
+
+
+def search_child(board: ExplosiveBoard, depth, alpha, beta, maximizing, ply, ctx, first, reduction=0):
+    """
+    Score one child position for minimax.
+
+    A late move with a `reduction` is first searched that many plies shallower and
+    kept unless it improves the parent's bound. With PVS enabled, every move after
+    the first is probed with a null window around the bound the parent is trying to
+    improve, and only re-searched with the full (alpha, beta) window when the probe
+    says it can improve it.
+    """
+    if reduction:
+        ctx.stats.lmr_reductions += 1
+        score, _ = minimax(board, depth - reduction, alpha, beta, maximizing, ply, ctx)
+        # The parent maximizes when this child minimizes
+        improves = score < beta if maximizing else score > alpha
+        if not improves:
+            return score
+        ctx.stats.lmr_researches += 1
+
+    bound = beta if maximizing else alpha
+    if first or not ctx.pvs or bound in (float('inf'), -float('inf')):
+        return minimax(board, depth, alpha, beta, maximizing, ply, ctx)[0]
+
+    ctx.stats.pvs_searches += 1
+    if maximizing:
+        # Minimizing parent: can this move get below beta?
+        score, _ = minimax(board, depth, beta - 1, beta, True, ply, ctx)
+    else:
+        # Maximizing parent: can this move get above alpha?
+        score, _ = minimax(board, depth, alpha, alpha + 1, False, ply, ctx)
+    if alpha < score < beta:
+        ctx.stats.pvs_researches += 1
+        score, _ = minimax(board, depth, alpha, beta, maximizing, ply, ctx)
+    return score
+
+
+def search_best_move(board: ExplosiveBoard, depth, ctx=None, start_depth=1, previous=None):
+    """
+    Iterative deepening driver around minimax, returning (score, move).
+
+    Each iteration after the first starts from an aspiration window around the
+    previous score and falls back to the full window when the result lands outside
+    it. The previous best move is searched first in the next iteration.
+
+    Once an iteration has produced a move, the context's deadline or stop event may
+    cut the search short; the result of the deepest completed iteration is returned
+    and its depth left in ctx.completed_depth.
+
+    `previous` is the (score, move) of an earlier search of the same position that
+    completed depth start_depth - 1. It seeds the move ordering and is returned if
+    no iteration completes, so the first iteration may be cut short as well.
+    """
+    if ctx is None:
+        ctx = SearchContext(SEARCH_STATS)
+    maximizing = board.turn  # White maximizes
+    score, best_move = previous or (None, None)
+    ctx.pv_move = best_move
+    ctx.abortable = best_move is not None
+    ctx.completed_depth = start_depth - 1 if best_move is not None else 0
+    for current_depth in range(start_depth, depth + 1):
+        if ctx.abortable and ctx.should_stop():
+            break
+        try:
+            if ctx.aspiration and score is not None and abs(score) < MATE_SCORE:
+                ctx.stats.aspiration_searches += 1
+                alpha, beta = score - ASPIRATION_WINDOW, score + ASPIRATION_WINDOW
+                result = minimax(board, current_depth, alpha, beta, maximizing, 0, ctx)
+                if not alpha < result[0] < beta:
+                    ctx.stats.aspiration_researches += 1
+                    result = minimax(board, current_depth, -float('inf'), float('inf'), maximizing, 0, ctx)
+            else:
+                result = minimax(board, current_depth, -float('inf'), float('inf'), maximizing, 0, ctx)
+        except SearchAborted:
+            ctx.stats.aborted_searches += 1
+            break
+        score, best_move = result
+        ctx.pv_move = best_move
+        ctx.completed_depth = current_depth
+        ctx.abortable = best_move is not None
+    return score, best_move
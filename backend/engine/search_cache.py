@@ -0,0 +1,177 @@
+"""
+Persistent search result cache: position -> (depth, score, best move) in SQLite.
+
+- Keyed by the position's Zobrist key (engine.transposition.position_key), so a
+  position reached in any game, by any move order, is found again.
+- One file per host (AI_SEARCH_CACHE, '' turns the cache off), opened by every
+  process that searches: the Flask server and the batch analysis workers. WAL
+  mode lets them read while one of them writes.
+- Lookups read synchronously; stores and LRU touches are queued to a writer
+  thread that commits them in batches. A deeper result replaces a shallower one,
+  never the other way round.
+- Scores are the search's integer evaluations, stored as INTEGER.
+- Size-bounded: every TRIM_INTERVAL stores, the least recently used entries
+  past AI_SEARCH_CACHE_SIZE are deleted.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import chess
+
+from engine.transposition import position_key
+
+SEARCH_CACHE_PATH = os.environ.get(
+    'AI_SEARCH_CACHE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'search_cache.sqlite3'))
+SEARCH_CACHE_SIZE = int(os.environ.get('AI_SEARCH_CACHE_SIZE', '100000'))
+# Stores between two checks of the size bound
+TRIM_INTERVAL = 500
+MAX_BATCH = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key INTEGER PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    score INTEGER,
+    move TEXT NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+STORE_SQL = """
+INSERT INTO results (key, depth, score, move, used) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET depth = excluded.depth, score = excluded.score,
+    move = excluded.move, used = excluded.used
+WHERE excluded.depth >= results.depth
+"""
+
+
+def _signed(key):
+    """Zobrist keys are unsigned 64-bit; SQLite integers are signed."""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class SearchCache:
+    def __init__(self, path=SEARCH_CACHE_PATH, max_entries=SEARCH_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.queue = queue.Queue()
+        self.local = threading.local()
+        conn = _connect(path)
+        with conn:
+            conn.executescript(SCHEMA)
+        conn.close()
+        self.writer = threading.Thread(target=self._write_loop, name='search-cache-writer', daemon=True)
+        self.writer.start()
+
+    def _reader(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = _connect(self.path)
+        return conn
+
+    def lookup(self, board):
+        """(score, move, depth) stored for the position on `board`, or None."""
+        key = _signed(position_key(board))
+        try:
+            row = self._reader().execute('SELECT depth, score, move FROM results WHERE key = ?',
+                                         (key,)).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is not None:
+            depth, score, uci = row
+            # Files created with a REAL score column hand back 12.0 for 12
+            score = int(score) if score is not None else None
+            move = chess.Move.from_uci(uci)
+            # A key collision would bring a move from another position
+            if move in board.legal_moves and board.is_valid_move(move):
+                self.hits += 1
+                self.queue.put(('UPDATE results SET used = ? WHERE key = ?', (time.time(), key)))
+                return score, move, depth
+        self.misses += 1
+        return None
+
+    def store(self, board, depth, score, move):
+        if move is None or depth <= 0:
+            return
+        self.queue.put((STORE_SQL, (_signed(position_key(board)), depth, score, move.uci(), time.time())))
+        self.stores += 1
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _write_loop(self):
+        conn = _connect(self.path)
+        since_trim = 0
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            statements = [op for op in batch if isinstance(op, tuple)]
+            try:
+                if statements:
+                    with conn:
+                        for sql, params in statements:
+                            conn.execute(sql, params)
+                    since_trim += len(statements)
+                if since_trim >= TRIM_INTERVAL:
+                    since_trim = 0
+                    self._trim(conn)
+            except sqlite3.Error as e:
+                print(f"Search cache write failed: {e}")
+            for op in batch:
+                if isinstance(op, threading.Event):
+                    op.set()
+
+    def _trim(self, conn):
+        """Delete the least recently used entries past max_entries."""
+        excess = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.max_entries
+        if excess > 0:
+            with conn:
+                conn.execute('DELETE FROM results WHERE key IN '
+                             '(SELECT key FROM results ORDER BY used LIMIT ?)', (excess,))
+            self.evictions += excess
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """This process' SearchCache (None when disabled); a forked worker opens its own."""
+    global _cache, _cache_pid
+    if not SEARCH_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache_pid != os.getpid():
+            _cache = SearchCache()
+            _cache_pid = os.getpid()
+        return _cache
@@ -0,0 +1,131 @@
+"""
+Per-search state threaded through the minimax searches.
+
+One SearchContext is created for every root search and passed down the tree, so
+the ordering tables learned in one branch are reused by its siblings and by the
+following iterations of an iterative-deepening search.
+
+Feature flags:
+- use_killers / use_history: quiet-move ordering heuristics.
+- pvs: principal variation search; every move after the first is probed with a
+  null window and only re-searched with the full window when it fails high.
+- aspiration: iterations after the first start from a narrow window around the
+  previous iteration's score.
+  Both default to DEFAULT_PVS / DEFAULT_ASPIRATION (off) for every search: the
+  app, the AI move API, batch analysis, pondering and the tools.
+- null_move / lmr: selective pruning, see engine.pruning.
+With all four off the search is plain full-width alpha-beta.
+
+Shared state and limits:
+- tt: an engine.transposition.TranspositionTable, possibly shared with other
+  processes searching the same root (see engine.lazy_smp).
+- deadline (time.monotonic() value), node_limit (nodes this context may still
+  visit) and stop_event (a threading or multiprocessing Event, or a CancelToken):
+  checked every few dozen nodes once the first iteration is complete; raise
+  SearchAborted to unwind the search, which then returns the result of its
+  deepest completed iteration.
+- rng: random.Random used to break ordering ties differently per worker.
+"""
+
+import threading
+import time
+
+from engine.move_ordering import HistoryTable, KillerMoves
+from engine.search_stats import SearchStats
+
+
+# Nodes between two deadline / stop checks
+ABORT_CHECK_INTERVAL = 64
+
+# At the depths the server searches (3-4 plies), PVS re-searches cost more nodes
+# than its null windows save (tools/search_bench.py --mode windows), so searches
+# run plain alpha-beta unless asked otherwise
+DEFAULT_PVS = False
+DEFAULT_ASPIRATION = False
+
+
+# Set when the server shuts down; the app's searches stop at their next check
+SHUTDOWN = threading.Event()
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when its deadline passes or it is told to stop."""
+
+
+class CancelToken:
+    """
+    Cancel flag of one search, usable as a SearchContext stop_event: set by set(),
+    by its parent (another token or Event, e.g. SHUTDOWN) being set, or by
+    `condition`, a cheap callable polled with the flag, returning true.
+    """
+
+    def __init__(self, parent=None, condition=None):
+        self.parent = parent
+        self.condition = condition
+        self.cancelled = False
+
+    def set(self):
+        self.cancelled = True
+
+    def is_set(self):
+        if not self.cancelled:
+            self.cancelled = ((self.parent is not None and self.parent.is_set())
+                              or (self.condition is not None and bool(self.condition())))
+        return self.cancelled
+
+
+class SearchContext:
+    def __init__(self, stats=None, use_killers=True, use_history=True, pvs=DEFAULT_PVS,
+                 aspiration=DEFAULT_ASPIRATION, null_move=False, lmr=False, tt=None, deadline=None,
+                 stop_event=None, rng=None, node_limit=None):
+        # Searches started without registered stats still count, just not in /api/metrics
+        self.stats = stats if stats is not None else SearchStats('unregistered')
+        self.use_killers = use_killers
+        self.use_history = use_history
+        self.pvs = pvs
+        self.aspiration = aspiration
+        self.null_move = null_move
+        self.lmr = lmr
+        self.killers = KillerMoves()
+        self.history = HistoryTable()
+        # Best root move of the previous iteration, searched first in the next one
+        self.pv_move = None
+        self.tt = tt
+        self.deadline = deadline
+        self.stop_event = stop_event
+        self.rng = rng
+        # Stats may be shared with other searches, so the budget is an absolute count
+        self.node_stop = self.stats.nodes + node_limit if node_limit is not None else None
+        # Set by the iterative-deepening driver once it has a move to fall back on
+        self.abortable = False
+        self.completed_depth = 0
+        self._nodes_to_check = ABORT_CHECK_INTERVAL
+
+    def check_abort(self):
+        """Called once per node; raises SearchAborted when the search has to stop."""
+        self._nodes_to_check -= 1
+        if self._nodes_to_check > 0 or not self.abortable:
+            return
+        self._nodes_to_check = ABORT_CHECK_INTERVAL
+        if self.should_stop():
+            raise SearchAborted()
+
+    def should_stop(self):
+        """Whether the time or node budget is spent or another worker asked this search to stop."""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        if self.node_stop is not None and self.stats.nodes >= self.node_stop:
+            return True
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def record_cutoff(self, color, move, is_capture, depth, ply, move_index):
+        """Update cutoff statistics and, for quiet moves, the killer and history tables."""
+        self.stats.cutoffs += 1
+        if move_index == 0:
+            self.stats.first_move_cutoffs += 1
+        if is_capture:
+            return
+        if self.use_killers:
+            self.killers.store(ply, move)
+        if self.use_history:
+            self.history.add(color, move, depth)
@@ -0,0 +1,88 @@
+"""
+Counters collected inside the search and the explosion rules.
+
+Every engine gets one shared SearchStats object (see get_stats). The hot paths
+only do plain attribute increments and a couple of perf_counter() calls around
+evaluation and move generation, so keeping them always on costs next to nothing.
+The numbers are exported by /api/metrics in the backend.
+"""
+
+import threading
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class SearchStats:
+    __slots__ = ('engine', 'searches', 'nodes', 'cutoffs', 'first_move_cutoffs', 'explosions',
+                 'pvs_searches', 'pvs_researches', 'aspiration_searches', 'aspiration_researches',
+                 'null_move_tries', 'null_move_cutoffs', 'lmr_reductions', 'lmr_researches',
+                 'tt_probes', 'tt_hits', 'tt_cutoffs', 'aborted_searches',
+                 'eval_time', 'movegen_time', 'search_time',
+                 'last_depth', 'max_depth', 'last_nps')
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.reset()
+
+    def reset(self):
+        self.searches = 0
+        self.nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.explosions = 0
+        self.pvs_searches = 0
+        self.pvs_researches = 0
+        self.aspiration_searches = 0
+        self.aspiration_researches = 0
+        self.null_move_tries = 0
+        self.null_move_cutoffs = 0
+        self.lmr_reductions = 0
+        self.lmr_researches = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.aborted_searches = 0
+        self.eval_time = 0.0
+        self.movegen_time = 0.0
+        self.search_time = 0.0
+        self.last_depth = 0
+        self.max_depth = 0
+        self.last_nps = 0.0
+
+    def record_search(self, depth, nodes, seconds):
+        """Called once per root search with the depth reached and the nodes it visited."""
+        self.searches += 1
+        self.search_time += seconds
+        self.last_depth = depth
+        self.max_depth = max(self.max_depth, depth)
+        self.last_nps = nodes / seconds if seconds > 0 else 0.0
+
+    def merge(self, snapshot):
+        """Add the counters of another search's snapshot, e.g. from a worker process."""
+        for name in _COUNTERS:
+            setattr(self, name, getattr(self, name) + snapshot.get(name, 0))
+
+    def nodes_per_second(self):
+        return self.nodes / self.search_time if self.search_time > 0 else 0.0
+
+    def snapshot(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# Fields merged from worker processes: everything but the engine name, the search
+# count and wall time (recorded once by the caller) and the per-search gauges
+_COUNTERS = SearchStats.__slots__[2:-4]
+
+
+def get_stats(engine):
+    """Return the process-wide stats object for an engine, creating it on first use."""
+    stats = _registry.get(engine)
+    if stats is None:
+        with _registry_lock:
+            stats = _registry.setdefault(engine, SearchStats(engine))
+    return stats
+
+
+def all_stats():
+    return list(_registry.values())
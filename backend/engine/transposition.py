@@ -0,0 +1,79 @@
+"""
+Transposition table shared between search processes.
+
+Entries live in a flat multiprocessing.RawArray of 64-bit words, two per slot, so
+the table can be handed to forked or spawned workers and written by all of them
+without locks:
+- slot word 0 holds key ^ data, slot word 1 holds data.
+- a probe only accepts an entry when word 0 ^ word 1 gives back its key, so a
+  slot torn by two processes writing at once just reads as a miss.
+
+data packs the score (32 bits, offset binary), the depth (8 bits), the bound flag
+(2 bits) and the best move (16 bits).
+"""
+
+import multiprocessing
+
+import chess
+import chess.polyglot
+
+EXACT = 1
+LOWER = 2  # score is a lower bound (the search failed high)
+UPPER = 3  # score is an upper bound (the search failed low)
+
+DEFAULT_SIZE = 1 << 16  # slots; 16 bytes each
+
+_SCORE_OFFSET = 1 << 31
+_MASK_32 = (1 << 32) - 1
+_MASK_64 = (1 << 64) - 1
+
+
+def position_key(board):
+    """64-bit Zobrist key of a position."""
+    return chess.polyglot.zobrist_hash(board)
+
+
+def _pack_move(move):
+    if move is None:
+        return 0
+    return (1 << 15) | ((move.promotion or 0) << 12) | (move.from_square << 6) | move.to_square
+
+
+def _unpack_move(bits):
+    if not bits & (1 << 15):
+        return None
+    promotion = (bits >> 12) & 7
+    return chess.Move((bits >> 6) & 63, bits & 63, promotion or None)
+
+
+class TranspositionTable:
+    def __init__(self, size=DEFAULT_SIZE):
+        if size & (size - 1):
+            raise ValueError("size must be a power of two")
+        self.size = size
+        self.mask = size - 1
+        self.words = multiprocessing.RawArray('Q', 2 * size)
+
+    def probe(self, key):
+        """Return (depth, flag, score, move) stored for `key`, or None."""
+        index = 2 * (key & self.mask)
+        data = self.words[index + 1]
+        if self.words[index] ^ data != key:
+            return None
+        score = ((data >> 26) & _MASK_32) - _SCORE_OFFSET
+        return (data >> 16) & 0xff, (data >> 24) & 3, score, _unpack_move(data & 0xffff)
+
+    def store(self, key, depth, flag, score, move):
+        """Store a search result, keeping deeper entries of the same position."""
+        index = 2 * (key & self.mask)
+        old_data = self.words[index + 1]
+        if self.words[index] ^ old_data == key and (old_data >> 16) & 0xff > depth:
+            return
+        data = ((((int(score) + _SCORE_OFFSET) & _MASK_32) << 26) | ((flag & 3) << 24)
+                | ((min(depth, 0xff)) << 16) | _pack_move(move))
+        self.words[index] = (key ^ data) & _MASK_64
+        self.words[index + 1] = data
+
+    def clear(self):
+        for index in range(2 * self.size):
+            self.words[index] = 0
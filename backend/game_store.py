@@ -0,0 +1,321 @@
+"""
+Current-game storage shared by the worker processes of the Flask app.
+
+- One store holds the game being played: its position (FEN) and explosion
+  state, under a version number that every write increments.
+- Optimistic versioning: a handler loads (board, version), computes the move on
+  a copy and saves it with the version it loaded. If another request (in this
+  or any other worker) saved in between, save() raises VersionConflict and
+  nothing is written; the app answers 409 Conflict.
+- load() returns a board of the caller's own: a copy of the store's snapshot,
+  which no request touches, so threads never see each other's work on a board
+  (status() and the move tests cache, and the repetition test pops and
+  re-pushes). Snapshots have their status computed, and copies keep it, so a
+  version's status is computed once. Stores keep the last snapshot and only
+  rebuild it when the version has changed, so the common case (polls,
+  validation) costs one version read and a copy.
+- Implementations, picked with GAME_STORE:
+  - memory: the board object itself, in this process only. One worker.
+  - sqlite: one row in a SQLite file (GAME_STORE_PATH), WAL mode. Any number of
+    processes, on one host or a shared filesystem; survives restarts.
+  - shm: a POSIX shared memory block (GAME_STORE_NAME) with a file lock for
+    writers. Processes on one host; the fastest of the shared stores.
+- Shared stores keep the position, not the move history: a board loaded from
+  them starts with an empty move stack (persistence.py keeps the moves).
+"""
+
+import fcntl
+import json
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+from engine.explosive_board import ExplosiveBoard
+
+GAME_STORE = os.environ.get('GAME_STORE', 'memory')
+GAME_STORE_PATH = os.environ.get(
+    'GAME_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'game_state.sqlite3'))
+GAME_STORE_NAME = os.environ.get('GAME_STORE_NAME', 'explosive_chess_game')
+# Bytes of the shared memory block; a game state takes a few hundred
+SHM_SIZE = 1 << 16
+
+
+class VersionConflict(Exception):
+    def __init__(self, expected, current):
+        super().__init__(f"game is at version {current}, not {expected}")
+        self.expected = expected
+        self.current = current
+
+
+def encode_state(board):
+    return json.dumps({
+        'fen': board.fen(),
+        'game_id': board.game_id,
+        'etag_base': board._etag_base,
+        'exploded': board.exploded_squares,
+        'king_exploded': board.king_exploded,
+        'winner': board.winner,
+    })
+
+
+def decode_state(text):
+    state = json.loads(text)
+    board = ExplosiveBoard(state['fen'])
+    board.game_id = state['game_id']
+    board._etag_base = state['etag_base']
+    board.exploded_squares = state['exploded']
+    board.king_exploded = state['king_exploded']
+    board.winner = state['winner']
+    board.status()
+    return board
+
+
+def snapshot(board):
+    """The store's own copy of a saved board, with its status computed."""
+    board = board.copy()
+    board.status()
+    return board
+
+
+def _handout(board):
+    return None if board is None else board.copy()
+
+
+class MemoryGameStore:
+    """The board object of this process, for a single worker."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.board = None
+        self.version = 0
+        self.conflicts = 0
+
+    def load(self):
+        """(board, version); (None, 0) before the first game."""
+        with self.lock:
+            board, version = self.board, self.version
+        return _handout(board), version
+
+    def current_version(self):
+        """The version alone, e.g. to notice a search's position has changed."""
+        return self.version
+
+    def initialize(self, board):
+        """Store `board` unless a game is stored already. Returns whether it was stored."""
+        board = snapshot(board)
+        with self.lock:
+            if self.board is not None:
+                return False
+            self.board = board
+            self.version += 1
+            return True
+
+    def reset(self, board):
+        """Replace the game with `board`, whatever its version. Returns the new version."""
+        board = snapshot(board)
+        with self.lock:
+            self.board = board
+            self.version += 1
+            return self.version
+
+    def save(self, board, expected_version):
+        """Store `board` if the game is still at `expected_version`. Returns the new version."""
+        board = snapshot(board)
+        with self.lock:
+            if self.version != expected_version:
+                self.conflicts += 1
+                raise VersionConflict(expected_version, self.version)
+            self.board = board
+            self.version += 1
+            return self.version
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS current_game (
+    slot INTEGER PRIMARY KEY CHECK (slot = 0),
+    version INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+"""
+
+
+def _connect(path):
+    # Autocommit: every operation is a single statement
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class SQLiteGameStore:
+    """The game as one row of a SQLite file, shared by every process that opens it."""
+
+    def __init__(self, path=GAME_STORE_PATH):
+        self.path = path
+        self.local = threading.local()
+        self.cache_lock = threading.Lock()
+        # (version, board) of the last load
+        self.cached = (0, None)
+        self.conflicts = 0
+        conn = _connect(path)
+        conn.executescript(SCHEMA)
+        conn.close()
+
+    def _conn(self):
+        # One connection per thread, and none inherited across a fork
+        if getattr(self.local, 'pid', None) != os.getpid():
+            self.local.conn = _connect(self.path)
+            self.local.pid = os.getpid()
+        return self.local.conn
+
+    def load(self):
+        cached_version, cached_board = self.cached
+        row = self._conn().execute(
+            'SELECT version, CASE WHEN version = ? THEN NULL ELSE state END FROM current_game WHERE slot = 0',
+            (cached_version,)).fetchone()
+        if row is None:
+            return None, 0
+        version, state = row
+        if state is None:
+            return _handout(cached_board), version
+        board = decode_state(state)
+        with self.cache_lock:
+            if version > self.cached[0]:
+                self.cached = (version, board)
+        return _handout(board), version
+
+    def current_version(self):
+        row = self._conn().execute('SELECT version FROM current_game WHERE slot = 0').fetchone()
+        return row[0] if row else 0
+
+    def initialize(self, board):
+        cursor = self._conn().execute(
+            'INSERT OR IGNORE INTO current_game (slot, version, state) VALUES (0, 1, ?)', (encode_state(board),))
+        return cursor.rowcount == 1
+
+    def reset(self, board):
+        return self._conn().execute(
+            'INSERT INTO current_game (slot, version, state) VALUES (0, 1, ?) '
+            'ON CONFLICT (slot) DO UPDATE SET version = version + 1, state = excluded.state '
+            'RETURNING version', (encode_state(board),)).fetchone()[0]
+
+    def save(self, board, expected_version):
+        conn = self._conn()
+        cursor = conn.execute('UPDATE current_game SET version = version + 1, state = ? '
+                              'WHERE slot = 0 AND version = ?', (encode_state(board), expected_version))
+        if cursor.rowcount == 0:
+            self.conflicts += 1
+            row = conn.execute('SELECT version FROM current_game WHERE slot = 0').fetchone()
+            raise VersionConflict(expected_version, row[0] if row else 0)
+        return expected_version + 1
+
+
+# version, offset of the current state, its length in bytes
+HEADER = struct.Struct('<QQQ')
+
+
+class SharedMemoryGameStore:
+    """
+    The game in a shared memory block of this host. The block holds a header and
+    two state buffers: a write fills the buffer not in use, then switches the
+    header over to it, so a writer dying halfway leaves the previous state intact.
+    Writes and state reads hold a file lock; a load whose version matches the
+    cached board reads the header only.
+    """
+
+    def __init__(self, name=GAME_STORE_NAME, size=SHM_SIZE):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self.shm = shared_memory.SharedMemory(name=name)
+        # The block must outlive any one worker: left registered, it would be
+        # unlinked by the resource tracker of the first process to exit
+        resource_tracker.unregister(self.shm._name, 'shared_memory')
+        self.capacity = (self.shm.size - HEADER.size) // 2
+        self.lock_path = os.path.join(tempfile.gettempdir(), f'{name}.lock')
+        self.lock_pid = None
+        self.cached = (0, None)
+        self.conflicts = 0
+
+    def _lock(self):
+        """(thread lock, lock file) of this process; flock excludes processes, not threads."""
+        if self.lock_pid != os.getpid():
+            self.thread_lock = threading.Lock()
+            self.lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            self.lock_pid = os.getpid()
+        return self.thread_lock, self.lock_fd
+
+    def _locked(self, operation, *args):
+        thread_lock, fd = self._lock()
+        with thread_lock:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                return operation(*args)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _read_state(self):
+        version, offset, length = HEADER.unpack_from(self.shm.buf, 0)
+        if version == 0:
+            return None, 0
+        board = decode_state(bytes(self.shm.buf[offset:offset + length]).decode())
+        self.cached = (version, board)
+        return _handout(board), version
+
+    def _write_state(self, board, expected_version):
+        version, offset, _ = HEADER.unpack_from(self.shm.buf, 0)
+        if expected_version is not None and version != expected_version:
+            self.conflicts += 1
+            raise VersionConflict(expected_version, version)
+        payload = encode_state(board).encode()
+        if len(payload) > self.capacity:
+            raise ValueError(f'game state of {len(payload)} bytes does not fit in {self.capacity}')
+        offset = HEADER.size + self.capacity if offset == HEADER.size else HEADER.size
+        self.shm.buf[offset:offset + len(payload)] = payload
+        HEADER.pack_into(self.shm.buf, 0, version + 1, offset, len(payload))
+        self.cached = (version + 1, snapshot(board))
+        return version + 1
+
+    def load(self):
+        cached_version, cached_board = self.cached
+        # An aligned 8-byte read: a concurrent write shows the old or the new version
+        version = HEADER.unpack_from(self.shm.buf, 0)[0]
+        if version == cached_version and cached_board is not None:
+            return _handout(cached_board), version
+        return self._locked(self._read_state)
+
+    def current_version(self):
+        return HEADER.unpack_from(self.shm.buf, 0)[0]
+
+    def initialize(self, board):
+        def write_if_empty():
+            if HEADER.unpack_from(self.shm.buf, 0)[0]:
+                return False
+            self._write_state(board, None)
+            return True
+        return self._locked(write_if_empty)
+
+    def reset(self, board):
+        return self._locked(self._write_state, board, None)
+
+    def save(self, board, expected_version):
+        return self._locked(self._write_state, board, expected_version)
+
+    def unlink(self):
+        """Remove the block from the system, e.g. after the last worker has stopped."""
+        # SharedMemory.unlink() unregisters the block from the tracker again
+        resource_tracker.register(self.shm._name, 'shared_memory')
+        self.shm.unlink()
+
+
+def open_game_store(kind=GAME_STORE):
+    if kind == 'memory':
+        return MemoryGameStore()
+    if kind == 'sqlite':
+        return SQLiteGameStore()
+    if kind == 'shm':
+        return SharedMemoryGameStore()
+    raise ValueError(f"Unknown GAME_STORE {kind!r}: expected memory, sqlite or shm")
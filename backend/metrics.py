@@ -0,0 +1,145 @@
+"""
+Prometheus-style metrics for the Flask API.
+
+- Per-endpoint request counters and latency histograms, plus in-flight requests.
+- Active games, as reported by the app.
+- Search and rules counters collected by engine.search_stats.
+
+Rendered in the Prometheus text exposition format by /api/metrics, so no client
+library is needed.
+"""
+
+import bisect
+import threading
+
+from engine.eval_cache import EVAL_CACHE
+from engine.search_stats import all_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """Thread-safe request accounting fed by the before/after request hooks."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.latency = {}   # endpoint -> Histogram
+        self.responses = {}  # (endpoint, status) -> count
+
+    def started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def finished(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def observe(self, endpoint, status, seconds):
+        with self.lock:
+            histogram = self.latency.get(endpoint)
+            if histogram is None:
+                histogram = self.latency[endpoint] = Histogram()
+            histogram.observe(seconds)
+            key = (endpoint, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+
+
+def render(request_metrics, gauges=None):
+    """Render all metrics as Prometheus text. `gauges` maps extra gauge names to values."""
+    lines = []
+
+    def metric(name, kind, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    with request_metrics.lock:
+        in_flight = request_metrics.in_flight
+        responses = sorted(request_metrics.responses.items())
+        latency = [(endpoint, list(h.counts), h.total, h.count)
+                   for endpoint, h in sorted(request_metrics.latency.items())]
+
+    metric('http_requests_in_flight', 'gauge', 'Requests currently being served.')
+    lines.append(f'http_requests_in_flight {in_flight}')
+
+    metric('http_requests_total', 'counter', 'Responses by endpoint and status code.')
+    for (endpoint, status), count in responses:
+        lines.append(f'http_requests_total{_labels(endpoint=endpoint, status=status)} {count}')
+
+    metric('http_request_duration_seconds', 'histogram', 'Request latency by endpoint.')
+    for endpoint, counts, total, count in latency:
+        cumulative = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS + ('+Inf',), counts):
+            cumulative += bucket_count
+            lines.append('http_request_duration_seconds_bucket'
+                         f'{_labels(endpoint=endpoint, le=bound)} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{_labels(endpoint=endpoint)} {total}')
+        lines.append(f'http_request_duration_seconds_count{_labels(endpoint=endpoint)} {count}')
+
+    for name, (value, help_text) in (gauges or {}).items():
+        metric(name, 'gauge', help_text)
+        lines.append(f'{name} {value}')
+
+    search_metrics = (
+        ('search_runs_total', 'counter', 'searches', 'Root searches completed.'),
+        ('search_nodes_total', 'counter', 'nodes', 'Nodes visited by the search.'),
+        ('search_cutoffs_total', 'counter', 'cutoffs', 'Alpha-beta cutoffs.'),
+        ('search_first_move_cutoffs_total', 'counter', 'first_move_cutoffs',
+         'Cutoffs produced by the first move searched.'),
+        ('search_explosions_total', 'counter', 'explosions', 'Explosions applied by the rules.'),
+        ('search_pvs_null_window_total', 'counter', 'pvs_searches', 'PVS null-window probes.'),
+        ('search_pvs_researches_total', 'counter', 'pvs_researches',
+         'PVS probes that failed high and were re-searched.'),
+        ('search_aspiration_total', 'counter', 'aspiration_searches',
+         'Iterations started with an aspiration window.'),
+        ('search_aspiration_researches_total', 'counter', 'aspiration_researches',
+         'Aspiration windows that failed and were re-searched.'),
+        ('search_null_move_tries_total', 'counter', 'null_move_tries', 'Null-move searches tried.'),
+        ('search_null_move_cutoffs_total', 'counter', 'null_move_cutoffs',
+         'Nodes pruned by a null-move search.'),
+        ('search_lmr_reductions_total', 'counter', 'lmr_reductions', 'Late moves searched reduced.'),
+        ('search_lmr_researches_total', 'counter', 'lmr_researches',
+         'Reduced late moves re-searched at full depth.'),
+        ('search_tt_probes_total', 'counter', 'tt_probes', 'Transposition table lookups.'),
+        ('search_tt_hits_total', 'counter', 'tt_hits', 'Transposition table lookups that found the position.'),
+        ('search_tt_cutoffs_total', 'counter', 'tt_cutoffs', 'Nodes answered from the transposition table.'),
+        ('search_aborted_total', 'counter', 'aborted_searches',
+         'Searches stopped at their deadline or by another worker.'),
+        ('search_eval_seconds_total', 'counter', 'eval_time', 'Time spent in evaluation.'),
+        ('search_movegen_seconds_total', 'counter', 'movegen_time', 'Time spent generating moves.'),
+        ('search_seconds_total', 'counter', 'search_time', 'Wall time spent in root searches.'),
+        ('search_depth_reached', 'gauge', 'last_depth', 'Depth reached by the last search.'),
+        ('search_max_depth_reached', 'gauge', 'max_depth', 'Deepest search so far.'),
+        ('search_nodes_per_second', 'gauge', 'last_nps', 'Nodes per second of the last search.'),
+    )
+    metric('eval_cache_hits_total', 'counter', 'Evaluations answered from the evaluation cache.')
+    lines.append(f'eval_cache_hits_total {EVAL_CACHE.hits}')
+    metric('eval_cache_misses_total', 'counter', 'Evaluations computed and added to the cache.')
+    lines.append(f'eval_cache_misses_total {EVAL_CACHE.misses}')
+
+    stats = sorted(all_stats(), key=lambda s: s.engine)
+    for name, kind, attr, help_text in search_metrics:
+        metric(name, kind, help_text)
+        for s in stats:
+            lines.append(f'{name}{_labels(engine=s.engine)} {getattr(s, attr)}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,200 @@
+"""
+Durable game storage: an append-only move log in SQLite (WAL mode).
+
+- Every move is one small row (game id, ply, 16-bit move); every
+  SNAPSHOT_INTERVAL plies the FEN is stored too, so recovery replays at most
+  that many moves on top of the latest snapshot, and load_game(game_id, ply)
+  reaches any earlier position the same way.
+- truncate() drops the moves after a ply, for takebacks.
+- Writes go through a queue to a single writer thread, which commits
+  everything queued in one transaction (group commit). Request handlers only
+  enqueue, so persistence adds next to nothing to /makemove latency; a crash
+  can lose the moves of the last few milliseconds.
+- synchronous=NORMAL: with WAL a commit survives a process crash, but not
+  necessarily a power loss.
+"""
+
+import queue
+import sqlite3
+import threading
+
+import chess
+
+from engine.explosive_board import ExplosiveBoard
+
+SNAPSHOT_INTERVAL = 20
+# Operations per transaction at most, so a backlog is still committed in steps
+MAX_BATCH = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    created REAL NOT NULL DEFAULT (julianday('now')),
+    start_fen TEXT NOT NULL,
+    result TEXT
+);
+CREATE TABLE IF NOT EXISTS moves (
+    game_id TEXT NOT NULL,
+    ply INTEGER NOT NULL,
+    move INTEGER NOT NULL,
+    PRIMARY KEY (game_id, ply)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    game_id TEXT NOT NULL,
+    ply INTEGER NOT NULL,
+    fen TEXT NOT NULL,
+    PRIMARY KEY (game_id, ply)
+) WITHOUT ROWID;
+"""
+
+
+def encode_move(move):
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(bits):
+    return chess.Move(bits & 63, (bits >> 6) & 63, (bits >> 12) or None)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class GameLog:
+    def __init__(self, path, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.queue = queue.Queue()
+        self.commits = 0
+        self.rows = 0
+        with _connect(path) as conn:
+            conn.executescript(SCHEMA)
+        conn.close()
+        self.writer = threading.Thread(target=self._write_loop, name='game-log-writer', daemon=True)
+        self.writer.start()
+
+    # Writes: queued, committed by the writer thread
+
+    def new_game(self, board):
+        self.queue.put(('INSERT OR REPLACE INTO games (game_id, start_fen) VALUES (?, ?)',
+                        (board.game_id, board.fen())))
+
+    def record_move(self, board, move):
+        """
+        Log `move`, just pushed on `board`, with a snapshot every snapshot_interval
+        plies. The move is passed in since an explosion clears board.move_stack.
+        """
+        ply = board.ply()
+        self.queue.put(('INSERT OR REPLACE INTO moves (game_id, ply, move) VALUES (?, ?, ?)',
+                        (board.game_id, ply, encode_move(move))))
+        if ply % self.snapshot_interval == 0:
+            self.queue.put(('INSERT OR REPLACE INTO snapshots (game_id, ply, fen) VALUES (?, ?, ?)',
+                            (board.game_id, ply, board.fen())))
+        status = board.status()
+        if status['is_game_over']:
+            self.queue.put(('UPDATE games SET result = ? WHERE game_id = ?',
+                            (status['result'] or '*', board.game_id)))
+
+    def truncate(self, game_id, ply):
+        """Drop the moves and snapshots after `ply`, e.g. for a takeback; the game is unfinished again."""
+        self.queue.put(('DELETE FROM moves WHERE game_id = ? AND ply > ?', (game_id, ply)))
+        self.queue.put(('DELETE FROM snapshots WHERE game_id = ? AND ply > ?', (game_id, ply)))
+        self.queue.put(('UPDATE games SET result = NULL WHERE game_id = ?', (game_id,)))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+
+    def pending(self):
+        return self.queue.qsize()
+
+    def _write_loop(self):
+        conn = _connect(self.path)
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            statements = [op for op in batch if isinstance(op, tuple)]
+            if statements:
+                try:
+                    with conn:
+                        for sql, params in statements:
+                            conn.execute(sql, params)
+                    self.commits += 1
+                    self.rows += len(statements)
+                except sqlite3.Error as e:
+                    print(f"Game log write failed: {e}")
+            for op in batch:
+                if isinstance(op, threading.Event):
+                    op.set()
+            if None in batch:
+                conn.close()
+                return
+
+    # Recovery and seeking
+
+    def load_game(self, game_id, ply=None):
+        """
+        Rebuild a game, or the position after `ply` (a board.ply() value), from
+        the latest snapshot before it and the moves logged after that. Returns
+        None for an unknown game or a ply it has not reached.
+        """
+        conn = _connect(self.path)
+        try:
+            row = conn.execute('SELECT start_fen FROM games WHERE game_id = ?', (game_id,)).fetchone()
+            if row is None:
+                return None
+            fen, start = row[0], 0
+            target = ply
+            if target is None:
+                target = conn.execute('SELECT MAX(ply) FROM moves WHERE game_id = ?', (game_id,)).fetchone()[0] or 0
+            # Snapshots keep no explosion state: replay at least one move, which
+            # sets it, on top of the snapshot
+            snapshot = conn.execute('SELECT ply, fen FROM snapshots WHERE game_id = ? AND ply < ? '
+                                    'ORDER BY ply DESC LIMIT 1', (game_id, target)).fetchone()
+            if snapshot is not None:
+                start, fen = snapshot
+            moves = conn.execute('SELECT move FROM moves WHERE game_id = ? AND ply > ? AND ply <= ? ORDER BY ply',
+                                 (game_id, start, target)).fetchall()
+        finally:
+            conn.close()
+
+        board = ExplosiveBoard(fen)
+        for (bits,) in moves:
+            board.push(decode_move(bits))
+        if ply is not None and board.ply() != ply:
+            return None
+        board.game_id = game_id
+        return board
+
+    def moves(self, game_id):
+        """(ply, move) of every logged move of a game, in order."""
+        conn = _connect(self.path)
+        try:
+            rows = conn.execute('SELECT ply, move FROM moves WHERE game_id = ? ORDER BY ply', (game_id,)).fetchall()
+        finally:
+            conn.close()
+        return [(ply, decode_move(bits)) for ply, bits in rows]
+
+    def load_latest_game(self):
+        """The most recently started game that has no result yet, or None."""
+        conn = _connect(self.path)
+        try:
+            row = conn.execute('SELECT game_id FROM games WHERE result IS NULL '
+                               'ORDER BY created DESC, rowid DESC LIMIT 1').fetchone()
+        finally:
+            conn.close()
+        return self.load_game(row[0]) if row else None
@@ -0,0 +1,18 @@
+"""
+Run from backend/: python -m pytest -q
+
+The app is imported with its side effects pointed away from the working tree:
+the game log goes to a temporary directory, and the search cache and
+pondering are off.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['GAME_DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='explosive-chess-tests-'), 'games.sqlite3')
+os.environ['GAME_STORE'] = 'memory'
+os.environ['AI_SEARCH_CACHE'] = ''
+os.environ['AI_PONDER'] = '0'
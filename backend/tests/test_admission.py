@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, 'condition not reached'
+        time.sleep(0.01)
+
+
+def test_free_slot_is_admitted_at_once():
+    controller = AdmissionController(max_active=2, max_queued=2)
+    with controller.admit(time.monotonic() + 1) as slot:
+        assert controller.active == 1
+        assert not slot.shallow()
+    assert controller.active == 0
+    assert controller.admitted == 1
+
+
+def test_full_queue_is_rejected():
+    controller = AdmissionController(max_active=1, max_queued=1)
+    running = controller.admit(time.monotonic() + 10)
+    running.budget(depth=4, time_limit=1.0)
+    waiter = {}
+    thread = threading.Thread(target=lambda: waiter.update(slot=controller.admit(time.monotonic() + 10)))
+    thread.start()
+    wait_for(lambda: len(controller.waiting) == 1)
+
+    with pytest.raises(Overloaded) as rejected:
+        controller.admit(time.monotonic() + 10)
+    assert rejected.value.reason == 'search queue full'
+    assert rejected.value.retry_after >= 1
+    assert controller.rejected == 1
+
+    running.release()
+    thread.join(2)
+    assert controller.active == 1
+    waiter['slot'].release()
+    assert controller.active == 0
+
+
+def test_request_that_cannot_start_before_its_deadline_is_rejected():
+    controller = AdmissionController(max_active=1, max_queued=4)
+    with controller.admit(time.monotonic() + 10) as slot:
+        slot.budget(depth=4, time_limit=5.0)
+        with pytest.raises(Overloaded) as rejected:
+            controller.admit(time.monotonic() + 1)
+    assert rejected.value.reason == 'deadline cannot be met'
+    assert rejected.value.retry_after >= 4
+
+
+def test_deadline_passing_in_the_queue_is_rejected():
+    controller = AdmissionController(max_active=1, max_queued=4)
+    with controller.admit(time.monotonic() + 0.1):
+        with pytest.raises(Overloaded) as rejected:
+            controller.admit(time.monotonic() + 0.4)
+    assert rejected.value.reason == 'deadline passed in the queue'
+    assert not controller.waiting
+
+
+def test_slot_is_released_when_the_search_fails():
+    controller = AdmissionController(max_active=1, max_queued=1)
+    with pytest.raises(RuntimeError):
+        with controller.admit(time.monotonic() + 1):
+            raise RuntimeError('search failed')
+    assert controller.active == 0
+    assert not controller.running
+    controller.admit(time.monotonic() + 1).release()
+
+
+def test_budget_shrinks_with_pressure():
+    controller = AdmissionController(max_active=1, max_queued=2)
+    slot = controller.admit(time.monotonic() + 10)
+    slot.pressure = 1.0
+    depth, time_limit = slot.budget(depth=6, time_limit=4.0)
+    assert slot.shallow()
+    assert depth == 1
+    assert time_limit == pytest.approx(1.0)
+    slot.release()
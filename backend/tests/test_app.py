@@ -0,0 +1,137 @@
+import time
+
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def client():
+    client = app_module.app.test_client()
+    assert client.post('/newgame').status_code == 200
+    return client
+
+
+@pytest.mark.parametrize('body, field', [
+    ({'workers': 'many'}, 'workers'),
+    ({'time_limit': 'soon'}, 'time_limit'),
+    ({'time_limit': -1}, 'time_limit'),
+    ({'depth': 'deep'}, 'depth'),
+    ({'depth': 0}, 'depth'),
+    ({'pvs': 'maybe'}, 'pvs'),
+])
+def test_aimove_rejects_bad_search_options(client, body, field):
+    response = client.post('/aimove', json=body)
+    assert response.status_code == 400
+    assert field in response.json['details']
+
+
+def test_aimove_rejects_a_body_that_is_not_an_object(client):
+    assert client.post('/aimove', json=[1, 2]).status_code == 400
+
+
+def test_search_request_coerces_strings():
+    depth, workers, time_limit, options = app_module.search_request(
+        {'depth': '1', 'workers': '1', 'pvs': 'false', 'lmr': 'true'})
+    assert (depth, workers, time_limit) == (1, 1, None)
+    assert options['pvs'] is False
+    assert options['lmr'] is True
+
+
+def test_aimove_plays_with_coerced_options(client):
+    response = client.post('/aimove', json={'depth': '1', 'pvs': 'false'})
+    assert response.status_code == 200
+    assert response.json['depth'] == 1
+
+
+START = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+
+@pytest.mark.parametrize('body, field', [
+    ({'time_limit': float('nan')}, 'time_limit'),
+    ({'time_limit': float('inf')}, 'time_limit'),
+    ({'time_limit': -1}, 'time_limit'),
+    ({'node_limit': -5}, 'node_limit'),
+    ({'depth': 0}, 'depth'),
+    ({'nn': 'maybe'}, 'nn'),
+])
+def test_batch_rejects_bad_budgets(body, field):
+    response = app_module.app.test_client().post('/api/analyze/batch', json=dict(fens=[START], **body))
+    assert response.status_code == 400
+    assert field in response.json['details']
+
+
+def test_batch_is_admitted_like_a_search(monkeypatch):
+    admission = app_module.AdmissionController(max_active=1, max_queued=0)
+    monkeypatch.setattr(app_module, 'admission', admission)
+    client = app_module.app.test_client()
+    with admission.admit(time.monotonic() + 60):
+        response = client.post('/api/analyze/batch', json={'fens': [START], 'depth': 1})
+        assert response.status_code == 503
+        assert 'Retry-After' in response.headers
+    response = client.post('/api/analyze/batch', json={'fens': [START], 'depth': 1})
+    assert response.status_code == 200
+    assert response.json['count'] == 1
+
+
+@pytest.mark.parametrize('color', ['red', 'WHITE', 1, None])
+def test_get_ai_move_rejects_bad_colors(color):
+    response = app_module.app.test_client().post('/api/get-ai-move', json={'fen': START, 'color': color})
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid color'
+
+
+def test_searches_share_one_pvs_default():
+    ctx = app_module.SearchContext()
+    assert (ctx.pvs, ctx.aspiration) == (app_module.SEARCH_PVS, app_module.SEARCH_ASPIRATION)
+
+
+def play(client, *moves):
+    for uci in moves:
+        response = client.post('/makemove', json={'move': uci})
+        assert response.status_code == 200
+    return response
+
+
+def test_history_lists_moves_and_seeks(client):
+    play(client, 'e2e4', 'd7d5', 'e4d5', 'd8d5', 'b1c3')
+    history = client.get('/history').json
+    assert [move['move'] for move in history['moves']] == ['e2e4', 'd7d5', 'e4d5', 'd8d5', 'b1c3']
+    assert client.get('/history?ply=4').json['exploded'] == ['d5']
+    assert client.get('/history?ply=6').status_code == 400
+
+
+def test_takeback_across_an_explosion(client):
+    before = play(client, 'e2e4', 'd7d5', 'e4d5').json
+    play(client, 'd8d5', 'b1c3')
+
+    response = client.post('/takeback', json={'plies': 2})
+    assert response.status_code == 200
+    assert response.json['fen'] == before['fen']
+    assert response.json['version'] > before['version']
+    assert [move['move'] for move in client.get('/history').json['moves']] == ['e2e4', 'd7d5', 'e4d5']
+    # The queen is back and can take again, and the log keeps that move
+    assert play(client, 'd8d5').json['exploded'] == ['d5']
+    assert [move['move'] for move in client.get('/history').json['moves']][-1] == 'd8d5'
+
+
+def test_takeback_checks_plies_and_version(client):
+    version = play(client, 'e2e4').json['version']
+    assert client.post('/takeback', json={'plies': 2}).status_code == 400
+    assert client.post('/takeback', json={'plies': 0}).status_code == 400
+    assert client.post('/takeback', json={'version': version - 1}).status_code == 409
+    assert client.post('/takeback', json={'version': version}).status_code == 200
+
+
+def test_etag_is_never_reused_after_a_takeback(client):
+    etags = [client.get('/gamestate').headers['ETag']]
+    play(client, 'e2e4')
+    etags.append(client.get('/gamestate').headers['ETag'])
+    play(client, 'e7e5')
+    etags.append(client.get('/gamestate').headers['ETag'])
+
+    client.post('/takeback', json={'plies': 2})
+    response = client.get('/gamestate', headers={'If-None-Match': etags[0]})
+    # Same position as at the start, but a new version: no stale 304
+    assert response.status_code == 200
+    assert response.headers['ETag'] not in etags
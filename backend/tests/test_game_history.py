@@ -0,0 +1,109 @@
+import random
+
+import chess
+import pytest
+
+from engine.chess_engine import ExplosiveChess
+from engine.explosive_board import ExplosiveBoard
+from engine.game_history import GameHistory
+
+
+def state(board):
+    return board.fen(), sorted(board.exploded_squares), board.king_exploded, board.winner
+
+
+def random_game(seed, plies=60):
+    """Moves of a random game that prefers captures, so it explodes often."""
+    rng = random.Random(seed)
+    board = ExplosiveBoard()
+    moves = []
+    while len(moves) < plies and not board.is_game_over() and board.valid_moves():
+        valid = board.valid_moves()
+        captures = [move for move in valid if board.is_capture(move)]
+        move = rng.choice(captures if captures and rng.random() < 0.5 else valid)
+        board.push(move)
+        moves.append(move)
+    return moves
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_board_at_matches_every_ply_across_explosions(seed):
+    board = ExplosiveBoard()
+    history = GameHistory(board)
+    expected = [state(board)]
+    explosions = 0
+    for move in random_game(seed):
+        board.push(move)
+        history.append(move, board)
+        expected.append(state(board))
+        explosions += bool(board.exploded_squares)
+    # Explosions clear the python-chess move stack, the history keeps every move
+    assert explosions
+    assert len(board.move_stack) < len(history)
+
+    for ply, want in enumerate(expected):
+        assert state(history.board_at(ply)) == want
+
+
+def test_takeback_then_play_on():
+    moves = random_game(1)
+    board = ExplosiveBoard()
+    history = GameHistory(board, interval=4)
+    expected = [state(board)]
+    for move in moves:
+        board.push(move)
+        history.append(move, board)
+        expected.append(state(board))
+
+    board = history.takeback(len(moves) - 9)
+    assert len(history) == 9
+    assert state(board) == expected[9]
+    # Replaying the same moves rebuilds the same checkpoints
+    for move in moves[9:]:
+        board.push(move)
+        history.append(move, board)
+    assert [state(history.board_at(ply)) for ply in range(len(moves) + 1)] == expected
+
+
+def test_out_of_range_plies():
+    history = GameHistory(ExplosiveBoard())
+    history.append(chess.Move.from_uci('e2e4'), ExplosiveBoard())
+    with pytest.raises(IndexError):
+        history.board_at(2)
+    with pytest.raises(IndexError):
+        history.takeback(2)
+
+
+def test_pop_restores_the_explosion_state():
+    board = ExplosiveBoard()
+    for uci in ['e2e4', 'd7d5', 'e4d5', 'd8d5']:
+        board.push(chess.Move.from_uci(uci))
+    assert board.exploded_squares == [chess.D5]
+    board.push(chess.Move.from_uci('g1f3'))
+    assert board.exploded_squares == []
+    board.pop()
+    assert board.exploded_squares == [chess.D5]
+
+
+def test_explosive_chess_takeback_and_seek():
+    game = ExplosiveChess()
+    fens = [game.get_fen()]
+    for uci in ['e2e4', 'd7d5', 'e4d5', 'd8d5', 'g1f3', 'e7e5']:
+        game.push_move(chess.Move.from_uci(uci))
+        fens.append(game.get_fen())
+
+    assert game.position_at(3).fen() == fens[3]
+    assert game.takeback(3) == fens[3]
+    assert len(game.move_history) == 3
+    assert game.position_at(3).fen() == fens[3]
+
+
+def test_adopt_identity_continues_the_game():
+    board = ExplosiveBoard()
+    board.push(chess.Move.from_uci('e2e4'))
+    rebuilt = ExplosiveBoard()
+    rebuilt.adopt_identity(board)
+    assert rebuilt.game_id == board.game_id
+    assert rebuilt.version > board.version
+    assert rebuilt.etag() != board.etag()
+    assert rebuilt.etag().split('-')[0] == board.etag().split('-')[0]
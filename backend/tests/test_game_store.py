@@ -0,0 +1,161 @@
+import os
+import sys
+import threading
+import uuid
+
+import chess
+import pytest
+
+from engine.explosive_board import ExplosiveBoard
+from game_store import MemoryGameStore, SharedMemoryGameStore, SQLiteGameStore, VersionConflict
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'shm'])
+def open_store(request, tmp_path):
+    """Opens a handle on one store; shared stores give a new handle each call, as another worker would get."""
+    if request.param == 'memory':
+        store = MemoryGameStore()
+        yield lambda: store
+        return
+    if request.param == 'sqlite':
+        path = str(tmp_path / 'game.sqlite3')
+        yield lambda: SQLiteGameStore(path)
+        return
+    name = f'explosive_chess_test_{uuid.uuid4().hex[:8]}'
+    handles = []
+
+    def open_shm():
+        handles.append(SharedMemoryGameStore(name))
+        return handles[-1]
+    yield open_shm
+    handles[0].unlink()
+    for handle in handles:
+        handle.shm.close()
+    os.remove(handles[0].lock_path)
+
+
+def exploded_board():
+    board = ExplosiveBoard()
+    for uci in ['e2e4', 'd7d5', 'e4d5', 'd8d5']:
+        board.push(chess.Move.from_uci(uci))
+    return board
+
+
+def test_empty_store_loads_nothing(open_store):
+    assert open_store().load() == (None, 0)
+
+
+def test_initialize_stores_only_the_first_game(open_store):
+    store = open_store()
+    first, second = ExplosiveBoard(), ExplosiveBoard()
+    assert store.initialize(first)
+    assert not open_store().initialize(second)
+    board, version = store.load()
+    assert board.game_id == first.game_id
+    assert version == 1
+
+
+def test_save_and_load_round_trip(open_store):
+    store = open_store()
+    store.initialize(ExplosiveBoard())
+    board = exploded_board()
+    version = store.save(board, 1)
+    loaded, loaded_version = open_store().load()
+    assert loaded_version == version == 2
+    assert loaded.fen() == board.fen()
+    assert loaded.exploded_squares == board.exploded_squares == [chess.D5]
+    assert (loaded.king_exploded, loaded.winner) == (board.king_exploded, board.winner)
+    assert loaded.game_id == board.game_id
+    assert loaded.etag(loaded_version) == board.etag(version)
+
+
+def test_every_write_increments_the_version(open_store):
+    store = open_store()
+    store.initialize(ExplosiveBoard())
+    assert store.save(ExplosiveBoard(), 1) == 2
+    assert store.reset(ExplosiveBoard()) == 3
+    assert store.save(ExplosiveBoard(), 3) == 4
+    assert open_store().load()[1] == 4
+
+
+def test_stale_version_is_rejected(open_store):
+    store, other = open_store(), open_store()
+    store.initialize(ExplosiveBoard())
+    winner = exploded_board()
+    other.save(winner, 1)
+
+    with pytest.raises(VersionConflict) as conflict:
+        store.save(ExplosiveBoard(), 1)
+    assert (conflict.value.expected, conflict.value.current) == (1, 2)
+    assert store.conflicts == 1
+    board, version = store.load()
+    assert version == 2
+    assert board.fen() == winner.fen()
+
+
+def test_reset_ignores_the_version(open_store):
+    store = open_store()
+    store.initialize(exploded_board())
+    board = ExplosiveBoard()
+    version = store.reset(board)
+    assert store.load()[0].game_id == board.game_id
+    assert store.save(ExplosiveBoard(), version) == version + 1
+
+
+def test_loaded_boards_are_the_callers_own(open_store):
+    store = open_store()
+    store.initialize(ExplosiveBoard())
+    board, version = store.load()
+    board.push(chess.Move.from_uci('e2e4'))
+    assert store.load()[0].fen() == chess.STARTING_FEN
+    assert store.current_version() == version
+
+
+def test_status_polls_while_saving(open_store):
+    """
+    /gamestate polls from several threads between saves: every board read stays
+    consistent. The pollers of a round load and compute status() together.
+    """
+    store = open_store()
+    board = ExplosiveBoard()
+    store.initialize(board)
+    # Knights going back and forth: repetition tests pop and re-push the stack
+    moves = [chess.Move.from_uci(uci) for uci in ['g1f3', 'g8f6', 'f3g1', 'f6g8']] * 10
+    pollers = 4
+    loaded_round = threading.Barrier(pollers + 1)
+    polled_round = threading.Barrier(pollers + 1)
+    together = threading.Barrier(pollers)
+    errors = []
+
+    def poll():
+        for _ in moves:
+            loaded_round.wait()
+            loaded, version = store.load()
+            fen, stack = loaded.fen(), list(loaded.move_stack)
+            together.wait()
+            status = loaded.status()
+            if not (status['fen'] == fen == loaded.fen() and loaded.move_stack == stack):
+                errors.append((version, fen, status['fen']))
+            polled_round.wait()
+
+    # Switch threads as often as possible, so they interleave within status()
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    threads = [threading.Thread(target=poll) for _ in range(pollers)]
+    try:
+        for thread in threads:
+            thread.start()
+        version = 1
+        for move in moves:
+            board = board.copy()
+            board.push(move)
+            version = store.save(board, version)
+            loaded_round.wait(5)
+            polled_round.wait(5)
+    finally:
+        for thread in threads:
+            thread.join(5)
+        sys.setswitchinterval(switch_interval)
+
+    assert not errors
+    assert store.load()[0].fen() == board.fen()
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from engine.explosive_board import ExplosiveBoard
+from persistence import GameLog
+
+
+def state(board):
+    return board.fen(), sorted(board.exploded_squares), board.king_exploded, board.winner
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = GameLog(str(tmp_path / 'games.sqlite3'), snapshot_interval=4)
+    yield log
+    log.close()
+
+
+def logged_game(log, seed, plies=40):
+    """Plays and logs a random game that prefers captures; returns (game id, {ply: state})."""
+    rng = random.Random(seed)
+    board = ExplosiveBoard()
+    log.new_game(board)
+    states = {board.ply(): state(board)}
+    while board.ply() < plies and not board.is_game_over() and board.valid_moves():
+        valid = board.valid_moves()
+        captures = [move for move in valid if board.is_capture(move)]
+        move = rng.choice(captures if captures and rng.random() < 0.5 else valid)
+        board.push(move)
+        log.record_move(board, move)
+        states[board.ply()] = state(board)
+    log.flush()
+    return board.game_id, states
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_seek_every_ply(log, seed):
+    game_id, states = logged_game(log, seed)
+    for ply, want in states.items():
+        assert state(log.load_game(game_id, ply)) == want
+    assert state(log.load_game(game_id)) == states[max(states)]
+    assert log.load_game(game_id, max(states) + 1) is None
+    assert log.load_game('no-such-game') is None
+
+
+@pytest.mark.parametrize('cut', [0, 5, 8, 13])
+def test_truncate_and_reload(log, cut):
+    game_id, states = logged_game(log, 2)
+    log.truncate(game_id, cut)
+    log.flush()
+    assert state(log.load_game(game_id)) == states[cut]
+    assert log.load_game(game_id, cut + 1) is None
+    assert [ply for ply, move in log.moves(game_id)] == list(range(1, cut + 1))
+    # The game is unfinished again, so it is the one recovered
+    assert log.load_latest_game().game_id == game_id
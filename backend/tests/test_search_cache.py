@@ -0,0 +1,32 @@
+import sqlite3
+
+import chess
+import pytest
+
+from engine.explosive_board import ExplosiveBoard
+from engine.search_cache import SearchCache
+
+LEGACY_SCHEMA = """
+CREATE TABLE results (
+    key INTEGER PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    score REAL,
+    move TEXT NOT NULL,
+    used REAL NOT NULL
+);
+"""
+
+
+@pytest.mark.parametrize('legacy', [False, True])
+def test_scores_come_back_as_integers(tmp_path, legacy):
+    path = str(tmp_path / 'cache.sqlite3')
+    if legacy:
+        with sqlite3.connect(path) as conn:
+            conn.executescript(LEGACY_SCHEMA)
+    cache = SearchCache(path)
+    board = ExplosiveBoard()
+    cache.store(board, 3, 12, chess.Move.from_uci('e2e4'))
+    assert cache.flush(5)
+    score, move, depth = cache.lookup(board)
+    assert (score, move.uci(), depth) == (12, 'e2e4', 3)
+    assert type(score) is int
@@ -0,0 +1,119 @@
+"""
+Throughput of the NumPy batch engine (engine/batch_board.py) against ExplosiveBoard.
+
+Plays --games random games of up to --plies plies with ExplosiveBoard, recording
+their moves, then replays every game both ways: one ExplosiveBoard per game, and
+all games at once in a BoardBatch, one push() per ply. Reports positions (moves
+applied) per second for each, and checks that both end every game in the same
+position with the same explosion state.
+
+Usage:
+  python tools/batch_bench.py
+  python tools/batch_bench.py --games 10000 --plies 40
+  python tools/batch_bench.py --games 500 --plies 80 --check-every-ply
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.batch_board import BoardBatch  # noqa: E402
+from engine.explosive_board import ExplosiveBoard  # noqa: E402
+
+
+def random_games(count, plies, seed):
+    """Move lists of `count` random games; captures are preferred, to get explosions."""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        board = ExplosiveBoard()
+        moves = []
+        while len(moves) < plies and not board.is_game_over():
+            valid = board.valid_moves()
+            if not valid:
+                break
+            captures = [move for move in valid if board.is_capture(move)]
+            move = rng.choice(captures if captures and rng.random() < 0.5 else valid)
+            board.push(move)
+            moves.append(move)
+        games.append(moves)
+    return games
+
+
+def ply_arrays(games, plies):
+    """Per ply: (from squares, to squares, promotions, active) over all games."""
+    arrays = []
+    for ply in range(plies):
+        active = np.array([ply < len(moves) for moves in games])
+        moves = [moves[ply] if ply < len(moves) else None for moves in games]
+        arrays.append((np.array([move.from_square if move else 0 for move in moves]),
+                       np.array([move.to_square if move else 0 for move in moves]),
+                       np.array([(move.promotion or 0) if move else 0 for move in moves]),
+                       active))
+    return arrays
+
+
+def state(board):
+    return board.fen(), sorted(board.exploded_squares), board.king_exploded, board.winner
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare ExplosiveBoard and BoardBatch replay throughput.')
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--plies', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--check-every-ply', action='store_true',
+                        help='compare the positions after every ply, not only at the end')
+    args = parser.parse_args(argv)
+
+    games = random_games(args.games, args.plies, args.seed)
+    total = sum(len(moves) for moves in games)
+    print(f"{args.games} games, {total} moves")
+
+    # One python-chess board per game
+    start = time.perf_counter()
+    boards = []
+    for moves in games:
+        board = ExplosiveBoard()
+        for move in moves:
+            board.push(move)
+        boards.append(board)
+    scalar_seconds = time.perf_counter() - start
+
+    # Every game at once
+    arrays = ply_arrays(games, args.plies)
+    batch = BoardBatch.from_boards([ExplosiveBoard() for _ in games])
+    mismatches = 0
+    start = time.perf_counter()
+    for ply, (from_squares, to_squares, promotions, active) in enumerate(arrays):
+        batch.push(from_squares, to_squares, promotions, active)
+        if args.check_every_ply:
+            elapsed = time.perf_counter() - start
+            expected = []
+            for moves in games:
+                board = ExplosiveBoard()
+                for move in moves[:ply + 1]:
+                    board.push(move)
+                expected.append(state(board))
+            mismatches += sum(state(board) != want for board, want in zip(batch.to_boards(), expected))
+            start = time.perf_counter() - elapsed
+    batch_seconds = time.perf_counter() - start
+
+    final = [state(board) for board in batch.to_boards()]
+    mismatches += sum(got != state(board) for got, board in zip(final, boards))
+
+    print(f"{'engine':<16}{'seconds':>10}{'positions/s':>14}")
+    print(f"{'ExplosiveBoard':<16}{scalar_seconds:>10.3f}{total / scalar_seconds:>14,.0f}")
+    print(f"{'BoardBatch':<16}{batch_seconds:>10.3f}{total / batch_seconds:>14,.0f}")
+    print(f"speed-up {scalar_seconds / batch_seconds:.1f}x, mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
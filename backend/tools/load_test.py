@@ -0,0 +1,353 @@
+"""
+HTTP load generator for the Explosive Chess Flask API.
+
+- Runs many simulated players at once, each playing games against the backend.
+- Every player follows the same loop the React client does:
+  /newgame, then per turn a few /gamestate polls, one /makemove and one /aimove.
+- Reports p50/p95/p99 latency per endpoint, throughput and error rate, next to
+  the worker count, CPU and memory usage of the server process(es).
+
+Usage:
+  python tools/load_test.py --spawn --players 8 --duration 30
+  python tools/load_test.py --url http://localhost:5000 --pid 1234 --ramp 1,2,4,8,16
+
+With --ramp every stage runs for --duration seconds with the given number of
+concurrent players, so the output shows where latency and errors start to climb.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import chess
+
+ENDPOINTS = ['/newgame', '/gamestate', '/makemove', '/aimove']
+
+# Rejections caused by other players moving on the same server-side game are
+# expected while the backend keeps a single board, and 503s are searches shed by
+# the admission control, so both are reported separately from real failures
+# (other 5xx, timeouts, refused connections).
+CLIENT_ERROR, SERVER_ERROR = 'rejected', 'errors'
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.latencies = []
+        self.rejected = 0
+        self.errors = 0
+
+    def merge(self, other):
+        self.requests += other.requests
+        self.latencies.extend(other.latencies)
+        self.rejected += other.rejected
+        self.errors += other.errors
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Player(threading.Thread):
+    """One simulated client playing games back to back until told to stop."""
+
+    def __init__(self, base_url, stop_event, polls_per_move, think_time, timeout, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url.rstrip('/')
+        self.stop_event = stop_event
+        self.polls_per_move = polls_per_move
+        self.think_time = think_time
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.stats = {endpoint: EndpointStats() for endpoint in ENDPOINTS}
+
+    def call(self, endpoint, payload=None):
+        """Issue one request, record its latency and return the decoded body (or None)."""
+        url = self.base_url + endpoint
+        data = None
+        headers = {}
+        if payload is not None:
+            data = json.dumps(payload).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(url, data=data, headers=headers,
+                                     method='POST' if payload is not None else 'GET')
+        stats = self.stats[endpoint]
+        stats.requests += 1
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                body = resp.read()
+            stats.latencies.append(time.perf_counter() - start)
+            return json.loads(body) if body else {}
+        except urllib.error.HTTPError as e:
+            stats.latencies.append(time.perf_counter() - start)
+            # 503 is the admission control shedding load (see admission.py)
+            if e.code < 500 or e.code == 503:
+                stats.rejected += 1
+            else:
+                stats.errors += 1
+        except Exception:
+            stats.errors += 1
+        return None
+
+    def pick_move(self, fen):
+        try:
+            position = chess.Board(fen)
+        except ValueError:
+            return None
+        moves = list(position.legal_moves)
+        if not moves:
+            return None
+        # Prefer quiet moves so games last long enough to exercise the AI
+        quiet = [m for m in moves if not position.is_capture(m)]
+        return self.rng.choice(quiet or moves).uci()
+
+    def pause(self):
+        if self.think_time > 0:
+            self.stop_event.wait(self.rng.uniform(0, 2 * self.think_time))
+
+    def run(self):
+        while not self.stop_event.is_set():
+            state = self.call('/newgame', {})
+            if state is None:
+                self.stop_event.wait(0.5)
+            while state and not self.stop_event.is_set():
+                for _ in range(self.polls_per_move):
+                    polled = self.call('/gamestate')
+                    if polled:
+                        state = polled
+                    self.pause()
+                if state.get('is_game_over') or 'fen' not in state:
+                    break
+                move = self.pick_move(state['fen'])
+                if move is None:
+                    break
+                moved = self.call('/makemove', {'move': move})
+                if moved is None:
+                    # Someone else moved on the shared board; resync and retry
+                    self.stop_event.wait(0.05)
+                    continue
+                if moved.get('is_game_over'):
+                    break
+                replied = self.call('/aimove', {'depth': 2})
+                if replied is None or replied.get('is_game_over'):
+                    break
+                state = replied
+
+
+def _read_proc(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def server_processes(root_pid):
+    """The server pid plus all of its descendants (prefork workers)."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        stat = _read_proc(f'/proc/{entry}/stat')
+        if not stat:
+            continue
+        # The command name may contain spaces, fields resume after the last ')'
+        fields = stat[stat.rfind(')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    pids, frontier = [root_pid], [root_pid]
+    while frontier:
+        pid = frontier.pop()
+        for child in children.get(pid, []):
+            pids.append(child)
+            frontier.append(child)
+    return pids
+
+
+class ResourceSampler(threading.Thread):
+    """Samples CPU time, RSS and worker/thread counts of the server from /proc."""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.samples = []
+        self.ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+    def snapshot(self):
+        cpu_ticks = rss_kb = threads = 0
+        pids = server_processes(self.pid)
+        for pid in pids:
+            stat = _read_proc(f'/proc/{pid}/stat')
+            status = _read_proc(f'/proc/{pid}/status')
+            if not stat or not status:
+                continue
+            fields = stat[stat.rfind(')') + 2:].split()
+            cpu_ticks += int(fields[11]) + int(fields[12])  # utime + stime
+            threads += int(fields[17])
+            for line in status.splitlines():
+                if line.startswith('VmRSS:'):
+                    rss_kb += int(line.split()[1])
+        return time.perf_counter(), cpu_ticks / self.ticks, rss_kb, len(pids), threads
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.samples.append(self.snapshot())
+            self.stop_event.wait(self.interval)
+        self.samples.append(self.snapshot())
+
+    def summary(self):
+        if len(self.samples) < 2:
+            return None
+        first, last = self.samples[0], self.samples[-1]
+        elapsed = last[0] - first[0]
+        cpu_percent = 100.0 * (last[1] - first[1]) / elapsed if elapsed > 0 else 0.0
+        return {
+            'cpu_percent': round(cpu_percent, 1),
+            'rss_peak_mb': round(max(s[2] for s in self.samples) / 1024.0, 1),
+            'processes': max(s[3] for s in self.samples),
+            'threads_peak': max(s[4] for s in self.samples),
+        }
+
+
+def run_stage(args, players):
+    stop_event = threading.Event()
+    workers = [Player(args.url, stop_event, args.polls_per_move, args.think_time,
+                      args.timeout, seed=args.seed + i) for i in range(players)]
+    sampler = ResourceSampler(args.pid) if args.pid else None
+    if sampler:
+        sampler.start()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    stop_event.wait(args.duration)
+    stop_event.set()
+    for worker in workers:
+        worker.join(args.timeout + 1)
+    elapsed = time.perf_counter() - start
+    if sampler:
+        sampler.stop_event.set()
+        sampler.join()
+
+    totals = {endpoint: EndpointStats() for endpoint in ENDPOINTS}
+    for worker in workers:
+        for endpoint, stats in worker.stats.items():
+            totals[endpoint].merge(stats)
+
+    report = {'players': players, 'seconds': round(elapsed, 2), 'endpoints': {}}
+    requests = rejected = errors = 0
+    for endpoint, stats in totals.items():
+        requests += stats.requests
+        rejected += stats.rejected
+        errors += stats.errors
+        report['endpoints'][endpoint] = {
+            'requests': stats.requests,
+            'p50_ms': _ms(percentile(stats.latencies, 50)),
+            'p95_ms': _ms(percentile(stats.latencies, 95)),
+            'p99_ms': _ms(percentile(stats.latencies, 99)),
+            CLIENT_ERROR: stats.rejected,
+            SERVER_ERROR: stats.errors,
+        }
+    report['requests'] = requests
+    report['throughput_rps'] = round(requests / elapsed, 1) if elapsed > 0 else 0.0
+    report['error_rate'] = round(errors / requests, 4) if requests else 0.0
+    report['reject_rate'] = round(rejected / requests, 4) if requests else 0.0
+    report['server'] = sampler.summary() if sampler else None
+    return report
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000.0, 1)
+
+
+def print_report(report):
+    print(f"\n== {report['players']} players, {report['seconds']}s: "
+          f"{report['throughput_rps']} req/s, error rate {report['error_rate']:.2%}, "
+          f"reject rate {report['reject_rate']:.2%}")
+    print(f"{'endpoint':<12}{'requests':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'rejected':>10}{'errors':>8}")
+    for endpoint, row in report['endpoints'].items():
+        print(f"{endpoint:<12}{row['requests']:>10}{_cell(row['p50_ms'])}{_cell(row['p95_ms'])}"
+              f"{_cell(row['p99_ms'])}{row[CLIENT_ERROR]:>10}{row[SERVER_ERROR]:>8}")
+    server = report['server']
+    if server:
+        print(f"server: {server['processes']} process(es), {server['threads_peak']} threads peak, "
+              f"CPU {server['cpu_percent']}%, RSS peak {server['rss_peak_mb']} MB")
+
+
+def _cell(value):
+    return f"{'-' if value is None else value:>10}"
+
+
+def wait_for_server(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url.rstrip('/') + '/api/health', timeout=1):
+                return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--players', type=int, default=4, help='concurrent simulated players')
+    parser.add_argument('--ramp', help='comma separated player counts, one stage each')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per stage')
+    parser.add_argument('--polls-per-move', type=int, default=2,
+                        help='/gamestate polls issued before every move')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='mean pause between a player\'s requests, in seconds')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per request timeout')
+    parser.add_argument('--pid', type=int, help='server pid to sample CPU and memory from')
+    parser.add_argument('--spawn', action='store_true',
+                        help='start backend/app.py locally for the duration of the run')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='also write the reports to this file')
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        port = args.url.rsplit(':', 1)[-1].split('/')[0]
+        code = f"import app; app.app.run(port={int(port)}, threaded=True)"
+        server = subprocess.Popen([sys.executable, '-c', code], cwd=backend_dir,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        args.pid = args.pid or server.pid
+        if not wait_for_server(args.url, 60):
+            server.terminate()
+            parser.error('backend did not become healthy within 60s')
+
+    stages = [int(n) for n in args.ramp.split(',')] if args.ramp else [args.players]
+    reports = []
+    try:
+        for players in stages:
+            report = run_stage(args, players)
+            print_report(report)
+            reports.append(report)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
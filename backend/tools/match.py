@@ -0,0 +1,157 @@
+"""
+Engine-vs-engine match runner for the minimax search in engine/search.py.
+
+Plays games between two search configurations from randomized openings, each
+opening twice with colours swapped, and reports the score, an Elo estimate and
+the nodes and time each side spent per move. Used to weigh the node savings of a
+search feature against any strength it costs.
+
+Usage:
+  python tools/match.py --a null_move,lmr --b none --depth 3 --games 20
+  python tools/match.py --a pvs,aspiration --b none --depth 3
+
+Feature names: killers, history, pvs, aspiration, null_move, lmr.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chess  # noqa: E402
+
+from engine import search  # noqa: E402
+from engine.explosive_board import ExplosiveBoard  # noqa: E402
+from engine.search_context import SearchContext  # noqa: E402
+from engine.search_stats import SearchStats  # noqa: E402
+
+FEATURES = ('killers', 'history', 'pvs', 'aspiration', 'null_move', 'lmr')
+# Ordering heuristics are on unless switched off explicitly
+DEFAULT_ON = ('killers', 'history')
+
+
+def parse_features(spec):
+    enabled = set(DEFAULT_ON)
+    if spec and spec != 'none':
+        for name in spec.split(','):
+            name = name.strip()
+            negate = name.startswith('-')
+            name = name.lstrip('-')
+            if name not in FEATURES:
+                raise argparse.ArgumentTypeError(f'unknown feature: {name}')
+            if negate:
+                enabled.discard(name)
+            else:
+                enabled.add(name)
+    return enabled
+
+
+class Player:
+    def __init__(self, name, features, depth):
+        self.name = name
+        self.features = features
+        self.depth = depth
+        self.stats = SearchStats(name)
+        self.moves = 0
+
+    def choose(self, board):
+        ctx = SearchContext(self.stats,
+                            use_killers='killers' in self.features,
+                            use_history='history' in self.features,
+                            pvs='pvs' in self.features,
+                            aspiration='aspiration' in self.features,
+                            null_move='null_move' in self.features,
+                            lmr='lmr' in self.features)
+        start = time.perf_counter()
+        _, move = search.search_best_move(board, self.depth, ctx)
+        self.stats.search_time += time.perf_counter() - start
+        self.moves += 1
+        return move
+
+
+def random_opening(rng, plies):
+    board = ExplosiveBoard()
+    for _ in range(plies):
+        moves = board.valid_moves()
+        if not moves or board.is_game_over():
+            break
+        board.push(rng.choice(moves))
+    return board.fen()
+
+
+def play_game(white, black, fen, max_plies):
+    """Play one game, returning 1, 0.5 or 0 from White's point of view."""
+    board = ExplosiveBoard(fen)
+    for _ in range(max_plies):
+        if board.is_game_over():
+            break
+        player = white if board.turn == chess.WHITE else black
+        move = player.choose(board)
+        if move is None:
+            break
+        board.push(move)
+
+    if board.is_game_over():
+        result = board.result()
+        return {'1-0': 1.0, '0-1': 0.0}.get(result, 0.5)
+    # Adjudicate unfinished games on material
+    score = search.explosion_aware_evaluation(board)
+    return 1.0 if score > 300 else 0.0 if score < -300 else 0.5
+
+
+def elo_difference(score):
+    if score <= 0.0 or score >= 1.0:
+        return float('inf') if score >= 1.0 else -float('inf')
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play two search configurations against each other.')
+    parser.add_argument('--a', type=parse_features, default=parse_features('none'),
+                        help='features of engine A, comma separated, or "none"')
+    parser.add_argument('--b', type=parse_features, default=parse_features('none'),
+                        help='features of engine B, comma separated, or "none"')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--games', type=int, default=10, help='games, rounded up to an even number')
+    parser.add_argument('--opening-plies', type=int, default=6)
+    parser.add_argument('--max-plies', type=int, default=120)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    a = Player('A', args.a, args.depth)
+    b = Player('B', args.b, args.depth)
+    print(f"A: {', '.join(sorted(a.features)) or 'plain alpha-beta'}")
+    print(f"B: {', '.join(sorted(b.features)) or 'plain alpha-beta'}")
+
+    wins = draws = losses = 0
+    for pair in range((args.games + 1) // 2):
+        fen = random_opening(rng, args.opening_plies)
+        for a_is_white in (True, False):
+            white, black = (a, b) if a_is_white else (b, a)
+            result = play_game(white, black, fen, args.max_plies)
+            a_score = result if a_is_white else 1.0 - result
+            if a_score == 1.0:
+                wins += 1
+            elif a_score == 0.0:
+                losses += 1
+            else:
+                draws += 1
+            print(f"game {2 * pair + (0 if a_is_white else 1) + 1}: A {'white' if a_is_white else 'black'}, "
+                  f"A scores {a_score}")
+
+    games = wins + draws + losses
+    score = (wins + 0.5 * draws) / games if games else 0.0
+    print(f"\nA vs B: +{wins} ={draws} -{losses}  score {score:.1%}  Elo {elo_difference(score):+.0f}")
+    for player in (a, b):
+        moves = max(player.moves, 1)
+        print(f"{player.name}: {player.stats.nodes / moves:.0f} nodes/move, "
+              f"{1000.0 * player.stats.search_time / moves:.0f} ms/move")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""
+Streaming PGN import and bulk validation under the ExplosiveBoard rules.
+
+- Reads multi-game PGN files line by line and cuts them into games without
+  parsing, so memory stays constant however large the file is.
+- Worker processes parse each game and replay it through ExplosiveBoard: every
+  move must be legal and pass is_valid_move, and the squares each capture blew
+  up are recorded. SAN is resolved on the exploded board itself, not on the
+  plain board python-chess' game parser would use, since the two diverge after
+  the first explosion. Only the mainline is read.
+- Writes one JSON summary per game (JSONL) and, for games that validate, a
+  compact binary archive that `replay` streams back through the same checks.
+
+Archive format (little-endian): the magic b'ECGA' and a version byte, then per
+game a header `<IHBB` (game number, plies, result code, start-FEN length), the
+start FEN in ASCII when it is not the standard one, and one uint16 per ply
+(from square | to square << 6 | promotion piece type << 12).
+
+Usage:
+  python tools/pgn_import.py import games.pgn --summary games.jsonl --archive games.ecga
+  python tools/pgn_import.py import huge.pgn --workers 8 --batch 500 --archive huge.ecga
+  python tools/pgn_import.py replay games.ecga --workers 8
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import re
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chess  # noqa: E402
+import chess.pgn  # noqa: E402  (tag and movetext patterns)
+
+from engine.explosive_board import ExplosiveBoard  # noqa: E402
+
+ARCHIVE_MAGIC = b'ECGA'
+ARCHIVE_VERSION = 1
+GAME_HEADER = struct.Struct('<IHBB')
+RESULT_CODES = {'*': 0, '1-0': 1, '0-1': 2, '1/2-1/2': 3}
+RESULTS = {code: result for result, code in RESULT_CODES.items()}
+SUMMARY_TAGS = ('Event', 'Site', 'Date', 'White', 'Black', 'Result')
+COMMENT_REGEX = re.compile(r'\{[^}]*\}|;[^\n]*')
+
+
+def split_games(lines):
+    """Yield the text of each game in a PGN stream, one game in memory at a time."""
+    buffer = []
+    in_movetext = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('[') and in_movetext:
+            yield ''.join(buffer)
+            buffer = []
+            in_movetext = False
+        if stripped and not stripped.startswith('['):
+            in_movetext = True
+        buffer.append(line)
+    if in_movetext:
+        yield ''.join(buffer)
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def encode_move(move):
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(bits):
+    return chess.Move(bits & 63, (bits >> 6) & 63, (bits >> 12) or None)
+
+
+def parse_game(text):
+    """Split the text of one game into its tags and mainline SAN moves."""
+    tags, movetext = {}, []
+    for line in text.splitlines():
+        match = chess.pgn.TAG_REGEX.match(line)
+        if match:
+            tags[match.group(1)] = match.group(2)
+        elif not line.startswith('%'):
+            movetext.append(line)
+
+    sans, depth = [], 0
+    for match in chess.pgn.MOVETEXT_REGEX.finditer(COMMENT_REGEX.sub(' ', '\n'.join(movetext))):
+        token = match.group(0)
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth = max(depth - 1, 0)
+        elif match.group(1) and depth == 0:
+            sans.append(token)
+    return tags, sans
+
+
+def replay(board, moves):
+    """
+    Play `moves` (Move objects or SAN) on `board` under the explosion rules.
+
+    Returns (moves played, explosions as [ply, [squares]], error or None); stops at
+    the first move that is illegal, breaks the explosion rules or follows the end
+    of the game.
+    """
+    played, explosions = [], []
+    for ply, move in enumerate(moves, 1):
+        name = move if isinstance(move, str) else move.uci()
+        if board.is_game_over():
+            return played, explosions, f'move {name} after the end of the game'
+        try:
+            if isinstance(move, str):
+                move = board.parse_san(move)
+            elif not board.is_legal(move):
+                raise ValueError(move)
+        except ValueError:
+            return played, explosions, f'illegal move {name}'
+        if not board.is_valid_move(move):
+            return played, explosions, f'move {name} breaks the explosion rules'
+        board.push(move)
+        played.append(move)
+        if board.exploded():
+            explosions.append([ply, [chess.square_name(sq) for sq in board.exploded()]])
+    return played, explosions, None
+
+
+def import_game(number, text):
+    """Worker task: parse and validate one game, returning (summary, archive record or None)."""
+    tags, sans = parse_game(text)
+    summary = {'game': number, 'tags': {tag: tags[tag] for tag in SUMMARY_TAGS if tag in tags}}
+    start_fen = tags.get('FEN')
+    try:
+        board = ExplosiveBoard(start_fen) if start_fen else ExplosiveBoard()
+    except ValueError as e:
+        summary.update(valid=False, error=f'invalid FEN: {e}')
+        return summary, None
+
+    moves, explosions, error = replay(board, sans)
+    summary.update(plies=len(moves), explosions=explosions, final_fen=board.fen(),
+                   result=board.result(), valid=error is None)
+    if error:
+        summary['error'] = error
+        return summary, None
+
+    fen = start_fen.encode('ascii') if start_fen and start_fen != chess.STARTING_FEN else b''
+    record = (GAME_HEADER.pack(number, len(moves), RESULT_CODES.get(tags.get('Result', '*'), 0), len(fen))
+              + fen + struct.pack(f'<{len(moves)}H', *map(encode_move, moves)))
+    return summary, record
+
+
+def import_batch(batch):
+    return [import_game(number, text) for number, text in batch]
+
+
+def read_archive(handle):
+    """Yield (game number, start FEN or None, result, moves) from an archive stream."""
+    if handle.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+        raise ValueError('not an Explosive Chess game archive')
+    version = handle.read(1)
+    if version != bytes([ARCHIVE_VERSION]):
+        raise ValueError(f'unsupported archive version {version!r}')
+    while True:
+        header = handle.read(GAME_HEADER.size)
+        if not header:
+            return
+        number, plies, result, fen_length = GAME_HEADER.unpack(header)
+        fen = handle.read(fen_length).decode('ascii') if fen_length else None
+        moves = struct.unpack(f'<{plies}H', handle.read(2 * plies))
+        yield number, fen, RESULTS.get(result, '*'), [decode_move(bits) for bits in moves]
+
+
+def replay_batch(batch):
+    """Worker task: replay archived games, returning (game number, error or None) pairs."""
+    outcomes = []
+    for number, fen, result, moves in batch:
+        board = ExplosiveBoard(fen) if fen else ExplosiveBoard()
+        played, explosions, error = replay(board, moves)
+        outcomes.append((number, error))
+    return outcomes
+
+
+def run_pool(tasks, worker, workers, on_result):
+    """
+    Run `worker` over `tasks` in a process pool with a bounded number of batches in
+    flight, so a lazily produced task stream is never read far ahead of the writers.
+    Results are passed to `on_result` in input order.
+    """
+    if workers <= 1:
+        for task in tasks:
+            on_result(worker(task))
+        return
+    pending = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        for task in tasks:
+            pending.append(pool.submit(worker, task))
+            if len(pending) >= 2 * workers:
+                on_result(pending.popleft().result())
+        while pending:
+            on_result(pending.popleft().result())
+
+
+def import_command(args):
+    totals = collections.Counter()
+    start = time.perf_counter()
+    summary_file = open(args.summary, 'w') if args.summary else None
+    archive_file = open(args.archive, 'wb') if args.archive else None
+    if archive_file:
+        archive_file.write(ARCHIVE_MAGIC + bytes([ARCHIVE_VERSION]))
+
+    def on_result(results):
+        for summary, record in results:
+            totals['games'] += 1
+            totals['valid' if summary['valid'] else 'invalid'] += 1
+            totals['plies'] += summary.get('plies', 0)
+            totals['explosions'] += len(summary.get('explosions', ()))
+            if summary_file:
+                summary_file.write(json.dumps(summary) + '\n')
+            if archive_file and record:
+                archive_file.write(record)
+        if args.progress and totals['games'] % args.progress < len(results):
+            print(f"{totals['games']} games, {totals['invalid']} invalid", file=sys.stderr)
+
+    try:
+        with open(args.pgn, encoding='utf-8', errors='replace') as handle:
+            games = enumerate(split_games(handle), 1)
+            run_pool(batched(games, args.batch), import_batch, args.workers, on_result)
+    finally:
+        for output in (summary_file, archive_file):
+            if output:
+                output.close()
+
+    seconds = time.perf_counter() - start
+    print(f"{totals['games']} games ({totals['valid']} valid, {totals['invalid']} invalid), "
+          f"{totals['plies']} plies, {totals['explosions']} explosions in {seconds:.1f}s "
+          f"({totals['games'] / seconds if seconds else 0:.0f} games/s)")
+    return 0 if totals['invalid'] == 0 else 1
+
+
+def replay_command(args):
+    totals = collections.Counter()
+    start = time.perf_counter()
+
+    def on_result(outcomes):
+        for number, error in outcomes:
+            totals['games'] += 1
+            if error:
+                totals['invalid'] += 1
+                print(f'game {number}: {error}')
+
+    with open(args.archive, 'rb') as handle:
+        run_pool(batched(read_archive(handle), args.batch), replay_batch, args.workers, on_result)
+
+    seconds = time.perf_counter() - start
+    print(f"{totals['games']} games replayed, {totals['invalid']} invalid in {seconds:.1f}s "
+          f"({totals['games'] / seconds if seconds else 0:.0f} games/s)")
+    return 0 if totals['invalid'] == 0 else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate PGN games under the explosion rules.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help='validate a PGN file, write summaries and an archive')
+    import_parser.add_argument('pgn')
+    import_parser.add_argument('--summary', help='JSONL file with one summary per game')
+    import_parser.add_argument('--archive', help='binary archive of the games that validate')
+    import_parser.add_argument('--progress', type=int, default=0, help='report every N games on stderr')
+
+    replay_parser = commands.add_parser('replay', help='re-validate the games of an archive')
+    replay_parser.add_argument('archive')
+
+    for sub in (import_parser, replay_parser):
+        sub.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        sub.add_argument('--batch', type=int, default=200, help='games per worker task')
+
+    args = parser.parse_args(argv)
+    return import_command(args) if args.command == 'import' else replay_command(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
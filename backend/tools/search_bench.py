@@ -0,0 +1,95 @@
+"""
+Fixed-depth search benchmark for the minimax in engine/search.py.
+
+Searches a set of positions with different settings and reports nodes, cutoffs,
+the share of cutoffs produced by the first move and time, so the effect of each
+search feature on the tree size can be compared directly.
+
+- --mode ordering: fixed-depth alpha-beta with each move-ordering heuristic.
+- --mode windows: iterative deepening as /aimove runs it, plain alpha-beta vs PVS
+  vs PVS with aspiration windows, including re-search rates.
+
+Usage:
+  python tools/search_bench.py --depth 3
+  python tools/search_bench.py --mode windows --depth 4
+  python tools/search_bench.py --depth 3 --fen "<fen>" --fen "<fen>"
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import search  # noqa: E402
+from engine.explosive_board import ExplosiveBoard  # noqa: E402
+from engine.search_context import SearchContext  # noqa: E402
+
+POSITIONS = [
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r2q1rk1/ppp2ppp/2np1n2/2b1p1B1/2B1P1b1/2NP1N2/PPP2PPP/R2Q1RK1 w - - 0 8",
+    "rnbqkbnr/ppp2ppp/8/3pp3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 0 3",
+    "r3k2r/ppp2ppp/2n1bn2/3qp3/3P4/2N1BN2/PPP2PPP/R2QK2R b KQkq - 0 9",
+    "4r1k1/pp3ppp/2p5/3n4/3P4/2N2Q2/PP3PPP/4R1K1 w - - 0 20",
+]
+
+ORDERING_CONFIGS = {
+    'blast only': dict(use_killers=False, use_history=False),
+    'killers': dict(use_killers=True, use_history=False),
+    'history': dict(use_killers=False, use_history=True),
+    'killers+history': dict(use_killers=True, use_history=True),
+}
+
+WINDOW_CONFIGS = {
+    'alpha-beta': dict(pvs=False, aspiration=False),
+    'pvs': dict(pvs=True, aspiration=False),
+    'pvs+aspiration': dict(pvs=True, aspiration=True),
+}
+
+
+def run(fens, depth, options, iterative):
+    stats = search.SEARCH_STATS
+    stats.reset()
+    start = time.perf_counter()
+    for fen in fens:
+        board = ExplosiveBoard(fen)
+        if iterative:
+            search.search_best_move(board, depth, SearchContext(stats, **options))
+        else:
+            ctx = SearchContext(stats, pvs=False, aspiration=False, **options)
+            search.minimax(board, depth, -float('inf'), float('inf'), board.turn, 0, ctx)
+    return stats.snapshot(), time.perf_counter() - start
+
+
+def _rate(part, whole):
+    return 100.0 * part / whole if whole else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare search settings by tree size.')
+    parser.add_argument('--mode', choices=['ordering', 'windows'], default='ordering')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fen', action='append', help='position to search (repeatable)')
+    args = parser.parse_args(argv)
+    fens = args.fen or POSITIONS
+
+    iterative = args.mode == 'windows'
+    configs = WINDOW_CONFIGS if iterative else ORDERING_CONFIGS
+
+    print(f"{len(fens)} positions, depth {args.depth}, {args.mode}")
+    print(f"{'config':<18}{'nodes':>10}{'cutoffs':>10}{'first %':>9}{'seconds':>9}"
+          f"{'pvs re %':>10}{'asp re %':>10}{'vs first':>10}")
+    baseline = None
+    for name, options in configs.items():
+        snapshot, seconds = run(fens, args.depth, options, iterative)
+        baseline = baseline or snapshot['nodes']
+        first = _rate(snapshot['first_move_cutoffs'], snapshot['cutoffs'])
+        pvs = _rate(snapshot['pvs_researches'], snapshot['pvs_searches'])
+        aspiration = _rate(snapshot['aspiration_researches'], snapshot['aspiration_searches'])
+        print(f"{name:<18}{snapshot['nodes']:>10}{snapshot['cutoffs']:>10}{first:>8.1f}%{seconds:>9.2f}"
+              f"{pvs:>9.1f}%{aspiration:>9.1f}%{_rate(snapshot['nodes'], baseline):>9.0f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Cold-start benchmark: import time and memory of the backend modules.
+
+Every measurement runs in a fresh interpreter, so nothing is already imported or
+cached in the process; the median over the runs is reported, with the peak RSS
+of the process after the import and whether torch ended up loaded.
+
+The app is imported with game persistence and the search cache turned off
+(GAME_DB_PATH='', AI_SEARCH_CACHE=''), so the benchmark creates no files; pass
+--keep-env to measure with the environment as it is.
+
+Usage:
+  python tools/startup_bench.py
+  python tools/startup_bench.py --runs 10 --module app --module engine.nn_eval
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['app', 'engine.chess_engine', 'engine.search', 'engine.nn_eval']
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+seconds = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss //= 1024  # bytes there, KiB on Linux
+print(json.dumps({'seconds': seconds, 'rss_kb': rss, 'torch': 'torch' in sys.modules}))
+"""
+
+
+def measure(module, env):
+    output = subprocess.run([sys.executable, '-c', PROBE, module], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    # The import may print; the measurement is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure import time and RSS of backend modules.')
+    parser.add_argument('--module', action='append', help='module to import (repeatable)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--keep-env', action='store_true',
+                        help='do not turn off game persistence and the search cache')
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, PYTHONPATH=BACKEND)
+    if not args.keep_env:
+        env.update(GAME_DB_PATH='', AI_SEARCH_CACHE='')
+
+    print(f"{'module':<22}{'import s':>10}{'min s':>8}{'RSS MB':>9}{'torch':>7}")
+    for module in args.module or MODULES:
+        runs = [measure(module, env) for _ in range(args.runs)]
+        seconds = [run['seconds'] for run in runs]
+        rss = statistics.median(run['rss_kb'] for run in runs) / 1024
+        print(f"{module:<22}{statistics.median(seconds):>10.3f}{min(seconds):>8.3f}{rss:>9.0f}"
+              f"{'yes' if runs[0]['torch'] else 'no':>7}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())